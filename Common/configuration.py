@@ -0,0 +1,81 @@
+import logging
+import os
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+logger = logging.getLogger(__name__)
+
+_TRUE_VALUES = {"1", "true", "yes", "on"}
+_warned_default_run = False
+
+
+def _coerce(value: str, default: Any) -> Any:
+    """Convert an environment string to the type of the default value."""
+    if isinstance(default, bool):
+        return value.strip().lower() in _TRUE_VALUES
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return value
+
+
+def get_setting(config: Optional[RunnableConfig], name: str, default: Any = None) -> Any:
+    """Read a runtime setting.
+
+    Looks in ``config["configurable"]`` first, then in the environment variable
+    ``name.upper()``, and finally falls back to ``default``. Environment values
+    are converted to the type of ``default``.
+
+    Args:
+        config: The RunnableConfig passed to the node (may be None).
+        name: Setting name, e.g. "search_cache_bypass".
+        default: Value used when the setting is not provided.
+
+    Returns:
+        The configured value.
+    """
+    configurable = (config or {}).get("configurable") or {}
+    if configurable.get(name) is not None:
+        return configurable[name]
+
+    env_value = os.getenv(name.upper())
+    if env_value is not None and env_value != "":
+        return _coerce(env_value, default)
+    return default
+
+
+def as_set(value: Any) -> set:
+    """Names from a list or a comma-separated string setting."""
+    if not value:
+        return set()
+    if isinstance(value, str):
+        return {item.strip() for item in value.split(",") if item.strip()}
+    return set(value)
+
+
+def node_name(config: Optional[RunnableConfig]) -> Optional[str]:
+    """Name of the graph node a call is made from, as recorded by LangGraph."""
+    return ((config or {}).get("metadata") or {}).get("langgraph_node")
+
+
+def get_run_id(config: Optional[RunnableConfig]) -> str:
+    """Identifier grouping the calls of one analysis run.
+
+    Taken from ``configurable.run_id``, then ``configurable.thread_id``;
+    calls made without either are grouped under "default", which mixes
+    concurrent runs together, so this is logged once per process.
+    """
+    global _warned_default_run
+    configurable = (config or {}).get("configurable") or {}
+    run_id = configurable.get("run_id") or configurable.get("thread_id")
+    if run_id:
+        return str(run_id)
+    if not _warned_default_run:
+        _warned_default_run = True
+        logger.warning(
+            "Model calls made without configurable.run_id or thread_id are pooled under run "
+            "\"default\"; pass a run_id per analysis to keep usage and priorities per run"
+        )
+    return "default"
@@ -0,0 +1,307 @@
+import asyncio
+import heapq
+import itertools
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+
+from backend.routers.Common.configuration import get_run_id, get_setting, node_name
+
+# Limits per provider as (max concurrency, requests per minute); 0 means
+# unlimited. Override with GOVERNOR_<KEY>_CONCURRENCY, GOVERNOR_<KEY>_RPM and
+# GOVERNOR_<KEY>_BURST, where KEY is the provider ("GEMINI") or provider and
+# model ("GEMINI_GEMINI_2_0_FLASH_EXP") upper-cased with "_" separators.
+DEFAULT_LIMITS = {
+    "gemini": (10, 0),
+    "tavily": (8, 0),
+    "quickfs": (int(os.getenv("QUICKFS_MAX_CONCURRENCY", "4")), 0),
+}
+# Pause applied to a provider after a rate-limit error without Retry-After
+DEFAULT_COOLDOWN_SECONDS = 2.0
+
+# Order in which queued calls get a free slot, lowest first: steps that
+# finish a run go before the analysts, reflection and new runs' planning.
+# Nodes not listed rank with the analysts.
+DEFAULT_NODE_PRIORITIES = {
+    "combine": 0,
+    "finalize": 0,
+    "aggregate_analyses": 1,
+    "quantitative_analysis": 1,
+    "analyst": 2,
+    "retriever": 2,
+    "reflect": 3,
+    "retry": 3,
+    "orchestrator": 4,
+    "research_planner": 4,
+    "planner": 4,
+}
+DEFAULT_PRIORITY = 2
+
+_run_started: "OrderedDict[str, float]" = OrderedDict()
+_run_started_lock = threading.Lock()
+
+
+def _run_start(run_id: str) -> float:
+    """When the scheduler first saw a call of the run."""
+    with _run_started_lock:
+        started = _run_started.get(run_id)
+        if started is None:
+            started = _run_started[run_id] = time.monotonic()
+            if len(_run_started) > 1000:
+                _run_started.popitem(last=False)
+        return started
+
+
+def call_priority(config: Optional[RunnableConfig]) -> Tuple:
+    """Scheduling key of a call made from a node, lower is served first.
+
+    Calls are ordered by the rank of their node (DEFAULT_NODE_PRIORITIES,
+    overridable with a "node_priorities" dict in the configurable), then by
+    the age of their run so that runs further along finish first. Setting
+    "scheduler_priority" to false gives first-come, first-served.
+    """
+    if not get_setting(config, "scheduler_priority", True):
+        return ()
+    priorities = {**DEFAULT_NODE_PRIORITIES, **(get_setting(config, "node_priorities", None) or {})}
+    rank = priorities.get(node_name(config), DEFAULT_PRIORITY)
+    return (rank, _run_start(get_run_id(config)))
+
+
+def env_key(key: str) -> str:
+    return re.sub(r"[^A-Z0-9]+", "_", key.upper()).strip("_")
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """Whether an SDK exception reports HTTP 429 / quota exhaustion."""
+    for attribute in ("status_code", "code", "status"):
+        if getattr(error, attribute, None) in (429, "429", "RESOURCE_EXHAUSTED"):
+            return True
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    name = type(error).__name__
+    return name in ("ResourceExhausted", "RateLimitError", "TooManyRequests") or (
+        "RESOURCE_EXHAUSTED" in str(error)
+    )
+
+
+class _Slots:
+    """Counting semaphore that serves waiters by priority, then arrival.
+
+    Can be shared by several event loops: asyncio.Semaphore belongs to the
+    loop it is first used on, while the governor is process-wide, so waiters
+    park on a future of their own loop and are woken with
+    call_soon_threadsafe when the slot is released elsewhere.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.in_use = 0
+        # Heap of (priority, arrival, loop, future)
+        self._waiters: List[Tuple] = []
+        self._arrivals = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self, priority: Tuple = ()):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self.in_use < self.limit and not self._waiters:
+                self.in_use += 1
+                return
+            waiter = (priority, next(self._arrivals), loop, loop.create_future())
+            heapq.heappush(self._waiters, waiter)
+        future = waiter[3]
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    heapq.heapify(self._waiters)
+                    raise
+            # The slot was handed over as we were cancelled: pass it on
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self.in_use -= 1
+                return
+            _, _, loop, future = heapq.heappop(self._waiters)
+        # The slot goes straight to the next waiter, in_use is unchanged
+        if loop is _running_loop():
+            self._grant(future)
+        else:
+            loop.call_soon_threadsafe(self._grant, future)
+
+    def _grant(self, future: asyncio.Future):
+        if future.done():  # Cancelled while the grant was in transit
+            self.release()
+        else:
+            future.set_result(None)
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class TokenBucket:
+    """Requests-per-minute limiter; callers reserve a token and sleep for it."""
+
+    def __init__(self, requests_per_minute: float, burst: Optional[int] = None):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = float(burst or max(1, round(self.rate)))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Take a token and return how long to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+@dataclass
+class LimitStats:
+    """Counters of one limit, for sizing quotas against throughput."""
+    acquired: int = 0
+    in_flight: int = 0
+    queued: int = 0
+    max_queued: int = 0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    rate_limited: int = 0
+
+    def as_dict(self) -> Dict:
+        result = asdict(self)
+        result["avg_wait_seconds"] = self.wait_seconds / self.acquired if self.acquired else 0.0
+        return result
+
+
+class Limit:
+    """Concurrency cap and request rate of one provider or model."""
+
+    def __init__(self, name: str, max_concurrency: int = 0, requests_per_minute: float = 0, burst: Optional[int] = None):
+        self.name = name
+        self.slots = _Slots(max_concurrency) if max_concurrency > 0 else None
+        self.bucket = TokenBucket(requests_per_minute, burst) if requests_per_minute > 0 else None
+        self.cooldown_until = 0.0
+        self.stats = LimitStats()
+
+    async def acquire(self, priority: Tuple = ()):
+        start = time.monotonic()
+        self.stats.queued += 1
+        self.stats.max_queued = max(self.stats.max_queued, self.stats.queued)
+        try:
+            if self.slots is not None:
+                await self.slots.acquire(priority)
+            try:
+                delay = self.bucket.reserve() if self.bucket is not None else 0.0
+                delay = max(delay, self.cooldown_until - time.monotonic())
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            except BaseException:
+                if self.slots is not None:
+                    self.slots.release()
+                raise
+        finally:
+            self.stats.queued -= 1
+
+        waited = time.monotonic() - start
+        self.stats.acquired += 1
+        self.stats.in_flight += 1
+        self.stats.wait_seconds += waited
+        self.stats.max_wait_seconds = max(self.stats.max_wait_seconds, waited)
+
+    def release(self):
+        self.stats.in_flight -= 1
+        if self.slots is not None:
+            self.slots.release()
+
+    def cool_down(self, seconds: float):
+        """Hold back new requests after the provider reported a rate limit."""
+        self.stats.rate_limited += 1
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+
+
+class Governor:
+    """Process-wide rate limits and concurrency caps for outbound API calls.
+
+    Every call to Gemini (through ChatClient), Tavily and QuickFS runs inside
+    ``governor.slot(provider, model)``, which waits for a free slot and a rate
+    token of the provider's limit and, when configured, of the model's limit.
+    When calls queue, free slots go to the lowest ``priority`` first (see
+    call_priority). Limits are created from the environment on first use (see
+    DEFAULT_LIMITS) and report queue depth and wait times through ``stats()``.
+    """
+
+    def __init__(self, defaults: Optional[Dict[str, Tuple[int, float]]] = None):
+        self.defaults = dict(DEFAULT_LIMITS if defaults is None else defaults)
+        self._limits: Dict[str, Optional[Limit]] = {}
+        self._lock = threading.Lock()
+
+    def limit(self, key: str) -> Optional[Limit]:
+        """The limit for a provider or "provider/model" key, None if unlimited."""
+        if key in self._limits:
+            return self._limits[key]
+        with self._lock:
+            if key not in self._limits:
+                concurrency, rpm = self.defaults.get(key, (0, 0))
+                prefix = f"GOVERNOR_{env_key(key)}"
+                concurrency = int(os.getenv(f"{prefix}_CONCURRENCY") or concurrency)
+                rpm = float(os.getenv(f"{prefix}_RPM") or rpm)
+                burst = os.getenv(f"{prefix}_BURST")
+                self._limits[key] = (
+                    Limit(key, concurrency, rpm, int(burst) if burst else None)
+                    if concurrency > 0 or rpm > 0 else None
+                )
+            return self._limits[key]
+
+    def _limits_for(self, provider: str, model: Optional[str]) -> List[Limit]:
+        keys = [provider] + ([f"{provider}/{model}"] if model else [])
+        return [limit for limit in map(self.limit, keys) if limit is not None]
+
+    @asynccontextmanager
+    async def slot(self, provider: str, model: Optional[str] = None, priority: Tuple = ()):
+        """Hold a request slot of the provider (and model) for the block."""
+        acquired = []
+        try:
+            # Always provider before model, so waiters cannot deadlock
+            for limit in self._limits_for(provider, model):
+                await limit.acquire(priority)
+                acquired.append(limit)
+            yield
+        finally:
+            for limit in reversed(acquired):
+                limit.release()
+
+    def report_rate_limited(self, provider: str, model: Optional[str] = None, retry_after: Optional[float] = None):
+        """Pause new requests to a provider (and model) after a 429."""
+        for limit in self._limits_for(provider, model):
+            limit.cool_down(retry_after or DEFAULT_COOLDOWN_SECONDS)
+
+    def stats(self) -> Dict[str, Dict]:
+        return {key: limit.stats.as_dict() for key, limit in self._limits.items() if limit is not None}
+
+
+governor = Governor()
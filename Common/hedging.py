@@ -0,0 +1,183 @@
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple, TypeVar
+
+from langchain_core.runnables import RunnableConfig
+
+from backend.routers.Common.configuration import as_set, get_setting, node_name
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Latencies kept per (provider, node); older ones are dropped
+WINDOW_SIZE = 500
+
+
+class LatencyHistogram:
+    """Latencies of the most recent calls of one provider and node."""
+
+    def __init__(self, size: int = WINDOW_SIZE):
+        self._samples: Deque[float] = deque(maxlen=size)
+        self._sorted: list = []
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float):
+        if len(self._samples) == self._samples.maxlen:
+            oldest = self._samples[0]
+            del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+        self._samples.append(seconds)
+        bisect.insort(self._sorted, seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Latency below which a share q (0-1) of the calls completed."""
+        if not self._sorted:
+            return None
+        index = min(int(q * len(self._sorted)), len(self._sorted) - 1)
+        return self._sorted[index]
+
+    def as_dict(self) -> Dict:
+        return {
+            "samples": len(self),
+            **{f"p{int(q * 100)}": self.percentile(q) for q in (0.5, 0.9, 0.95, 0.99)},
+        }
+
+
+@dataclass
+class HedgeStats:
+    """Calls of one provider and node, and the hedges sent for them."""
+    calls: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    budget_exhausted: int = 0
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+class Hedger:
+    """Hedged requests for the slow tail of Gemini and Tavily calls.
+
+    When hedging is enabled ("hedge_requests", default False), a call still
+    running after the "hedge_percentile" (0.95) of the latencies recently
+    observed for its provider and node is sent a second time. Whichever
+    attempt succeeds first is returned and the other is cancelled. Hedging
+    starts once a node has "hedge_min_samples" (20) latencies, never fires
+    before "hedge_min_delay_seconds" (1.0), and can be limited to some nodes
+    with "hedge_nodes" (list or comma-separated, empty for all).
+
+    The extra load is capped by a budget: every call earns "hedge_max_ratio"
+    (0.05) of a hedge, up to HEDGE_BURST saved, and every hedge spends one,
+    so at most about 5% more requests are sent. Both attempts go through the
+    governor like any other call.
+    """
+
+    HEDGE_BURST = 10.0
+
+    def __init__(self):
+        self.latencies: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.stats: Dict[Tuple[str, str], HedgeStats] = {}
+        self._budget = 0.0
+        self._lock = threading.Lock()
+
+    def _key(self, provider: str, config: Optional[RunnableConfig]) -> Tuple[str, str]:
+        return (provider, node_name(config) or "default")
+
+    def record(self, key: Tuple[str, str], seconds: float):
+        with self._lock:
+            self.latencies.setdefault(key, LatencyHistogram()).record(seconds)
+
+    def threshold(self, key: Tuple[str, str], config: Optional[RunnableConfig]) -> Optional[float]:
+        """Seconds after which a call is hedged, None when it is not."""
+        if not get_setting(config, "hedge_requests", False):
+            return None
+        nodes = as_set(get_setting(config, "hedge_nodes", ""))
+        if nodes and key[1] not in nodes:
+            return None
+        with self._lock:
+            latencies = self.latencies.get(key)
+            if latencies is None or len(latencies) < get_setting(config, "hedge_min_samples", 20):
+                return None
+            percentile = latencies.percentile(get_setting(config, "hedge_percentile", 0.95))
+        return max(percentile, get_setting(config, "hedge_min_delay_seconds", 1.0))
+
+    def _take_budget(self, stats: HedgeStats) -> bool:
+        with self._lock:
+            if self._budget < 1:
+                stats.budget_exhausted += 1
+                return False
+            self._budget -= 1
+            stats.hedged += 1
+            return True
+
+    async def _timed(self, key: Tuple[str, str], call: Callable[[], Awaitable[T]]) -> T:
+        start = time.monotonic()
+        result = await call()
+        self.record(key, time.monotonic() - start)
+        return result
+
+    async def run(self, provider: str, config: Optional[RunnableConfig], call: Callable[[], Awaitable[T]]) -> T:
+        """Await call(), hedging it with a second call() if it is slow.
+
+        Args:
+            provider: "gemini" or "tavily", with the node the latency key.
+            config: Config of the calling node.
+            call: Makes one attempt, including its governor slot.
+        """
+        key = self._key(provider, config)
+        threshold = self.threshold(key, config)
+        with self._lock:
+            stats = self.stats.setdefault(key, HedgeStats())
+            stats.calls += 1
+            self._budget = min(
+                self._budget + get_setting(config, "hedge_max_ratio", 0.05), self.HEDGE_BURST
+            )
+        if threshold is None:
+            return await self._timed(key, call)
+
+        start = time.monotonic()
+        primary = asyncio.ensure_future(self._timed(key, call))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=threshold)
+            if not done and self._take_budget(stats):
+                logger.info("Hedging %s call from %s after %.1fs", *key, threshold)
+                pending.add(asyncio.ensure_future(self._timed(key, call)))
+            while True:
+                if not done:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # An attempt that failed only loses if the other can still succeed
+                succeeded = [task for task in done if not task.cancelled() and task.exception() is None]
+                if succeeded or not pending:
+                    winner = succeeded[0] if succeeded else done.pop()
+                    if succeeded and winner is not primary:
+                        with self._lock:
+                            stats.hedge_wins += 1
+                    return winner.result()
+                done = set()
+        finally:
+            for task in pending:
+                task.cancel()
+            if primary in pending:
+                # Its latency is at least this long, keep it so the tail stays visible
+                self.record(key, time.monotonic() - start)
+
+    def stats_dict(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                f"{provider}/{node}": {
+                    **stats.as_dict(),
+                    **(self.latencies[(provider, node)].as_dict() if (provider, node) in self.latencies else {}),
+                }
+                for (provider, node), stats in self.stats.items()
+            }
+
+
+hedger = Hedger()
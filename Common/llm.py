@@ -0,0 +1,239 @@
+import os
+import json
+import asyncio
+import hashlib
+import time
+from dataclasses import asdict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from langchain_core.messages import (
+    BaseMessage,
+    convert_to_messages,
+    message_to_dict,
+    messages_from_dict,
+)
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel
+
+from backend.routers.Common.configuration import as_set, get_setting, node_name
+from backend.routers.Common.disk_cache import DiskCache
+from backend.routers.Common.governor import call_priority, governor, is_rate_limit_error
+from backend.routers.Common.hedging import hedger
+from backend.routers.Common.routing import DEFAULT_TIER, ModelTier, model_router
+from backend.routers.Common.tokens import count_message_tokens, count_tokens, token_ledger
+
+# Content-addressed cache of model responses. Disabled unless LLM_CACHE=true or
+# {"configurable": {"llm_cache": True}}. Storage is configured with
+# LLM_CACHE_PATH, LLM_CACHE_TTL_SECONDS, LLM_CACHE_MAX_ENTRIES and LLM_CACHE_MAX_BYTES.
+llm_cache = DiskCache.from_env(
+    "LLM_CACHE",
+    default_path=os.path.join(".cache", "llm_cache.sqlite"),
+    default_ttl_seconds=7 * 24 * 60 * 60,
+    default_max_bytes=200 * 1024 * 1024,
+)
+
+
+class ChatClient:
+    """Wrapper around a chat model used for every outbound LLM call in the graphs.
+
+    Exposes the ``invoke``/``ainvoke``/``with_structured_output`` subset of the
+    chat model interface that the nodes use, and adds an opt-in response cache
+    keyed on model name, temperature, output schema and a hash of the messages.
+
+    Caching is controlled per call through the node config:
+
+    - ``llm_cache``: enable the cache (default False, env LLM_CACHE).
+    - ``llm_cache_disabled_nodes``: node names (list or comma-separated string)
+      that always call the model, e.g. high-temperature creative steps
+      (env LLM_CACHE_DISABLED_NODES).
+
+    The size of every prompt is recorded in ``tokens.token_ledger`` against
+    the run and node it was sent from, and every async call waits for a slot
+    of the process-wide ``governor`` for its provider and model. Async calls
+    slower than usual for their node can be hedged (see ``hedging.Hedger``).
+    Calls can be routed to another model tier by their node, or by the step
+    set with ``for_step`` (see ``routing.ModelRouter``).
+
+    Args:
+        model: The underlying chat model, e.g. ChatGoogleGenerativeAI.
+        schema: Pydantic schema for structured output, if any.
+        cache: Response store, or None to never cache calls through this client.
+        provider: Governor limit the calls count against.
+        step: Routing step of the calls, their node when None.
+    """
+
+    def __init__(
+        self,
+        model,
+        schema: Optional[type] = None,
+        cache: Optional[DiskCache] = llm_cache,
+        provider: str = "gemini",
+        step: Optional[str] = None,
+    ):
+        self.model = model
+        self.schema = schema
+        self.cache = cache
+        self.provider = provider
+        self.step = step
+        self._runnable = model.with_structured_output(schema) if schema else model
+        # Model and runnable per routed tier
+        self._routed: Dict[ModelTier, Tuple[Any, Any]] = {}
+
+    def with_structured_output(self, schema: type, **kwargs) -> "ChatClient":
+        return ChatClient(self.model, schema=schema, cache=self.cache, provider=self.provider, step=self.step)
+
+    def for_step(self, step: str) -> "ChatClient":
+        """Client whose calls are routed as step rather than as their node."""
+        return ChatClient(self.model, schema=self.schema, cache=self.cache, provider=self.provider, step=step)
+
+    def __getattr__(self, name):
+        if name == "model":
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+    # Cache helpers
+    def _cache_enabled(self, config: Optional[RunnableConfig]) -> bool:
+        if self.cache is None or not get_setting(config, "llm_cache", False):
+            return False
+        disabled = as_set(get_setting(config, "llm_cache_disabled_nodes", ""))
+        return node_name(config) not in disabled
+
+    def cache_key(self, messages: Iterable[BaseMessage], model: Any = None) -> str:
+        model = self.model if model is None else model
+        schema = None
+        if self.schema is not None:
+            schema = {
+                "name": self.schema.__name__,
+                "json_schema": self.schema.model_json_schema(),
+            }
+        payload = {
+            "model": getattr(model, "model", type(model).__name__),
+            "temperature": getattr(model, "temperature", None),
+            "schema": schema,
+            "messages": hashlib.sha256(
+                json.dumps(
+                    [(message.type, message.content) for message in messages],
+                    ensure_ascii=False,
+                    default=str,
+                ).encode("utf-8")
+            ).hexdigest(),
+        }
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def _dump(self, result: Any) -> Optional[str]:
+        # Messages are pydantic models too, so check for them first
+        if isinstance(result, BaseMessage):
+            return json.dumps({"kind": "message", "data": message_to_dict(result)})
+        if isinstance(result, BaseModel):
+            return json.dumps({"kind": "schema", "data": result.model_dump(mode="json")})
+        return None
+
+    def _load(self, value: str) -> Any:
+        entry = json.loads(value)
+        if entry["kind"] == "schema":
+            return self.schema.model_validate(entry["data"])
+        return messages_from_dict([entry["data"]])[0]
+
+    # Routing
+    def _route(self, config: Optional[RunnableConfig]) -> Tuple[str, Any, Any]:
+        """Tier, model and runnable a call is sent to (see routing.ModelRouter)."""
+        name = model_router.tier_name(self.step or node_name(config), config)
+        tier = model_router.tier(name, config)
+        if tier is None or not hasattr(self.model, "model_copy"):
+            return DEFAULT_TIER, self.model, self._runnable
+        if tier not in self._routed:
+            update = {field: value for field, value in asdict(tier).items() if value is not None}
+            model = self.model.model_copy(update=update)
+            self._routed[tier] = (model, model.with_structured_output(self.schema) if self.schema else model)
+        return (name, *self._routed[tier])
+
+    def _record_usage(self, messages, config: Optional[RunnableConfig], model: Any, tier: str, cached: bool) -> int:
+        tokens = count_message_tokens(messages, config)
+        token_ledger.record(
+            config,
+            node_name(config),
+            tokens,
+            model=getattr(model, "model", None),
+            cached=cached,
+            tier=tier,
+        )
+        return tokens
+
+    def _output_tokens(self, result: Any, config: Optional[RunnableConfig]) -> int:
+        usage = getattr(result, "usage_metadata", None)
+        if usage:
+            return usage.get("output_tokens", 0)
+        if isinstance(result, BaseMessage):
+            return count_tokens(str(result.content), config)
+        if isinstance(result, BaseModel):
+            return count_tokens(result.model_dump_json(), config)
+        return 0
+
+    # Model calls
+    async def _acall(self, messages, config: Optional[RunnableConfig], model: Any, runnable: Any, **kwargs):
+        model_name = getattr(model, "model", None)
+
+        async def attempt():
+            async with governor.slot(self.provider, model_name, call_priority(config)):
+                try:
+                    return await runnable.ainvoke(messages, config, **kwargs)
+                except Exception as e:
+                    if is_rate_limit_error(e):
+                        governor.report_rate_limited(self.provider, model_name)
+                    raise
+
+        return await hedger.run(self.provider, config, attempt)
+
+    async def ainvoke(self, input, config: Optional[RunnableConfig] = None, **kwargs):
+        messages = convert_to_messages(input)
+        tier, model, runnable = self._route(config)
+        key = self.cache_key(messages, model) if self._cache_enabled(config) else None
+        if key is not None:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                tokens = self._record_usage(messages, config, model, tier, cached=True)
+                model_router.record(tier, tokens, cached=True)
+                return self._load(cached)
+
+        tokens = self._record_usage(messages, config, model, tier, cached=False)
+        start = time.monotonic()
+        try:
+            result = await self._acall(messages, config, model, runnable, **kwargs)
+        except Exception:
+            model_router.record(tier, tokens, seconds=time.monotonic() - start, failed=True)
+            raise
+        model_router.record(tier, tokens, self._output_tokens(result, config), time.monotonic() - start)
+
+        if key is not None:
+            value = self._dump(result)
+            if value is not None:
+                await asyncio.to_thread(self.cache.set, key, value)
+        return result
+
+    def invoke(self, input, config: Optional[RunnableConfig] = None, **kwargs):
+        messages = convert_to_messages(input)
+        tier, model, runnable = self._route(config)
+        key = self.cache_key(messages, model) if self._cache_enabled(config) else None
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                tokens = self._record_usage(messages, config, model, tier, cached=True)
+                model_router.record(tier, tokens, cached=True)
+                return self._load(cached)
+
+        tokens = self._record_usage(messages, config, model, tier, cached=False)
+        start = time.monotonic()
+        try:
+            result = runnable.invoke(messages, config, **kwargs)
+        except Exception:
+            model_router.record(tier, tokens, seconds=time.monotonic() - start, failed=True)
+            raise
+        model_router.record(tier, tokens, self._output_tokens(result, config), time.monotonic() - start)
+
+        if key is not None:
+            value = self._dump(result)
+            if value is not None:
+                self.cache.set(key, value)
+        return result
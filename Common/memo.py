@@ -0,0 +1,228 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel
+
+from backend.routers.Common.configuration import get_setting
+from backend.routers.Common.disk_cache import DiskCache
+from backend.routers.Common.sufficiency import field_coverage
+
+logger = logging.getLogger(__name__)
+
+# Bump when the analysts' prompts change enough that memoized research is stale
+MEMO_VERSION = 1
+# Words that do not distinguish one industry or market from another
+_KEY_STOPWORDS = {
+    "the", "and", "of", "industry", "industries", "sector", "sectors", "analysis",
+    "market", "markets", "economy", "economic", "gics", "naics",
+}
+_PLURAL_RE = re.compile(r"(?<=[a-z]{3})(ies|s)$")
+
+research_memo_cache = DiskCache.from_env(
+    "RESEARCH_MEMO",
+    default_path=os.path.join(".cache", "research_memo.sqlite"),
+    default_ttl_seconds=2 * 24 * 60 * 60,
+    default_max_entries=5000,
+)
+
+
+def normalize_key(text: str) -> str:
+    """Canonical form of an industry classification or market name.
+
+    "Semiconductor Industry", "semiconductors" and "Semiconductors (GICS)"
+    all become "semiconductor"; word order is ignored.
+    """
+    words = re.findall(r"[a-z0-9]+", (text or "").lower())
+    words = {_PLURAL_RE.sub(lambda m: "y" if m.group(1) == "ies" else "", word)
+             for word in words if word not in _KEY_STOPWORDS}
+    return " ".join(sorted(words))
+
+
+def date_bucket(hours: float, now: Optional[float] = None) -> str:
+    """UTC start of the period of the given length that now falls in."""
+    seconds = max(hours, 1) * 3600
+    start = ((now or time.time()) // seconds) * seconds
+    return time.strftime("%Y-%m-%dT%H", time.gmtime(start))
+
+
+def _schema_hash(schema: type) -> str:
+    payload = json.dumps(schema.model_json_schema(), sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+
+@dataclass
+class MemoEntry:
+    """Completed research of one industry or market."""
+    kind: str
+    key: str
+    bucket: str
+    report: str
+    analyses: List[Dict]
+    classification: str = ""
+    created_at: float = field(default_factory=time.time)
+    # Cost of the research when it was recorded, 0 when unknown
+    model_calls: int = 0
+    prompt_tokens: int = 0
+
+    def parsed(self, schema: type) -> List[BaseModel]:
+        return [schema.model_validate(data) for data in self.analyses]
+
+
+@dataclass
+class MemoStats:
+    """Lookups, hits and stores per kind of research."""
+    lookups: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    hits: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    stores: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    rejected: Dict[str, int] = field(default_factory=lambda: defaultdict(int))
+    invalidated: int = 0
+
+    def as_dict(self) -> Dict:
+        kinds = set(self.lookups) | set(self.stores)
+        return {
+            kind: {
+                "lookups": self.lookups[kind],
+                "hits": self.hits[kind],
+                "hit_rate": self.hits[kind] / self.lookups[kind] if self.lookups[kind] else 0.0,
+                "stores": self.stores[kind],
+                "rejected": self.rejected[kind],
+            }
+            for kind in sorted(kinds)
+        } | {"invalidated": self.invalidated}
+
+
+class ResearchMemo:
+    """Completed industry and economic research shared between runs.
+
+    Entries are keyed by kind ("industry" or "economic"), a normalized
+    industry classification or market, and a date bucket, so that e.g. ten
+    semiconductor stocks analysed on the same day research their industry
+    once. Entries are invalidated when:
+
+    - the bucket rolls over ("research_memo_<kind>_hours", 24 by default),
+      and the store's TTL (RESEARCH_MEMO_TTL_SECONDS) removes them;
+    - the schema of the stored data or MEMO_VERSION changes (part of the key);
+    - ``invalidate`` is called, or a run sets "research_memo_refresh", which
+      skips the lookup and replaces the entry with fresh research.
+
+    Research whose analyses fill less than "research_memo_min_coverage" (0.5)
+    of their schema is not stored. Set "research_memo" to false to disable
+    the memo.
+    """
+
+    def __init__(self, cache: DiskCache):
+        self.cache = cache
+        self.stats = MemoStats()
+        self._lock = threading.Lock()
+
+    def enabled(self, config: Optional[RunnableConfig]) -> bool:
+        return bool(get_setting(config, "research_memo", True))
+
+    def _key(self, kind: str, key: str, schema: type, config: Optional[RunnableConfig]) -> Optional[str]:
+        normalized = normalize_key(key)
+        if not normalized:
+            return None
+        bucket = date_bucket(get_setting(config, f"research_memo_{kind}_hours", 24.0))
+        return f"{kind}:v{MEMO_VERSION}:{_schema_hash(schema)}:{normalized}:{bucket}"
+
+    def lookup(self, kind: str, key: str, schema: type, config: Optional[RunnableConfig] = None) -> Optional[MemoEntry]:
+        """The memoized research for key in the current bucket, if any."""
+        if not self.enabled(config) or get_setting(config, "research_memo_refresh", False):
+            return None
+        cache_key = self._key(kind, key, schema, config)
+        if cache_key is None:
+            return None
+        value = self.cache.get(cache_key)
+        entry = None
+        if value is not None:
+            try:
+                entry = MemoEntry(**json.loads(value))
+                entry.parsed(schema)
+            except Exception as e:
+                print(f"Discarding unreadable research memo entry {cache_key}: {e}")
+                self.cache.delete(cache_key)
+                entry = None
+        with self._lock:
+            self.stats.lookups[kind] += 1
+            self.stats.hits[kind] += entry is not None
+        if entry is not None:
+            logger.info("Research memo hit for %s %r (%s)", kind, entry.key, entry.bucket)
+        return entry
+
+    def store(
+        self,
+        kind: str,
+        keys: List[str],
+        report: str,
+        analyses: List[BaseModel],
+        schema: type,
+        config: Optional[RunnableConfig] = None,
+        classification: str = "",
+        model_calls: int = 0,
+        prompt_tokens: int = 0,
+    ) -> bool:
+        """Memoize completed research under each of keys (e.g. plan and researched classification).
+
+        model_calls and prompt_tokens record what the research cost, when the
+        caller knows it, so that hits can report what they saved.
+        """
+        if not self.enabled(config) or not report or not analyses:
+            return False
+        coverage = sum(map(field_coverage, analyses)) / len(analyses)
+        if coverage < get_setting(config, "research_memo_min_coverage", 0.5):
+            with self._lock:
+                self.stats.rejected[kind] += 1
+            logger.info("Not memoizing %s research %s, coverage %.2f", kind, keys, coverage)
+            return False
+
+        stored = False
+        for key in dict.fromkeys(keys):
+            cache_key = self._key(kind, key, schema, config)
+            if cache_key is None:
+                continue
+            entry = MemoEntry(
+                kind=kind,
+                key=normalize_key(key),
+                bucket=cache_key.rsplit(":", 1)[1],
+                report=report,
+                analyses=[analysis.model_dump(mode="json") for analysis in analyses],
+                classification=classification,
+                model_calls=model_calls,
+                prompt_tokens=prompt_tokens,
+            )
+            self.cache.set(cache_key, json.dumps(asdict(entry)))
+            stored = True
+        if stored:
+            with self._lock:
+                self.stats.stores[kind] += 1
+        return stored
+
+    async def alookup(self, kind: str, key: str, schema: type, config: Optional[RunnableConfig] = None) -> Optional[MemoEntry]:
+        return await asyncio.to_thread(self.lookup, kind, key, schema, config)
+
+    async def astore(self, *args, **kwargs) -> bool:
+        return await asyncio.to_thread(self.store, *args, **kwargs)
+
+    def invalidate(self, kind: str, key: str, schema: type, config: Optional[RunnableConfig] = None):
+        """Drop the current bucket's entry for key."""
+        cache_key = self._key(kind, key, schema, config)
+        if cache_key is not None:
+            self.cache.delete(cache_key)
+            with self._lock:
+                self.stats.invalidated += 1
+
+    def stats_dict(self) -> Dict:
+        return {**self.stats.as_dict(), "store": self.cache.stats()}
+
+
+research_memo = ResearchMemo(research_memo_cache)
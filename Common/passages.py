@@ -0,0 +1,173 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+from backend.routers.Common.tokens import count_tokens
+
+PASSAGE_CHARS = 800
+MIN_LINE_WORDS = 4
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+STOPWORDS = frozenset(
+    """
+    a an and are as at be by for from has have in is it its of on or that the
+    their this to was were will with what which who how when where why
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lower-case word and number tokens without stopwords."""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _split_long(line: str, passage_chars: int) -> List[str]:
+    """Split a line longer than passage_chars on sentence boundaries."""
+    pieces, current = [], ""
+    for sentence in _SENTENCE_RE.split(line):
+        while len(sentence) > passage_chars:
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(sentence[:passage_chars])
+            sentence = sentence[passage_chars:]
+        if current and len(current) + len(sentence) + 1 > passage_chars:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_passages(text: str, passage_chars: int = PASSAGE_CHARS) -> List[str]:
+    """Split page text into passages of at most passage_chars characters.
+
+    Lines with fewer than MIN_LINE_WORDS words (menus, buttons, bylines) are
+    dropped; the rest are packed into passages without crossing paragraph
+    boundaries, and overlong lines are split on sentence boundaries.
+
+    Args:
+        text: Raw page content.
+        passage_chars: Target passage size in characters.
+
+    Returns:
+        Passages in document order.
+    """
+    passages: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        current = ""
+        for line in paragraph.splitlines():
+            line = " ".join(line.split())
+            if len(line.split()) < MIN_LINE_WORDS:
+                continue
+            for piece in _split_long(line, passage_chars) if len(line) > passage_chars else [line]:
+                if current and len(current) + len(piece) + 1 > passage_chars:
+                    passages.append(current)
+                    current = piece
+                else:
+                    current = f"{current}\n{piece}" if current else piece
+        if current:
+            passages.append(current)
+    return passages
+
+
+class BM25:
+    """Okapi BM25 over a fixed list of tokenized documents."""
+
+    def __init__(self, corpus: Sequence[Sequence[str]], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(doc) for doc in corpus]
+        self.doc_lengths = [len(doc) for doc in corpus]
+        self.avg_length = (sum(self.doc_lengths) / len(corpus)) if corpus else 0.0
+
+        doc_freqs: Counter = Counter()
+        for freqs in self.term_freqs:
+            doc_freqs.update(freqs.keys())
+        n_docs = len(corpus)
+        self.idf = {
+            term: math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for term, df in doc_freqs.items()
+        }
+
+    def scores(self, query: Sequence[str]) -> List[float]:
+        """Score every document against the query terms."""
+        terms = [term for term in set(query) if term in self.idf]
+        results = []
+        for freqs, length in zip(self.term_freqs, self.doc_lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1))
+            score = 0.0
+            for term in terms:
+                tf = freqs.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            results.append(score)
+        return results
+
+
+@dataclass
+class _Passage:
+    source: int
+    position: int
+    text: str
+    score: float = 0.0
+
+
+def select_passages(
+    query: str,
+    documents: Sequence[str],
+    max_tokens_per_document: int,
+    max_total_tokens: Optional[int] = None,
+    passage_chars: int = PASSAGE_CHARS,
+) -> List[List[str]]:
+    """Pick the passages of each document most relevant to a search query.
+
+    All documents are chunked with split_passages and scored together with
+    BM25, so that term weights reflect the whole result set. Passages are
+    then taken in order of score while they fit both the per-document and
+    the overall budget; passages sharing no term with the query are never
+    selected.
+
+    Args:
+        query: The search query the documents were retrieved for.
+        documents: Raw text of each document.
+        max_tokens_per_document: Budget for the passages kept from one document.
+        max_total_tokens: Budget across all documents (no limit if None).
+        passage_chars: Target passage size in characters.
+
+    Returns:
+        For each document, its selected passages in document order.
+    """
+    passages = [
+        _Passage(source=i, position=j, text=text)
+        for i, document in enumerate(documents)
+        for j, text in enumerate(split_passages(document or "", passage_chars))
+    ]
+    selected: List[List[_Passage]] = [[] for _ in documents]
+    query_terms = tokenize(query)
+    if not passages or not query_terms:
+        return [[] for _ in documents]
+
+    bm25 = BM25([tokenize(p.text) for p in passages])
+    for passage, score in zip(passages, bm25.scores(query_terms)):
+        passage.score = score
+
+    remaining_total = max_total_tokens if max_total_tokens is not None else math.inf
+    used: Dict[int, int] = Counter()
+    for passage in sorted(passages, key=lambda p: p.score, reverse=True):
+        if passage.score <= 0 or remaining_total <= 0:
+            break
+        size = count_tokens(passage.text)
+        if used[passage.source] + size > max_tokens_per_document or size > remaining_total:
+            continue
+        used[passage.source] += size
+        remaining_total -= size
+        selected[passage.source].append(passage)
+
+    return [[p.text for p in sorted(chosen, key=lambda p: p.position)] for chosen in selected]
@@ -0,0 +1,162 @@
+import hashlib
+import threading
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from langchain_core.runnables import RunnableConfig
+
+from backend.routers.Common.configuration import get_setting
+
+if TYPE_CHECKING:
+    from backend.routers.Common.sources import Source
+
+# Query parameters that do not change the page being served
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_", "ref", "cmpid", "ocid")
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for duplicate detection.
+
+    Lower-cases the scheme and host, drops "www.", the fragment, tracking
+    parameters and any trailing slash, and sorts the remaining parameters.
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    )
+    return urlunsplit(("https" if parts.scheme in ("http", "https") else parts.scheme,
+                       host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+def content_hash(text: str) -> str:
+    """Hash of a page's text with whitespace differences ignored."""
+    return hashlib.blake2b(" ".join(text.split()).encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class RegistryStats:
+    """How much repeated content a run avoided sending to the model."""
+    pages_seen: int = 0
+    duplicate_pages: int = 0
+    duplicate_by_content: int = 0
+    duplicate_chars: int = 0
+
+    def as_dict(self) -> Dict[str, int]:
+        return asdict(self)
+
+
+class SourceRegistry:
+    """Pages already sent to the model during one analysis run.
+
+    Shared by every branch of the run (economic, industry and their parallel
+    analysts), so a page found by several searches is only analysed the first
+    time; later occurrences are referenced instead of re-sent. Pages are
+    matched by normalized URL, or by content hash when the same article is
+    served under different URLs.
+
+    Each page is claimed by an owner (the search query). Pages an owner
+    claimed stay fresh for that owner, so a retried node, a resumed run or a
+    reflection iteration repeating its query still gets their content. A node
+    that fails should ``release`` its claims, so other branches do not point
+    at an analysis that never happened.
+    """
+
+    def __init__(self):
+        self._urls: Dict[str, str] = {}
+        self._hashes: Dict[str, str] = {}
+        self._claims: Dict[str, List[Tuple[str, Optional[str]]]] = {}
+        self._lock = threading.Lock()
+        self.stats = RegistryStats()
+
+    def claim(self, sources: Iterable["Source"], owner: str) -> Tuple[List["Source"], Dict[str, str]]:
+        """Split sources into pages not seen yet and references to earlier ones.
+
+        Args:
+            sources: Deduplicated sources of one search.
+            owner: What the sources were retrieved for, e.g. the search query.
+
+        Returns:
+            The new sources, and for each repeated source URL the owner that
+            first claimed the page.
+        """
+        new, repeated = [], {}
+        with self._lock:
+            for source in sources:
+                url = normalize_url(source.url)
+                text = source.raw_content or source.content or ""
+                digest = content_hash(text) if text else None
+                first = self._urls.get(url)
+                if first is None and digest is not None:
+                    first = self._hashes.get(digest)
+                    self.stats.duplicate_by_content += first is not None and first != owner
+                if first == owner:
+                    new.append(source)
+                    continue
+                if first is not None:
+                    repeated[source.url] = first
+                    self.stats.duplicate_pages += 1
+                    self.stats.duplicate_chars += len(text)
+                    continue
+                self._urls[url] = owner
+                if digest:
+                    self._hashes[digest] = owner
+                self._claims.setdefault(owner, []).append((url, digest))
+                self.stats.pages_seen += 1
+                new.append(source)
+        return new, repeated
+
+    def release(self, owner: str):
+        """Drop the claims of owner, e.g. when the node that made them failed."""
+        with self._lock:
+            for url, digest in self._claims.pop(owner, []):
+                if self._urls.get(url) == owner:
+                    del self._urls[url]
+                if digest and self._hashes.get(digest) == owner:
+                    del self._hashes[digest]
+
+
+class RunRegistries:
+    """SourceRegistry per run, keeping the most recent max_runs runs."""
+
+    def __init__(self, max_runs: int = 100):
+        self.max_runs = max_runs
+        self._registries: Dict[str, SourceRegistry] = {}
+        self._lock = threading.Lock()
+
+    def get(self, run_id: str) -> SourceRegistry:
+        with self._lock:
+            registry = self._registries.get(run_id)
+            if registry is None:
+                if len(self._registries) >= self.max_runs:
+                    del self._registries[next(iter(self._registries))]
+                registry = self._registries[run_id] = SourceRegistry()
+            return registry
+
+    def release(self, run_id: str) -> Optional[SourceRegistry]:
+        with self._lock:
+            return self._registries.pop(run_id, None)
+
+
+source_registries = RunRegistries()
+
+
+def source_registry(config: Optional[RunnableConfig]) -> Optional[SourceRegistry]:
+    """The registry of the run a node belongs to.
+
+    Runs are identified by ``configurable.run_id`` or ``configurable.thread_id``.
+    Returns None when neither is set, or when "source_registry" is disabled,
+    in which case pages are only deduplicated within a single search. A plain
+    ``graph.ainvoke({"stock": ...})`` sets neither; the API endpoints generate
+    a run_id per request.
+    """
+    configurable = (config or {}).get("configurable") or {}
+    run_id = configurable.get("run_id") or configurable.get("thread_id")
+    if not run_id or not get_setting(config, "source_registry", True):
+        return None
+    return source_registries.get(str(run_id))
@@ -0,0 +1,143 @@
+import threading
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from backend.routers.Common.configuration import get_setting
+from backend.routers.Common.hedging import LatencyHistogram
+
+
+@dataclass(frozen=True)
+class ModelTier:
+    """Model and generation settings that routed calls use.
+
+    None keeps the value of the model the ChatClient was created with.
+    """
+    model: str
+    temperature: Optional[float] = None
+    max_output_tokens: Optional[int] = None
+
+
+# Override per field with {"configurable": {"model_tiers": {"fast": {"model": ...}}}}
+# or MODEL_TIER_<TIER>_MODEL, _TEMPERATURE and _MAX_OUTPUT_TOKENS.
+DEFAULT_TIERS = {
+    "fast": ModelTier("gemini-1.5-flash-8b", temperature=0.2, max_output_tokens=4096),
+    "standard": ModelTier("gemini-1.5-flash", temperature=0.7, max_output_tokens=8192),
+    "deep": ModelTier("gemini-2.0-flash-exp", temperature=0.5, max_output_tokens=8192),
+}
+# Tier of each step: a graph node, or a step that names itself with
+# ChatClient.for_step ("summary" for running summaries). Steps not listed
+# keep the model of their module.
+DEFAULT_ROUTES = {
+    "planner": "fast",
+    "research_planner": "fast",
+    "reflect": "fast",
+    "retry": "fast",
+    "summary": "fast",
+}
+# Tier of the calls that are not routed
+DEFAULT_TIER = "default"
+
+
+def _parse_routes(value) -> Dict[str, str]:
+    if not value:
+        return {}
+    if isinstance(value, str):
+        pairs = (item.split("=", 1) for item in value.split(",") if "=" in item)
+        return {step.strip(): tier.strip() for step, tier in pairs}
+    return dict(value)
+
+
+@dataclass
+class TierStats:
+    """Calls, tokens and latency of the calls made with one tier."""
+    calls: int = 0
+    cached: int = 0
+    failed: int = 0
+    prompt_tokens: int = 0
+    output_tokens: int = 0
+    seconds: float = 0.0
+
+    def as_dict(self) -> Dict:
+        result = asdict(self)
+        result["avg_seconds"] = self.seconds / (self.calls - self.cached) if self.calls > self.cached else 0.0
+        return result
+
+
+class ModelRouter:
+    """Routing table from graph steps to model tiers, with per-tier accounting.
+
+    With "model_routing" enabled (default False) each ChatClient call looks
+    up the tier of its step in DEFAULT_ROUTES, updated by "model_routes" (a
+    dict, or "step=tier" pairs separated by commas), and is sent to that
+    tier's model with its temperature and max output tokens. Route a step to
+    "default" to keep the model of its module.
+
+    The calls, prompt and output tokens and latency of every call are counted
+    per tier, whether or not routing is enabled, in ``stats_dict()``.
+    """
+
+    def __init__(self):
+        self.stats: Dict[str, TierStats] = {}
+        self.latencies: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def tier_name(self, step: Optional[str], config: Optional[RunnableConfig]) -> str:
+        if not step or not get_setting(config, "model_routing", False):
+            return DEFAULT_TIER
+        routes = {**DEFAULT_ROUTES, **_parse_routes(get_setting(config, "model_routes", None))}
+        return routes.get(step, DEFAULT_TIER)
+
+    def tier(self, name: str, config: Optional[RunnableConfig]) -> Optional[ModelTier]:
+        """Settings of a tier, None for the default tier or an unknown one."""
+        if name == DEFAULT_TIER:
+            return None
+        overrides = (get_setting(config, "model_tiers", None) or {}).get(name) or {}
+        tier = replace(DEFAULT_TIERS[name], **overrides) if name in DEFAULT_TIERS else (
+            ModelTier(**overrides) if overrides.get("model") else None
+        )
+        if tier is None:
+            print(f"Unknown model tier {name}, using the default model")
+            return None
+        prefix = f"model_tier_{name}"
+        temperature = get_setting(config, f"{prefix}_temperature", tier.temperature)
+        max_output_tokens = get_setting(config, f"{prefix}_max_output_tokens", tier.max_output_tokens)
+        return ModelTier(
+            model=get_setting(config, f"{prefix}_model", tier.model),
+            temperature=float(temperature) if temperature is not None else None,
+            max_output_tokens=int(max_output_tokens) if max_output_tokens is not None else None,
+        )
+
+    def record(
+        self,
+        tier: str,
+        prompt_tokens: int,
+        output_tokens: int = 0,
+        seconds: float = 0.0,
+        cached: bool = False,
+        failed: bool = False,
+    ):
+        with self._lock:
+            stats = self.stats.setdefault(tier, TierStats())
+            stats.calls += 1
+            stats.cached += cached
+            stats.failed += failed
+            stats.prompt_tokens += prompt_tokens
+            stats.output_tokens += output_tokens
+            if not cached:
+                stats.seconds += seconds
+                self.latencies.setdefault(tier, LatencyHistogram()).record(seconds)
+
+    def stats_dict(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                tier: {
+                    **stats.as_dict(),
+                    **({"latency": self.latencies[tier].as_dict()} if tier in self.latencies else {}),
+                }
+                for tier, stats in self.stats.items()
+            }
+
+
+model_router = ModelRouter()
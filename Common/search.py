@@ -0,0 +1,103 @@
+from dotenv import load_dotenv
+import os
+import re
+import json
+import asyncio
+import hashlib
+from typing import Optional
+from tavily import AsyncTavilyClient
+from langchain_core.runnables import RunnableConfig
+from langsmith import traceable
+
+from backend.routers.Common.configuration import get_setting
+from backend.routers.Common.disk_cache import DiskCache
+from backend.routers.Common.governor import call_priority, governor, is_rate_limit_error
+from backend.routers.Common.hedging import hedger
+
+load_dotenv()
+
+# Search parameters shared by the economic and industry analysts
+SEARCH_PARAMS = {
+    "search_depth": "advanced",
+    "max_results": 5,
+    "include_answer": True,
+    "include_raw_content": True,
+}
+
+# Shared on-disk cache of Tavily responses. Configure with SEARCH_CACHE_PATH,
+# SEARCH_CACHE_TTL_SECONDS, SEARCH_CACHE_MAX_ENTRIES and SEARCH_CACHE_MAX_BYTES.
+search_cache = DiskCache.from_env(
+    "SEARCH_CACHE",
+    default_path=os.path.join(".cache", "search_cache.sqlite"),
+    default_ttl_seconds=24 * 60 * 60,
+    default_max_entries=5000,
+    default_max_bytes=500 * 1024 * 1024,
+)
+
+_tavily_async_client: Optional[AsyncTavilyClient] = None
+
+
+def get_tavily_client() -> AsyncTavilyClient:
+    """Create the Tavily client on first use."""
+    global _tavily_async_client
+    if _tavily_async_client is None:
+        _tavily_async_client = AsyncTavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+    return _tavily_async_client
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so near-identical
+    queries share a cache entry."""
+    query = re.sub(r"[^\w\s%$.-]", " ", query.lower())
+    return " ".join(query.replace(" .", " ").split()).strip(" .-")
+
+
+def search_cache_key(query: str, **params) -> str:
+    payload = json.dumps({"query": normalize_query(query), **params}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+async def _search(query: str, config: Optional[RunnableConfig]) -> dict:
+    async with governor.slot("tavily", priority=call_priority(config)):
+        return await get_tavily_client().search(query, **SEARCH_PARAMS)
+
+
+@traceable
+async def tavily_search_async(query: str, config: Optional[RunnableConfig] = None) -> str:
+    """Search the web using the Tavily API asynchronously.
+
+    Responses are served from ``search_cache`` when possible. Set
+    ``search_cache_bypass`` in ``config["configurable"]`` (or the
+    SEARCH_CACHE_BYPASS environment variable) to always hit the API; fresh
+    results are still written back to the cache. Slow searches can be
+    hedged (see ``hedging.Hedger``).
+
+    Args:
+        query (str): The search query to execute
+        config (RunnableConfig): Config of the calling node
+
+    Returns:
+        str: JSON string containing search results or error message
+    """
+    if not query:
+        return json.dumps({"error": "No search query provided"}, ensure_ascii=False)
+
+    key = search_cache_key(query, **SEARCH_PARAMS)
+    if not get_setting(config, "search_cache_bypass", False):
+        cached = await asyncio.to_thread(search_cache.get, key)
+        if cached is not None:
+            return cached
+
+    try:
+        search_result = await hedger.run("tavily", config, lambda: _search(query, config))
+        result = json.dumps(search_result, ensure_ascii=False)
+    except Exception as e:
+        if is_rate_limit_error(e):
+            governor.report_rate_limited("tavily")
+        # Errors are returned to the caller but never cached
+        return json.dumps(
+            {"error": f"Error performing search: {str(e)}"}, ensure_ascii=False
+        )
+
+    await asyncio.to_thread(search_cache.set, key, result)
+    return result
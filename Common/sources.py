@@ -0,0 +1,212 @@
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Mapping, Optional, Union
+
+from langchain_core.runnables import RunnableConfig
+
+from backend.routers.Common.configuration import get_setting
+from backend.routers.Common.passages import select_passages
+from backend.routers.Common.registry import source_registry
+from backend.routers.Common.tokens import truncate_to_tokens
+
+
+@dataclass(frozen=True)
+class Source:
+    """A single Tavily search result"""
+    title: str
+    url: str
+    content: str = ""
+    raw_content: Optional[str] = None
+
+    @classmethod
+    def from_result(cls, result: Union["Source", Mapping]) -> "Source":
+        if isinstance(result, Source):
+            return result
+        return cls(
+            title=result.get("title", ""),
+            url=result["url"],
+            content=result.get("content", ""),
+            raw_content=result.get("raw_content"),
+        )
+
+
+SearchResponse = Union[Mapping, List]
+
+
+def iter_sources(search_response: SearchResponse) -> Iterator[Source]:
+    """Yield the unique sources (by URL) of one or more Tavily responses.
+
+    Args:
+        search_response: Either:
+            - A dict with a 'results' key containing a list of search results
+            - A list of dicts, each containing search results
+            - A list of Source records or result dicts
+
+    Returns:
+        Iterator of Source records in first-seen order
+    """
+    # Convert input to list of results
+    if isinstance(search_response, Mapping):
+        sources_list: Iterable = search_response.get("results", [])
+    elif isinstance(search_response, list):
+        sources_list = []
+        for response in search_response:
+            if isinstance(response, Mapping) and "results" in response:
+                sources_list.extend(response["results"])
+            elif isinstance(response, (Source, Mapping)):
+                sources_list.append(response)
+            else:
+                sources_list.extend(response)
+    else:
+        raise ValueError(
+            "Input must be either a dict with 'results' or a list of search results"
+        )
+
+    # Deduplicate by URL
+    seen = set()
+    for result in sources_list:
+        source = Source.from_result(result)
+        if source.url not in seen:
+            seen.add(source.url)
+            yield source
+
+
+def iter_formatted_sources(
+    search_response: SearchResponse,
+    max_tokens_per_source: int,
+    include_raw_content: bool = True,
+    query: Optional[str] = None,
+    max_total_tokens: Optional[int] = None,
+    references: Optional[Mapping[str, str]] = None,
+    config: Optional[RunnableConfig] = None,
+) -> Iterator[str]:
+    """Yield the formatted text of deduplicate_and_format_sources piece by piece.
+
+    Useful to stream the text to a file or socket without holding it all in
+    memory. Joining the pieces and stripping the result gives the same string
+    as deduplicate_and_format_sources.
+    """
+    raw_header = f"Full source content limited to {max_tokens_per_source} tokens: "
+
+    references = references or {}
+    sources = list(iter_sources(search_response))
+    passages = None
+    if include_raw_content and query:
+        passages = select_passages(
+            query,
+            ["" if source.url in references else source.raw_content or "" for source in sources],
+            max_tokens_per_source, max_total_tokens,
+        )
+
+    yield "Sources:\n\n"
+    for i, source in enumerate(sources):
+        if source.url in references:
+            # Already sent to the model earlier in the run, so only point at it
+            yield f"Source {source.title}:\n===\nURL: {source.url}\n===\nAlready analysed in this run for \"{references[source.url]}\"; content not repeated.\n\n"
+            continue
+        yield f"Source {source.title}:\n===\nURL: {source.url}\n===\nMost relevant content from source: {source.content}\n===\n"
+        if passages is not None:
+            if passages[i]:
+                yield "Passages from source relevant to the query:\n"
+                yield "\n...\n".join(passages[i])
+                yield "\n\n"
+            else:
+                yield "\n"
+        elif include_raw_content:
+            yield raw_header
+            yield truncate_to_tokens(source.raw_content or "", max_tokens_per_source, config)
+            yield "\n\n"
+
+
+def deduplicate_and_format_sources(
+    search_response: SearchResponse,
+    max_tokens_per_source: int,
+    include_raw_content: bool = True,
+    query: Optional[str] = None,
+    max_total_tokens: Optional[int] = None,
+    references: Optional[Mapping[str, str]] = None,
+    config: Optional[RunnableConfig] = None,
+) -> str:
+    """
+    Takes either a single search response or list of responses from Tavily API and formats them.
+    Limits the raw_content to max_tokens_per_source tokens (Common.tokens).
+    include_raw_content specifies whether to include the raw_content from Tavily in the formatted string.
+
+    When a query is given, the raw_content is not cut at the head: each page is
+    split into passages and only those most relevant to the query are kept
+    (see passages.select_passages), within max_tokens_per_source per source and
+    max_total_tokens overall.
+
+    Args:
+        search_response: Either:
+            - A dict with a 'results' key containing a list of search results
+            - A list of dicts, each containing search results
+            - A list of Source records
+        max_tokens_per_source: Raw content budget per source.
+        include_raw_content: Whether to include the raw_content at all.
+        query: The search query, enables passage selection.
+        max_total_tokens: Raw content budget across all sources (query mode only).
+        references: URLs of sources already analysed elsewhere, mapped to what
+            they were analysed for. These are listed without their content.
+        config: Node config, read for "token_count_mode".
+
+    Returns:
+        str: Formatted string with deduplicated sources
+    """
+    parts = list(iter_formatted_sources(
+        search_response, max_tokens_per_source, include_raw_content, query, max_total_tokens, references,
+        config,
+    ))
+    # Only the tail can carry trailing whitespace; trimming it there avoids
+    # copying the whole (often multi-megabyte) string a second time.
+    while parts:
+        parts[-1] = parts[-1].rstrip()
+        if parts[-1]:
+            break
+        parts.pop()
+    return "".join(parts)
+
+
+def format_sources_for_prompt(
+    search_response: SearchResponse, query: str, config: Optional[RunnableConfig] = None
+) -> str:
+    """Format search results for the analysis and summary prompts.
+
+    Keeps the passages relevant to the query, up to "source_tokens_per_source"
+    tokens per source and "source_prompt_tokens" overall. Setting
+    "source_passage_selection" to false restores the head-truncated raw
+    content of up to 10000 tokens per source.
+
+    Pages already sent to the model by another branch of the same run (see
+    registry.source_registry) are referenced by URL instead of repeated. The
+    pages are claimed for query; call release_sources if the node fails.
+    """
+    sources = list(iter_sources(search_response))
+    references = None
+    registry = source_registry(config)
+    if registry is not None:
+        _, references = registry.claim(sources, query)
+
+    if not get_setting(config, "source_passage_selection", True):
+        return deduplicate_and_format_sources(sources, 10000, references=references, config=config)
+    return deduplicate_and_format_sources(
+        sources,
+        get_setting(config, "source_tokens_per_source", 1500),
+        query=query,
+        max_total_tokens=get_setting(config, "source_prompt_tokens", 8000),
+        references=references,
+        config=config,
+    )
+
+
+def release_sources(query: str, config: Optional[RunnableConfig] = None):
+    """Give back the pages format_sources_for_prompt claimed for query."""
+    registry = source_registry(config)
+    if registry is not None:
+        registry.release(query)
+
+
+def format_sources(search_response: SearchResponse) -> str:
+    """Format search results into bulleted list"""
+    return "\n".join(
+        f"* {source.title}: {source.url}" for source in iter_sources(search_response)
+    )
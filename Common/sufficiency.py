@@ -0,0 +1,144 @@
+import logging
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel
+
+from backend.routers.Common.configuration import get_setting
+from backend.routers.Common.passages import tokenize
+
+logger = logging.getLogger(__name__)
+
+# The literal defaults of the EconomicData / IndustryData schemas meaning
+# "nothing found" ("Unknown", "No mitigation", ...); findings that merely start
+# with "No" ("No material debt; net cash of $2B") are real content
+_PLACEHOLDER_RE = re.compile(
+    r"^\s*(unknown|n/?a|none|no data|no (?:content|date|description|force|likelihood|"
+    r"mitigation|name|severity|source|timeframe|title)|)\s*$",
+    re.IGNORECASE,
+)
+_URL_RE = re.compile(r"https?://\S+")
+
+
+def _informative(value: Any) -> bool:
+    if isinstance(value, str):
+        return not _PLACEHOLDER_RE.match(value)
+    if isinstance(value, BaseModel):
+        return field_coverage(value) > 0
+    if isinstance(value, (list, tuple)):
+        return any(_informative(item) for item in value)
+    return value is not None
+
+
+def field_coverage(data: BaseModel) -> float:
+    """Share of a schema's fields filled with something other than a placeholder.
+
+    Nested models count field by field; a list counts as one field, filled
+    when at least one of its items is.
+    """
+    filled = total = 0
+    for name in type(data).model_fields:
+        value = getattr(data, name)
+        if isinstance(value, BaseModel):
+            fields = len(type(value).model_fields)
+            filled += field_coverage(value) * fields
+            total += fields
+        else:
+            filled += _informative(value)
+            total += 1
+    return filled / total if total else 0.0
+
+
+def new_url_ratio(sources_gathered: Sequence[str]) -> float:
+    """Share of the latest search's URLs not returned by the earlier ones."""
+    if not sources_gathered:
+        return 0.0
+    latest = set(_URL_RE.findall(sources_gathered[-1]))
+    if not latest:
+        return 0.0
+    earlier = {url for sources in sources_gathered[:-1] for url in _URL_RE.findall(sources)}
+    return len(latest - earlier) / len(latest)
+
+
+def summary_novelty(summaries: Sequence[str]) -> float:
+    """1 minus the Jaccard similarity of the vocabulary of the last two summaries."""
+    if len(summaries) < 2:
+        return 1.0
+    previous, latest = set(tokenize(summaries[-2])), set(tokenize(summaries[-1]))
+    if not latest:
+        return 0.0
+    return 1 - len(previous & latest) / len(previous | latest)
+
+
+@dataclass
+class SufficiencyStats:
+    """How often the heuristic ended a research loop without the model."""
+    evaluations: int = 0
+    short_circuits: int = 0
+    reasons: Counter = field(default_factory=Counter)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def record(self, reason: Optional[str]):
+        with self._lock:
+            self.evaluations += 1
+            if reason:
+                self.short_circuits += 1
+                self.reasons[reason] += 1
+
+    def as_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "evaluations": self.evaluations,
+                "short_circuits": self.short_circuits,
+                "reflection_calls_saved": self.short_circuits,
+                "reasons": dict(self.reasons),
+            }
+
+
+sufficiency_stats = SufficiencyStats()
+
+
+def research_sufficient(
+    analysis: Optional[BaseModel],
+    sources_gathered: Sequence[str],
+    running_summaries: Sequence[str],
+    config: Optional[RunnableConfig] = None,
+) -> Optional[str]:
+    """Decide without an LLM call whether an analyst branch has researched enough.
+
+    Thresholds are read from the config (or environment):
+
+    - "sufficiency_min_coverage" (0.75): the latest analysis fills at least
+      this share of its schema.
+    - "sufficiency_min_new_urls" (0.2): from the second search on, fewer new
+      URLs than this share means the query is exhausted.
+    - "sufficiency_min_novelty" (0.15): from the second summary on, a summary
+      this close to the previous one adds nothing.
+
+    Set "sufficiency_heuristic" to false to always ask the model.
+
+    Returns:
+        The reason to stop ("coverage", "no_new_sources" or "no_new_findings"),
+        or None when the reflection step should decide.
+    """
+    if not get_setting(config, "sufficiency_heuristic", True):
+        return None
+
+    reason = None
+    if analysis is not None and field_coverage(analysis) >= get_setting(config, "sufficiency_min_coverage", 0.75):
+        reason = "coverage"
+    elif len(sources_gathered) > 1 and new_url_ratio(sources_gathered) < get_setting(config, "sufficiency_min_new_urls", 0.2):
+        reason = "no_new_sources"
+    elif len(running_summaries) > 1 and summary_novelty(running_summaries) < get_setting(config, "sufficiency_min_novelty", 0.15):
+        reason = "no_new_findings"
+
+    sufficiency_stats.record(reason)
+    if reason:
+        logger.info(
+            "Research loop ended without reflection (%s); %s", reason, sufficiency_stats.as_dict()
+        )
+    return reason
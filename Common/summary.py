@@ -0,0 +1,187 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Literal, Optional
+
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import RunnableConfig
+from pydantic import BaseModel, Field
+
+from backend.routers.Common.configuration import get_setting
+from backend.routers.Common.tokens import render_prompt
+
+_HEADING_RE = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_LIST_RE = re.compile(r"^\s*([-*+]|\d+[.)])\s")
+PATH_SEP = " / "
+
+
+class SectionUpdate(BaseModel):
+    """A change to one section of the running summary"""
+    section: str = Field(
+        description='Section path as listed, e.g. "Global Economic Environment / Inflation"; '
+        "a new path adds a section"
+    )
+    action: Literal["append", "replace"] = Field(
+        description='"append" adds new points to the section, "replace" rewrites it '
+        "when new findings contradict or supersede it",
+        default="append",
+    )
+    content: str = Field(description="Markdown body for the section, without its heading")
+
+
+class SummaryDelta(BaseModel):
+    """Changes to the running summary implied by new findings"""
+    updates: List[SectionUpdate] = Field(
+        description="Only sections that the new findings change; empty if nothing is new",
+        default=[],
+    )
+
+
+@dataclass
+class _Section:
+    level: int
+    title: str
+    path: str
+    lines: List[str] = field(default_factory=list)
+
+
+def _key(path: str) -> str:
+    return PATH_SEP.join(" ".join(part.split()).lower() for part in path.split("/"))
+
+
+def parse_sections(markdown: str) -> List[_Section]:
+    """Split a markdown summary into sections keyed by their heading path.
+
+    Text before the first heading is kept in a section with an empty path.
+    """
+    sections = [_Section(level=0, title="", path="")]
+    parents: List[_Section] = []
+    for line in markdown.splitlines():
+        match = _HEADING_RE.match(line)
+        if not match:
+            sections[-1].lines.append(line)
+            continue
+        level, title = len(match.group(1)), match.group(2)
+        parents = [parent for parent in parents if parent.level < level]
+        path = PATH_SEP.join([parent.title for parent in parents] + [title])
+        section = _Section(level=level, title=title, path=path)
+        parents.append(section)
+        sections.append(section)
+    return sections
+
+
+def section_paths(markdown: str) -> List[str]:
+    return [section.path for section in parse_sections(markdown) if section.path]
+
+
+def render_sections(sections: List[_Section]) -> str:
+    lines = []
+    for section in sections:
+        if section.path:
+            if lines and lines[-1].strip() and not _HEADING_RE.match(lines[-1]):
+                lines.append("")
+            lines.append(f"{'#' * section.level} {section.title}")
+        lines.extend(section.lines)
+    return "\n".join(lines).strip()
+
+
+def apply_summary_delta(summary: str, delta: SummaryDelta) -> str:
+    """Merge section updates into a markdown summary.
+
+    Appended content goes after the section's own text (before its
+    subsections); replaced sections keep their subsections. Updates for a
+    path that does not exist add the section after its closest existing
+    parent, or at the end.
+    """
+    sections = parse_sections(summary)
+    for update in delta.updates:
+        content = update.content.strip()
+        if not content:
+            continue
+        key = _key(update.section)
+        index = next((i for i, s in enumerate(sections) if s.path and _key(s.path) == key), None)
+        if index is not None:
+            section = sections[index]
+            body = [] if update.action == "replace" else list(section.lines)
+            while body and not body[-1].strip():
+                body.pop()
+            new_lines = content.splitlines()
+            # Keep bullet lists contiguous, separate anything else by a blank line
+            if body and not (_LIST_RE.match(body[-1]) and _LIST_RE.match(new_lines[0])):
+                body.append("")
+            section.lines = body + new_lines + [""]
+            continue
+
+        # New section: place it at the end of its parent's block
+        parts = [part.strip() for part in update.section.split("/") if part.strip()]
+        position, level = len(sections), 1
+        for depth in range(len(parts) - 1, 0, -1):
+            parent_key = _key(PATH_SEP.join(parts[:depth]))
+            parent = next((i for i, s in enumerate(sections) if s.path and _key(s.path) == parent_key), None)
+            if parent is not None:
+                level = sections[parent].level + 1
+                position = parent + 1
+                while position < len(sections) and sections[position].level > sections[parent].level:
+                    position += 1
+                break
+        path = PATH_SEP.join(parts)
+        sections.insert(position, _Section(level=level, title=parts[-1], path=path, lines=content.splitlines() + [""]))
+    return render_sections(sections)
+
+
+async def update_running_summary(
+    model,
+    summary_prompt: str,
+    update_prompt: str,
+    current_summary: str,
+    analysis: str,
+    config: Optional[RunnableConfig] = None,
+) -> str:
+    """Produce the next running summary of an analyst branch.
+
+    The first summary is written in full with summary_prompt. After that, in
+    the default "incremental" summary_mode, the model only returns a
+    SummaryDelta of the sections the new findings change (update_prompt),
+    which is merged locally, so the output of each iteration stays the size
+    of what is new. summary_mode "full" regenerates the whole summary every
+    time.
+
+    Args:
+        model: ChatClient (or any chat model) used for the call.
+        summary_prompt: Template with {current_summary} and {analysis}.
+        update_prompt: Template with {current_summary}, {sections} and {analysis}.
+        current_summary: The latest running summary, "" on the first iteration.
+        analysis: Formatted search results of this iteration.
+        config: Node config.
+
+    Returns:
+        The new running summary.
+    """
+    # Routed as its own step, so that it can use a cheaper model than the analysis
+    for_step = getattr(model, "for_step", None)
+    if for_step is not None:
+        model = for_step("summary")
+    if current_summary and get_setting(config, "summary_mode", "incremental") == "incremental":
+        prompt = render_prompt(
+            update_prompt,
+            config,
+            trim=["current_summary", "analysis"],
+            current_summary=current_summary,
+            sections="\n".join(f"- {path}" for path in section_paths(current_summary)),
+            analysis=analysis,
+        )
+        try:
+            delta = await model.with_structured_output(SummaryDelta).ainvoke(
+                [HumanMessage(content=prompt)], config
+            )
+            return apply_summary_delta(current_summary, delta)
+        except Exception as e:
+            print(f"Incremental summary update failed, regenerating the summary: {e}")
+
+    prompt = render_prompt(
+        summary_prompt,
+        config,
+        trim=["current_summary", "analysis"],
+        current_summary=current_summary,
+        analysis=analysis,
+    )
+    return (await model.ainvoke([HumanMessage(content=prompt)], config)).content
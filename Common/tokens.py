@@ -0,0 +1,278 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+
+from backend.routers.Common.configuration import get_run_id, get_setting, node_name
+
+try:  # Optional: exact offline token counts
+    import tiktoken
+except ImportError:  # pragma: no cover - falls back to the character estimate
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Rough estimate of 4 characters per token, used by the approximate mode
+CHARS_PER_TOKEN = 4
+# Per-message framing added by chat APIs on top of the content
+MESSAGE_OVERHEAD_TOKENS = 4
+ENCODING_NAME = "cl100k_base"
+TRUNCATION_MARKER = "... [truncated]"
+
+# Input budget per prompt for each graph node, in tokens. Override with
+# {"configurable": {"token_budget_<node>": n}} or TOKEN_BUDGET_<NODE>.
+DEFAULT_TOKEN_BUDGETS = {
+    "orchestrator": 2000,
+    "research_planner": 2000,
+    "planner": 1000,
+    "analyst": 12000,
+    "reflect": 6000,
+    "aggregate_analyses": 24000,
+    "retry": 2000,
+    "retriever": 30000,
+    "quantitative_analysis": 32000,
+    "memo_delta": 16000,
+    "combine": 48000,
+}
+DEFAULT_NODE_BUDGET = 32000
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(ENCODING_NAME)
+    except Exception as e:  # e.g. encoding files not available offline
+        logger.warning("Tokenizer %s unavailable, using approximate counts: %s", ENCODING_NAME, e)
+        return None
+
+
+# Only strings up to this length are cached: short fields repeat (e.g. packed
+# QuickFS fields), while whole prompts rarely do and would pin a lot of memory
+CACHED_TEXT_CHARS = 1024
+
+
+def _encode_count(text: str) -> int:
+    return len(_encoding().encode(text, disallowed_special=()))
+
+
+_count_cached = lru_cache(maxsize=8192)(_encode_count)
+
+
+def _count_exact(text: str) -> int:
+    if len(text) <= CACHED_TEXT_CHARS:
+        return _count_cached(text)
+    return _encode_count(text)
+
+
+def _approximate(config: Optional[RunnableConfig], approximate: Optional[bool]) -> bool:
+    if approximate is None:
+        approximate = get_setting(config, "token_count_mode", "exact") == "approx"
+    return approximate or _encoding() is None
+
+
+def count_tokens(
+    text: str, config: Optional[RunnableConfig] = None, approximate: Optional[bool] = None
+) -> int:
+    """Number of tokens in a string.
+
+    Uses the tiktoken encoding when it is installed, caching the counts of
+    recently seen short strings, and otherwise (or with token_count_mode "approx")
+    the 4-characters-per-token estimate, which is free to compute.
+
+    Args:
+        text: The text to measure.
+        config: Node config, read for "token_count_mode".
+        approximate: Force (True) or forbid (False) the fast estimate.
+
+    Returns:
+        The token count.
+    """
+    if not text:
+        return 0
+    if _approximate(config, approximate):
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return _count_exact(text)
+
+
+def count_message_tokens(
+    messages: Iterable[BaseMessage], config: Optional[RunnableConfig] = None
+) -> int:
+    """Number of input tokens of a list of chat messages."""
+    total = 0
+    for message in messages:
+        content = message.content
+        if not isinstance(content, str):
+            content = json.dumps(content, ensure_ascii=False, default=str)
+        total += count_tokens(content, config) + MESSAGE_OVERHEAD_TOKENS
+    return total
+
+
+def truncate_to_tokens(
+    text: str, max_tokens: int, config: Optional[RunnableConfig] = None
+) -> str:
+    """Cut text to at most max_tokens tokens, marking the cut."""
+    if count_tokens(text, config) <= max_tokens:
+        return text
+    keep = max(max_tokens - count_tokens(TRUNCATION_MARKER, config), 0)
+    if _approximate(config, None):
+        return text[: keep * CHARS_PER_TOKEN] + TRUNCATION_MARKER
+    encoding = _encoding()
+    return encoding.decode(encoding.encode(text, disallowed_special=())[:keep]) + TRUNCATION_MARKER
+
+
+def token_budget(config: Optional[RunnableConfig], node: Optional[str] = None) -> int:
+    """Input token budget of a prompt built by a node (default: the calling node)."""
+    node = node or node_name(config) or ""
+    return get_setting(
+        config, f"token_budget_{node}", DEFAULT_TOKEN_BUDGETS.get(node, DEFAULT_NODE_BUDGET)
+    )
+
+
+def render_prompt(
+    template: str,
+    config: Optional[RunnableConfig] = None,
+    trim: Iterable[str] = (),
+    budget: Optional[int] = None,
+    **fields,
+) -> str:
+    """Format a prompt template within the token budget of the calling node.
+
+    The fields named in trim are shortened when the prompt would exceed the
+    budget. The space left by the template and the other fields is shared
+    between them, with fields smaller than their share kept whole and their
+    unused share passed on to the others.
+
+    Args:
+        template: A str.format template.
+        config: Node config, used for the budget and the counting mode.
+        trim: Names of the fields that may be shortened.
+        budget: Token budget, by default token_budget(config).
+        **fields: Values for the template.
+
+    Returns:
+        The formatted prompt.
+    """
+    budget = token_budget(config) if budget is None else budget
+    fields = {name: str(value) if name in trim else value for name, value in fields.items()}
+    prompt = template.format(**fields)
+    if not trim or count_tokens(prompt, config) <= budget:
+        return prompt
+
+    trim = list(trim)
+    overhead = count_tokens(template.format(**{**fields, **{name: "" for name in trim}}), config)
+    available = max(budget - overhead, 0)
+    sizes = {name: count_tokens(fields[name], config) for name in trim}
+    # Smallest fields first, so that what they do not use goes to the larger ones
+    for i, name in enumerate(sorted(trim, key=sizes.get)):
+        share = available // (len(trim) - i)
+        if sizes[name] > share:
+            fields[name] = truncate_to_tokens(fields[name], share, config)
+        available -= min(sizes[name], share)
+    return template.format(**fields)
+
+
+@dataclass
+class PromptUsage:
+    """Size of one prompt sent to the model."""
+    node: Optional[str]
+    tokens: int
+    budget: int
+    model: Optional[str] = None
+    cached: bool = False
+    tier: Optional[str] = None
+    timestamp: float = field(default_factory=time.time)
+
+    @property
+    def over_budget(self) -> bool:
+        return self.tokens > self.budget
+
+
+class TokenLedger:
+    """Per-run record of the prompt sizes sent through ChatClient.
+
+    Runs are keyed by the "run_id" (or "thread_id") in the config. Each record
+    is also logged, and appended as a JSON line to TOKEN_LOG_PATH when set, so
+    that budgets can be tuned from real runs.
+    """
+
+    def __init__(self, log_path: Optional[str] = None, max_runs: int = 100):
+        self.log_path = log_path
+        self.max_runs = max_runs
+        self._runs: Dict[str, List[PromptUsage]] = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        config: Optional[RunnableConfig],
+        node: Optional[str],
+        tokens: int,
+        model: Optional[str] = None,
+        cached: bool = False,
+        tier: Optional[str] = None,
+    ) -> PromptUsage:
+        run_id = get_run_id(config)
+        usage = PromptUsage(
+            node=node, tokens=tokens, budget=token_budget(config, node), model=model, cached=cached, tier=tier
+        )
+        with self._lock:
+            if run_id not in self._runs and len(self._runs) >= self.max_runs:
+                del self._runs[next(iter(self._runs))]
+            self._runs[run_id].append(usage)
+            if self.log_path:
+                self._append(run_id, usage)
+
+        if usage.over_budget:
+            logger.warning(
+                "Prompt for node %s uses %d tokens, over its budget of %d",
+                node, tokens, usage.budget,
+            )
+        else:
+            logger.info("Prompt for node %s uses %d/%d tokens", node, tokens, usage.budget)
+        return usage
+
+    def _append(self, run_id: str, usage: PromptUsage):
+        try:
+            directory = os.path.dirname(self.log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"run_id": run_id, **asdict(usage)}) + "\n")
+        except OSError as e:
+            logger.warning("Error writing token log: %s", e)
+
+    def usage(self, run_id: str) -> List[PromptUsage]:
+        with self._lock:
+            return list(self._runs.get(run_id, []))
+
+    def summary(self, run_id: str, by: str = "node") -> Dict[str, Dict[str, int]]:
+        """Calls, total and largest prompt tokens per node (or "tier", "model") for one run."""
+        result: Dict[str, Dict[str, int]] = {}
+        for usage in self.usage(run_id):
+            entry = result.setdefault(
+                getattr(usage, by) or "", {"calls": 0, "tokens": 0, "max_tokens": 0, "over_budget": 0}
+            )
+            entry["calls"] += 1
+            entry["tokens"] += usage.tokens
+            entry["max_tokens"] = max(entry["max_tokens"], usage.tokens)
+            entry["over_budget"] += usage.over_budget
+        return result
+
+    def clear(self, run_id: Optional[str] = None):
+        with self._lock:
+            if run_id is None:
+                self._runs.clear()
+            else:
+                self._runs.pop(run_id, None)
+
+
+token_ledger = TokenLedger(log_path=os.getenv("TOKEN_LOG_PATH") or None)
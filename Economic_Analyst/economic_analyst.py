@@ -3,7 +3,6 @@ from dotenv import load_dotenv
 import os
 import json
 import asyncio
-from tavily import TavilyClient, AsyncTavilyClient
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.tools import tool
@@ -26,11 +25,18 @@ from backend.routers.Economic_Analyst.state import (
     Reflection,
     EconomicData,
 )
+from backend.routers.Common.llm import ChatClient
+from backend.routers.Common.search import tavily_search_async
+from backend.routers.Common.sources import format_sources, format_sources_for_prompt, release_sources
+from backend.routers.Common.sufficiency import research_sufficient
+from backend.routers.Common.summary import update_running_summary
+from backend.routers.Common.tokens import render_prompt
 from backend.routers.Economic_Analyst.prompts import (
     # from prompts import (
     RESEARCH_PLAN_PROMPT,
     ANALYSIS_PROMPT,
     SUMMARY_PROMPT,
+    SUMMARY_UPDATE_PROMPT,
     REFLECTION_PROMPT,
     COMBINE_SUMMARIES_PROMPT,
 )
@@ -49,113 +55,23 @@ if not langsmith_api_key:
     raise ValueError("LANGCHAIN_API_KEY environment variable is not set")
 
 # Client initialization
-tavily_client = TavilyClient(api_key=tavily_api_key)
-tavily_async_client = AsyncTavilyClient(api_key=tavily_api_key)
 langsmith_client = Client()
 
 # LLM Configuration
-model = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    google_api_key=api_key,
-    temperature=0.7,
+model = ChatClient(
+    ChatGoogleGenerativeAI(
+        model="gemini-1.5-flash",
+        google_api_key=api_key,
+        temperature=0.7,
+    )
 )
 
 
-# Helper Functions for Source Management
-def deduplicate_and_format_sources(
-    search_response, max_tokens_per_source, include_raw_content=True
-):
-    """
-    Takes either a single search response or list of responses from Tavily API and formats them.
-    Limits the raw_content to approximately max_tokens_per_source.
-    include_raw_content specifies whether to include the raw_content from Tavily in the formatted string.
-
-    Args:
-        search_response: Either:
-            - A dict with a 'results' key containing a list of search results
-            - A list of dicts, each containing search results
-
-    Returns:
-        str: Formatted string with deduplicated sources
-    """
-    # Convert input to list of results
-    if isinstance(search_response, dict):
-        sources_list = search_response["results"]
-    elif isinstance(search_response, list):
-        sources_list = []
-        for response in search_response:
-            if isinstance(response, dict) and "results" in response:
-                sources_list.extend(response["results"])
-            else:
-                sources_list.extend(response)
-    else:
-        raise ValueError(
-            "Input must be either a dict with 'results' or a list of search results"
-        )
-
-    # Deduplicate by URL
-    unique_sources = {}
-    for source in sources_list:
-        if source["url"] not in unique_sources:
-            unique_sources[source["url"]] = source
-
-    # Format output
-    formatted_text = "Sources:\n\n"
-    for i, source in enumerate(unique_sources.values(), 1):
-        formatted_text += f"Source {source['title']}:\n===\n"
-        formatted_text += f"URL: {source['url']}\n===\n"
-        formatted_text += (
-            f"Most relevant content from source: {source['content']}\n===\n"
-        )
-        if include_raw_content:
-            # Using rough estimate of 4 characters per token
-            char_limit = max_tokens_per_source * 4
-            # Handle None raw_content
-            raw_content = source.get("raw_content", "")
-            if raw_content is None:
-                raw_content = ""
-                # print(f"Warning: No raw_content found for source {source['url']}")
-            if len(raw_content) > char_limit:
-                raw_content = raw_content[:char_limit] + "... [truncated]"
-            formatted_text += f"Full source content limited to {max_tokens_per_source} tokens: {raw_content}\n\n"
-
-    return formatted_text.strip()
-
-
-# Tavily Search Tool
-@traceable
-async def tavily_search_async(query: str) -> str:
-    """Search the web using the Tavily API asynchronously.
-
-    Args:
-        query (str): The search query to execute
-
-    Returns:
-        str: JSON string containing search results or error message
-    """
-    if not query:
-        return json.dumps({"error": "No search query provided"}, ensure_ascii=False)
-
-    try:
-        search_result = await tavily_async_client.search(
-            query,
-            search_depth="advanced",
-            max_results=5,
-            include_answer=True,
-            include_raw_content=True,
-        )
-        return json.dumps(search_result, ensure_ascii=False)
-    except Exception as e:
-        return json.dumps(
-            {"error": f"Error performing search: {str(e)}"}, ensure_ascii=False
-        )
-
-
 # Agent Functions
-def research_planner(state: ResearchState):
+async def research_planner(state: ResearchState, config: RunnableConfig):
     planner = model.with_structured_output(ResearchPlan)
-    prompt = RESEARCH_PLAN_PROMPT.format(topic=state.topic)
-    plan = planner.invoke([HumanMessage(content=prompt)])
+    prompt = render_prompt(RESEARCH_PLAN_PROMPT, config, trim=["topic"], topic=state.topic)
+    plan = await planner.ainvoke([HumanMessage(content=prompt)], config)
 
     # Strictly limit the number of search queries to 3 to avoid halucination
     limited_search_queries = plan.search_queries[:3]
@@ -168,62 +84,87 @@ def research_planner(state: ResearchState):
 
 async def analyst(state: AnalystState, config: RunnableConfig):
     # Search and analyze
-    raw_results = await tavily_search_async(state.search_query)
+    raw_results = await tavily_search_async(state.search_query, config)
     # Parse JSON string to dict
     search_results = json.loads(raw_results)
-    formatted_results = deduplicate_and_format_sources(search_results, 10000)
-
-    # Add a helper function to format sources
-    def format_sources(search_results):
-        """Format search results into bulleted list"""
-        return "\n".join(
-            f"* {result['title']}: {result['url']}"
-            for result in search_results["results"]
-        )
+    formatted_results = format_sources_for_prompt(search_results, state.search_query, config)
 
     analyst = model.with_structured_output(EconomicData)
-    analysis_prompt = ANALYSIS_PROMPT.format(
-        query=state.search_query, formatted_results=formatted_results
+    analysis_prompt = render_prompt(
+        ANALYSIS_PROMPT,
+        config,
+        trim=["formatted_results"],
+        query=state.search_query,
+        formatted_results=formatted_results,
     )
-    analysis = analyst.invoke([HumanMessage(content=analysis_prompt)])
 
     # Generate running summary
     current_summaries = state.running_summaries or []
     latest_summary = current_summaries[-1] if current_summaries else ""
 
-    summary_prompt = SUMMARY_PROMPT.format(
-        current_summary=latest_summary, analysis=formatted_results
-    )
-    summary = model.invoke([HumanMessage(content=summary_prompt)])
+    # The structured extraction and the running summary only depend on the
+    # search results, so issue both calls at once
+    try:
+        analysis, summary = await asyncio.gather(
+            analyst.ainvoke([HumanMessage(content=analysis_prompt)], config),
+            update_running_summary(
+                model,
+                SUMMARY_PROMPT,
+                SUMMARY_UPDATE_PROMPT,
+                latest_summary,
+                formatted_results,
+                config,
+            ),
+        )
+    except BaseException:
+        # The pages were not analysed, so other branches must not refer to them
+        release_sources(state.search_query, config)
+        raise
 
     return {
         "web_research_results": [formatted_results],
         "sources_gathered": [format_sources(search_results)],
-        "running_summaries": [summary.content],
+        "running_summaries": [summary],
         "research_loop_count": state.research_loop_count + 1,
         "analyses": [analysis],  # Return as list for parallel aggregation
     }
 
 
-def should_continue_research(state: AnalystState) -> Literal["reflect", "end_analysis"]:
+def should_continue_research(
+    state: AnalystState, config: RunnableConfig
+) -> Literal["reflect", "end_analysis"]:
     """Determine if more research is needed"""
     if (
-        state.research_loop_count < 2
+        state.research_loop_count >= 2
     ):  # Maximum 2 or 3 iterations per query, can be adjusted
-        return "reflect"
-    return "end_analysis"
-
-
-def reflect_on_research(state: AnalystState):
+        return "end_analysis"
+    # Skip the reflection call when the findings are clearly sufficient already
+    if research_sufficient(
+        state.analyses[-1] if state.analyses else None,
+        state.sources_gathered,
+        state.running_summaries,
+        config,
+    ):
+        return "end_analysis"
+    return "reflect"
+
+
+async def reflect_on_research(state: AnalystState, config: RunnableConfig):
     """Reflect on current findings and possibly refine or repeat the same search query."""
     # Get the latest summary from the list
     current_summary = state.running_summaries[-1] if state.running_summaries else ""
 
-    reflection_prompt = REFLECTION_PROMPT.format(
-        query=state.search_query, current_summary=current_summary
+    reflection_prompt = render_prompt(
+        REFLECTION_PROMPT,
+        config,
+        trim=["current_summary"],
+        query=state.search_query,
+        current_summary=current_summary,
     )
     reflection_agent = model.with_structured_output(Reflection)
-    reflection = reflection_agent.invoke([HumanMessage(content=reflection_prompt)])
+    reflection = await reflection_agent.ainvoke(
+        [HumanMessage(content=reflection_prompt)], config
+    )
     refined_query = reflection.refined_query
 
     # If reflection indicates the current query is sufficient, move to the next search query
@@ -265,7 +206,7 @@ def initiate_analysis(state: ResearchState):
     ]
 
 
-def aggregate_analyses(state: ResearchState) -> Dict:
+async def aggregate_analyses(state: ResearchState, config: RunnableConfig) -> Dict:
     """Lead Analyst Agent writes the final report"""
     """Aggregate analyses from parallel runs"""
 
@@ -298,16 +239,22 @@ def aggregate_analyses(state: ResearchState) -> Dict:
     )
 
     # Combine all summaries into a single coherent summary
-    combined_summary = model.invoke(
-        [
-            HumanMessage(
-                content=COMBINE_SUMMARIES_PROMPT.format(
-                    summaries=" ".join(state.running_summaries),
-                    combined_analysis=combined_analysis,
-                    topic=state.topic,
+    combined_summary = (
+        await model.ainvoke(
+            [
+                HumanMessage(
+                    content=render_prompt(
+                        COMBINE_SUMMARIES_PROMPT,
+                        config,
+                        trim=["summaries", "combined_analysis"],
+                        summaries=" ".join(state.running_summaries),
+                        combined_analysis=combined_analysis,
+                        topic=state.topic,
+                    )
                 )
-            )
-        ]
+            ],
+            config,
+        )
     ).content
 
     return {
@@ -161,6 +161,24 @@ Support each section with:
 
 Focus on creating a clear narrative that demonstrates understanding of economic dynamics and their specific impacts."""
 
+SUMMARY_UPDATE_PROMPT = """Update the current economic assessment with the new findings.
+
+Current Analysis: {current_summary}
+
+Sections of the current analysis:
+{sections}
+
+New Findings: {analysis}
+
+Return only the changes, as updates to individual sections:
+- "append" new facts, data points and developments to the section they belong to
+- "replace" a section only when the new findings contradict or supersede what it says, and then give its full new text
+- use a new section path only for a topic no existing section covers
+- do not repeat anything the current analysis already says, and leave out sections the findings do not change
+- return no updates if the findings add nothing new
+
+Back up the updates with numbers and statistics from the new findings when available."""
+
 COMBINE_SUMMARIES_PROMPT = """Synthesize these economic analyses into a comprehensive report:
 
 Summaries: {summaries}
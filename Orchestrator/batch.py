@@ -0,0 +1,243 @@
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from langchain_core.runnables import RunnableConfig
+
+from backend.routers.Common.configuration import get_setting
+from backend.routers.Common.memo import research_memo
+from backend.routers.Common.tokens import token_ledger
+from backend.routers.Economic_Analyst.economic_analyst import graph as economic_graph
+from backend.routers.Economic_Analyst.state import EconomicData
+from backend.routers.Orchestrator.prompts import MARKET_ECONOMIC_QUERY
+from backend.routers.Quantitative_Analyst.symbols import symbol_index
+
+logger = logging.getLogger(__name__)
+
+# QuickFS country codes to the market researched by the shared economic analysis
+MARKET_NAMES = {
+    "US": "United States",
+    "CA": "Canada",
+    "LN": "United Kingdom",
+    "AU": "Australia",
+    "NZ": "New Zealand",
+    "MM": "Mexico",
+}
+
+# Rough model calls and prompt tokens of one economic research run, counted as
+# saved on memo hits whose entry was stored without its cost (e.g. by a
+# single-stock run, which cannot separate it from the rest of the run)
+ECONOMIC_RUN_ESTIMATE = (17, 60000)
+
+
+@dataclass
+class BatchItem:
+    """One stock of a batch, with the group it shares economic research with."""
+    stock: str
+    country: Optional[str] = None
+    sector: Optional[str] = None
+
+    @property
+    def group(self) -> Optional[Tuple[str, str]]:
+        """(country, sector) key, None when the market is unknown."""
+        if not self.country:
+            return None
+        return (self.country, (self.sector or "").strip().lower())
+
+
+@dataclass
+class BatchResult:
+    stock: str
+    group: Optional[str]
+    final_report: str = ""
+    error: Optional[str] = None
+    seconds: float = 0.0
+
+
+@dataclass
+class BatchStats:
+    """What sharing the economic research saved over one run per stock."""
+    stocks: int = 0
+    groups: int = 0
+    shared_economic_runs: int = 0
+    memoized_economic_runs: int = 0
+    failed: int = 0
+    wall_seconds: float = 0.0
+    model_calls: int = 0
+    model_calls_saved: int = 0
+    prompt_tokens_saved: int = 0
+
+    def as_dict(self) -> Dict:
+        return asdict(self)
+
+
+@dataclass
+class BatchReport:
+    results: List[BatchResult] = field(default_factory=list)
+    stats: BatchStats = field(default_factory=BatchStats)
+
+    def as_dict(self) -> Dict:
+        return {"results": [asdict(result) for result in self.results], "stats": self.stats.as_dict()}
+
+
+def to_batch_item(entry: Union[str, Dict, BatchItem]) -> BatchItem:
+    """Build a BatchItem from a ticker or a {"stock", "sector", "country"} dict.
+
+    The country is taken from the symbol index ("CBA.AX" -> "AU") unless given.
+
+    Raises:
+        ValueError: A dict names no stock.
+    """
+    if isinstance(entry, BatchItem):
+        item = entry
+    elif isinstance(entry, str):
+        item = BatchItem(stock=entry)
+    else:
+        stock = entry.get("stock") or entry.get("ticker")
+        if not stock:
+            raise ValueError(f'Batch entry {entry!r} has neither "stock" nor "ticker"')
+        item = BatchItem(
+            stock=stock,
+            country=entry.get("country"),
+            sector=entry.get("sector"),
+        )
+    if not item.country:
+        match = symbol_index.resolve(item.stock)
+        if match:
+            item.country = match.symbol.partition(":")[2]
+    return item
+
+
+def group_items(items: Sequence[BatchItem]) -> Dict[Optional[Tuple[str, str]], List[BatchItem]]:
+    """Group stocks by (country, sector); stocks of unknown market go under None."""
+    groups: Dict[Optional[Tuple[str, str]], List[BatchItem]] = {}
+    for item in items:
+        groups.setdefault(item.group, []).append(item)
+    return groups
+
+
+def market_query(country: str, sector: str = "") -> str:
+    return MARKET_ECONOMIC_QUERY.format(
+        market=MARKET_NAMES.get(country, country),
+        sector_focus=f", and its implications for the {sector} sector" if sector else "",
+    )
+
+
+def _run_config(config: Optional[RunnableConfig], run_id: str) -> RunnableConfig:
+    config = dict(config or {})
+    config["configurable"] = {**(config.get("configurable") or {}), "run_id": run_id}
+    return config
+
+
+def _ledger_totals(run_id: str) -> Tuple[int, int]:
+    usage = token_ledger.usage(run_id)
+    return len(usage), sum(record.tokens for record in usage)
+
+
+async def analyze_batch(
+    stocks: Sequence[Union[str, Dict, BatchItem]],
+    config: Optional[RunnableConfig] = None,
+    max_concurrency: Optional[int] = None,
+) -> BatchReport:
+    """Analyse a watchlist, sharing the economic research between similar stocks.
+
+    Stocks are grouped by country and, when given, sector. Each group with
+    more than one stock researches its market's economy once with the
+    economic analyst (or reuses it from the research memo), and every stock of the group is then analysed by the
+    orchestrator graph with that report passed in, so only the industry,
+    quantitative and combine steps run per stock. Stocks whose market cannot
+    be resolved, and groups of one, run the full graph.
+
+    Args:
+        stocks: Tickers, or dicts with "stock" and optional "sector"/"country".
+        config: Base config for every run; each run gets its own run_id.
+        max_concurrency: Graph runs in flight at once (setting
+            "batch_max_concurrency", default 4).
+
+    Returns:
+        BatchReport with a result per stock, in input order, and BatchStats.
+        model_calls_saved and prompt_tokens_saved estimate what the stocks
+        sharing a report would have spent researching the economy themselves;
+        on a memo hit that is every stock of the group, at the cost recorded
+        with the entry (or ECONOMIC_RUN_ESTIMATE when it has none).
+    """
+    # Imported here as the orchestrator's router imports this module
+    from backend.routers.Orchestrator.main import graph
+
+    start = time.perf_counter()
+    items = [to_batch_item(entry) for entry in stocks]
+    groups = group_items(items)
+    limit = asyncio.Semaphore(max_concurrency or get_setting(config, "batch_max_concurrency", 4))
+    batch_id = uuid.uuid4().hex
+    stats = BatchStats(stocks=len(items), groups=len(groups))
+    results: Dict[int, BatchResult] = {}
+
+    async def analyze(index: int, item: BatchItem, label: Optional[str], economic_report: Optional[str]):
+        inputs = {"stock": item.stock}
+        if economic_report:
+            inputs["final_economic_report"] = [economic_report]
+        run_id = f"{batch_id}:{index}"
+        stock_start = time.perf_counter()
+        result = BatchResult(stock=item.stock, group=label)
+        async with limit:
+            try:
+                output = await graph.ainvoke(inputs, _run_config(config, run_id))
+                result.final_report = output["final_report"]
+            except Exception as e:
+                logger.exception("Batch analysis of %s failed", item.stock)
+                result.error = str(e)
+        result.seconds = time.perf_counter() - stock_start
+        stats.model_calls += _ledger_totals(run_id)[0]
+        results[index] = result
+
+    async def run_group(key: Optional[Tuple[str, str]], members: List[BatchItem]):
+        indexes = [i for i, item in enumerate(items) if item.group == key]
+        label = "/".join(part for part in key if part) if key else None
+        economic_report = None
+        if key is not None and len(members) > 1:
+            run_id = f"{batch_id}:{label}"
+            memo_key = f"{MARKET_NAMES.get(key[0], key[0])} {key[1]}"
+            entry = await research_memo.alookup("economic", memo_key, EconomicData, config)
+            if entry is not None:
+                economic_report = entry.report
+                stats.memoized_economic_runs += 1
+                # No stock of the group researched the economy this time
+                calls, tokens = (entry.model_calls, entry.prompt_tokens) if entry.model_calls else ECONOMIC_RUN_ESTIMATE
+                stats.model_calls_saved += calls * len(members)
+                stats.prompt_tokens_saved += tokens * len(members)
+            else:
+                async with limit:
+                    try:
+                        output = await economic_graph.ainvoke(
+                            {"topic": market_query(*key)}, _run_config(config, run_id)
+                        )
+                        economic_report = output["final_economic_report"][-1]
+                        stats.shared_economic_runs += 1
+                    except Exception:
+                        # Each stock then researches the economy itself
+                        logger.exception("Shared economic research for %s failed", label)
+                calls, tokens = _ledger_totals(run_id)
+                stats.model_calls += calls
+                if economic_report:
+                    stats.model_calls_saved += calls * (len(members) - 1)
+                    stats.prompt_tokens_saved += tokens * (len(members) - 1)
+                    try:
+                        await research_memo.astore(
+                            "economic", [memo_key], economic_report,
+                            output.get("completed_analyses", []), EconomicData, config,
+                            model_calls=calls, prompt_tokens=tokens,
+                        )
+                    except Exception:
+                        logger.exception("Could not memoize the economic research for %s", label)
+        await asyncio.gather(*(analyze(i, items[i], label, economic_report) for i in indexes))
+
+    await asyncio.gather(*(run_group(key, members) for key, members in groups.items()))
+
+    report = BatchReport(results=[results[i] for i in range(len(items))], stats=stats)
+    stats.failed = sum(result.error is not None for result in report.results)
+    stats.wall_seconds = time.perf_counter() - start
+    logger.info("Batch %s: %s", batch_id, stats.as_dict())
+    return report
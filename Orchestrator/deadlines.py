@@ -0,0 +1,113 @@
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from backend.routers.Common.configuration import get_setting
+
+logger = logging.getLogger(__name__)
+
+BRANCH_REPORTS = {
+    "economic_analysis": "final_economic_report",
+    "industry_analysis": "final_industry_report",
+    "quantitative_analysis": "final_quantitative_report",
+}
+BRANCH_LABELS = {
+    "economic_analysis": "economic analysis",
+    "industry_analysis": "industry analysis",
+    "quantitative_analysis": "quantitative analysis",
+}
+
+
+def run_deadline(config: Optional[RunnableConfig], started: float) -> Optional[float]:
+    """Time by which the analyst branches must finish, None without a run deadline.
+
+    "run_deadline_seconds" is the latency target of the whole run; the last
+    "combine_reserve_seconds" (45) of it are kept for the combine step.
+    """
+    seconds = get_setting(config, "run_deadline_seconds", 0.0)
+    if seconds <= 0:
+        return None
+    return started + max(seconds - get_setting(config, "combine_reserve_seconds", 45.0), 0.0)
+
+
+def branch_timeout(config: Optional[RunnableConfig], branch: str, deadline_at: Optional[float] = None) -> Optional[float]:
+    """Seconds the branch may run: the smaller of "deadline_<branch>_seconds"
+    and the time left before the run deadline, None when neither is set."""
+    timeouts = []
+    seconds = get_setting(config, f"deadline_{branch}_seconds", 0.0)
+    if seconds > 0:
+        timeouts.append(seconds)
+    if deadline_at is not None:
+        timeouts.append(max(deadline_at - time.time(), 0.0))
+    return min(timeouts) if timeouts else None
+
+
+def partial_report(branch: str, latest: Dict[tuple, Dict], timeout: float) -> Optional[str]:
+    """Best report that can be made from a branch stopped at its deadline.
+
+    Uses the branch's own report if it got that far, otherwise the latest
+    running summary of each of its analysts.
+    """
+    report_key = BRANCH_REPORTS[branch]
+    reports = (latest.get(()) or {}).get(report_key)
+    if reports:
+        return reports[-1]
+    summaries = [
+        values["running_summaries"][-1]
+        for namespace, values in latest.items()
+        if namespace and values.get("running_summaries")
+    ]
+    if not summaries:
+        return None
+    return (
+        f"*Partial {BRANCH_LABELS[branch]}: stopped at its {round(timeout, 1):g}s deadline, "
+        "the findings below are incomplete.*\n\n" + "\n\n".join(summaries)
+    )
+
+
+def with_deadline(branch: str, graph):
+    """Node running an analyst subgraph within the branch and run deadlines.
+
+    Without a deadline the subgraph runs as it would as a node. With one, its
+    state is followed as it streams; when the deadline expires the subgraph
+    is cancelled and the node returns a partial report, if any, and a gap
+    for the combine step to flag.
+
+    Args:
+        branch: Node name, a key of BRANCH_REPORTS.
+        graph: Compiled subgraph of the branch.
+    """
+    output_keys = graph.output_channels
+
+    async def run_branch(state: dict, config: RunnableConfig) -> Dict:
+        inputs = dict(state)
+        timeout = branch_timeout(config, branch, inputs.pop("deadline_at", None))
+        if timeout is None:
+            return await graph.ainvoke(inputs, config)
+
+        latest: Dict[tuple, Dict] = {}
+        try:
+            async with asyncio.timeout(timeout):
+                async for namespace, values in graph.astream(
+                    inputs, config, stream_mode="values", subgraphs=True
+                ):
+                    latest[namespace] = values
+        except TimeoutError:
+            report = partial_report(branch, latest, timeout)
+            status = "partial" if report else "missing"
+            logger.warning("%s stopped at its %.1fs deadline, report %s", branch, timeout, status)
+            result: Dict[str, List] = {
+                "gaps": [f"{BRANCH_LABELS[branch]}: {status}, stopped at its {round(timeout, 1):g}s deadline"]
+            }
+            if report:
+                result[BRANCH_REPORTS[branch]] = [report]
+            return result
+
+        values = latest.get(()) or {}
+        return {key: values[key] for key in output_keys if key in values}
+
+    run_branch.__name__ = branch
+    return run_branch
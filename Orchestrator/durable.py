@@ -0,0 +1,162 @@
+import asyncio
+import os
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from backend.routers.Economic_Analyst import state as economic_state
+from backend.routers.Industry_Analyst import state as industry_state
+from backend.routers.Orchestrator.deadlines import BRANCH_REPORTS
+from backend.routers.Orchestrator import state as orchestrator_state
+from backend.routers.Quantitative_Analyst import state as quantitative_state
+
+try:  # Optional: durable runs (langgraph-checkpoint-sqlite)
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+except ImportError:  # pragma: no cover - durable runs are unavailable
+    aiosqlite = AsyncSqliteSaver = None
+
+CHECKPOINT_PATH = os.getenv("CHECKPOINT_PATH", os.path.join(".cache", "checkpoints.sqlite"))
+
+
+def state_types() -> List[Tuple[str, str]]:
+    """(module, class) of every schema the graphs keep in their state.
+
+    Checkpoints only deserialize these, rather than any importable class.
+    """
+    modules = (orchestrator_state, economic_state, industry_state, quantitative_state)
+    return [
+        (module.__name__, name)
+        for module in modules
+        for name, value in vars(module).items()
+        if isinstance(value, type) and value.__module__ == module.__name__
+    ]
+
+
+# Per event loop: a lock and the compiled graph per checkpoint file. Locks and
+# aiosqlite connections belong to the loop that created them, and scripts
+# and benchmarks call asyncio.run repeatedly
+_loops: Dict[asyncio.AbstractEventLoop, Tuple[asyncio.Lock, Dict[str, object]]] = {}
+
+
+def _loop_graphs() -> Tuple[asyncio.Lock, Dict[str, object]]:
+    loop = asyncio.get_running_loop()
+    entry = _loops.get(loop)
+    if entry is None:
+        # Connections of loops that have ended can no longer be closed cleanly
+        for other in [other for other in _loops if other.is_closed()]:
+            for graph in _loops.pop(other)[1].values():
+                graph.checkpointer.conn.stop()
+        entry = _loops[loop] = (asyncio.Lock(), {})
+    return entry
+
+
+async def durable_graph(path: Optional[str] = None):
+    """The orchestrator graph compiled with a SQLite checkpointer.
+
+    The economic, industry and quantitative subgraphs, and the analyst
+    subgraphs inside them, inherit the checkpointer, so every finished
+    superstep of every branch is saved under the run's thread_id. A failed
+    or interrupted run resumed with ``resume_analysis`` only re-executes the
+    work that had not completed: branches and analyst iterations that
+    finished are read back from the checkpoints.
+
+    Args:
+        path: SQLite file, CHECKPOINT_PATH (.cache/checkpoints.sqlite) by default.
+    """
+    if AsyncSqliteSaver is None:
+        raise RuntimeError("Durable runs need langgraph-checkpoint-sqlite: pip install langgraph-checkpoint-sqlite")
+    from backend.routers.Orchestrator.main import workflow
+
+    path = path or CHECKPOINT_PATH
+    lock, graphs = _loop_graphs()
+    async with lock:
+        if path in graphs:
+            return graphs[path]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        saver = AsyncSqliteSaver(
+            await aiosqlite.connect(path),
+            serde=JsonPlusSerializer(allowed_msgpack_modules=state_types()),
+        )
+        await saver.setup()
+        graph = graphs[path] = workflow.compile(checkpointer=saver)
+        return graph
+
+
+async def close_durable_graph(path: Optional[str] = None):
+    """Close the current event loop's checkpoint connection, e.g. before a script exits."""
+    graph = _loop_graphs()[1].pop(path or CHECKPOINT_PATH, None)
+    if graph is not None:
+        await graph.checkpointer.conn.close()
+
+
+def thread_config(thread_id: str, config: Optional[RunnableConfig] = None) -> RunnableConfig:
+    config = dict(config or {})
+    config["configurable"] = {**(config.get("configurable") or {}), "thread_id": thread_id}
+    return config
+
+
+async def start_analysis(stock: str, thread_id: Optional[str] = None, config: Optional[RunnableConfig] = None) -> Dict:
+    """Run an analysis with checkpoints, so that it can be resumed if it fails.
+
+    Returns:
+        {"thread_id", "final_report"}.
+    """
+    thread_id = thread_id or uuid.uuid4().hex
+    graph = await durable_graph()
+    result = await graph.ainvoke({"stock": stock}, thread_config(thread_id, config))
+    return {"thread_id": thread_id, **result}
+
+
+async def analysis_status(thread_id: str) -> Dict:
+    """Progress of a durable run: its status, finished branches and pending nodes.
+
+    Status is "unknown" without checkpoints for thread_id, "completed" once
+    the report is written, and "incomplete" for runs that failed, were
+    interrupted or are still running.
+    """
+    graph = await durable_graph()
+    snapshot = await graph.aget_state(thread_config(thread_id))
+    if snapshot.created_at is None:
+        return {"thread_id": thread_id, "status": "unknown"}
+    values = snapshot.values or {}
+    completed = not snapshot.next and bool(values.get("final_report"))
+    # Branches that finished in a step that failed are saved as the task's result
+    finished = {task.name for task in snapshot.tasks if task.result is not None}
+    return {
+        "thread_id": thread_id,
+        "status": "completed" if completed else "incomplete",
+        "stock": values.get("stock"),
+        "completed_branches": [
+            branch for branch, key in BRANCH_REPORTS.items() if values.get(key) or branch in finished
+        ],
+        "pending_nodes": list(snapshot.next),
+        "errors": {task.name: task.error for task in snapshot.tasks if task.error},
+        "final_report": values.get("final_report") if completed else None,
+    }
+
+
+async def resume_analysis(thread_id: str, config: Optional[RunnableConfig] = None) -> Dict:
+    """Continue a durable run from its last checkpoints.
+
+    Raises:
+        KeyError: No checkpoints exist for thread_id.
+
+    Returns:
+        {"thread_id", "final_report"}; a completed run returns its report
+        without running anything.
+    """
+    graph = await durable_graph()
+    run_config = thread_config(thread_id, config)
+    snapshot = await graph.aget_state(run_config)
+    if snapshot.created_at is None:
+        raise KeyError(f"No checkpoints for run {thread_id}")
+    if not snapshot.next and snapshot.values.get("final_report"):
+        return {"thread_id": thread_id, "final_report": snapshot.values["final_report"]}
+    result = await graph.ainvoke(None, run_config)
+    return {"thread_id": thread_id, **result}
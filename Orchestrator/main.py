@@ -1,25 +1,43 @@
 from dotenv import load_dotenv
 import os
+import asyncio
+import time
+import uuid
+from collections import Counter
+import logging
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage
 from langgraph.graph import StateGraph, END
 from langgraph.constants import Send
 from langchain_core.runnables import RunnableConfig
 from langsmith import Client, traceable
-from typing import List, Optional, Literal, Annotated, Dict
+from typing import List, Optional, Literal, Annotated, Dict, Union
+from pydantic import BaseModel, Field
 
+from backend.routers.Common.configuration import get_run_id, get_setting
+from backend.routers.Common.llm import ChatClient
+from backend.routers.Common.memo import research_memo
+from backend.routers.Common.registry import source_registry
+from backend.routers.Common.tokens import render_prompt
 from backend.routers.Economic_Analyst.economic_analyst import graph as economic_graph
-from backend.routers.Economic_Analyst.state import ResearchStateOutput as EconomicResearchStateOutput
+from backend.routers.Economic_Analyst.state import EconomicData, ResearchStateOutput as EconomicResearchStateOutput
 
 from backend.routers.Industry_Analyst.research_parallel import graph as industry_graph
-from backend.routers.Industry_Analyst.state import ResearchStateOutput as IndustryResearchStateOutput
+from backend.routers.Industry_Analyst.state import IndustryData, ResearchStateOutput as IndustryResearchStateOutput
 
 from backend.routers.Quantitative_Analyst.quantitative_analyst import graph as quantitative_graph
 from backend.routers.Quantitative_Analyst.state import QuantAnalystOutput as QuantitativeAnalystOutput
 
-from backend.routers.Orchestrator.state import OrchestratorState, OrchestratorInput, OrchestratorOutput, OrchestratorPlan, CombinedAnalysis
-from backend.routers.Orchestrator.prompts import ORCHESTRATOR_PLAN_PROMPT, COMBINE_ANALYSES_PROMPT
+from backend.routers.Orchestrator.state import OrchestratorState, OrchestratorInput, OrchestratorOutput, OrchestratorPlan, CombinedAnalysis, MemoDeltaInput
+from backend.routers.Orchestrator.prompts import ORCHESTRATOR_PLAN_PROMPT, COMBINE_ANALYSES_PROMPT, COMBINE_GAPS_NOTE, MEMO_DELTA_PROMPT
+from backend.routers.Orchestrator.deadlines import BRANCH_LABELS, run_deadline, with_deadline
+from backend.routers.Orchestrator.batch import analyze_batch, to_batch_item
+from backend.routers.Orchestrator.durable import analysis_status, resume_analysis, start_analysis
+from backend.routers.Orchestrator.streaming import stream_analysis
+
+logger = logging.getLogger(__name__)
 
 # Environment setup
 load_dotenv()
@@ -31,20 +49,36 @@ if not api_key:
     raise ValueError("GOOGLE_GENERATIVE_AI_API_KEY environment variable is not set")
 
 # LLM Configuration
-model = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash-exp",
-    google_api_key=api_key,
-    temperature=0.7,
+model = ChatClient(
+    ChatGoogleGenerativeAI(
+        model="gemini-2.0-flash-exp",
+        google_api_key=api_key,
+        temperature=0.7,
+    )
 )
 
-def create_research_plan(state: OrchestratorState):
+async def create_research_plan(state: OrchestratorState, config: RunnableConfig):
     """Create research plans for both analyses"""
+    started = time.time()
     orchestrator = model.with_structured_output(OrchestratorPlan)
-    prompt = ORCHESTRATOR_PLAN_PROMPT.format(stock=state.stock)
-    plan = orchestrator.invoke([HumanMessage(content=prompt)])
+    prompt = render_prompt(ORCHESTRATOR_PLAN_PROMPT, config, trim=["stock"], stock=state.stock)
+    plan = await orchestrator.ainvoke([HumanMessage(content=prompt)], config)
+    
+    # Reuse today's research of the same market and industry, if any
+    economic = None
+    if not state.final_economic_report:
+        economic = await research_memo.alookup("economic", plan.market, EconomicData, config)
+    industry = await research_memo.alookup("industry", plan.industry_classification, IndustryData, config)
+    memo_reports = {
+        kind: entry.report
+        for kind, entry in (("economic", economic), ("industry", industry))
+        if entry is not None
+    }
     
     return {
         "plan": plan,
+        "memo_reports": memo_reports,
+        "deadline_at": run_deadline(config, started),
         "web_research_results": [],
         "sources_gathered": [],
         "running_summaries": [],
@@ -53,29 +87,101 @@ def create_research_plan(state: OrchestratorState):
 
 def initiate_analyses(state: OrchestratorState):
     """Launch both analyses in parallel"""
-    return [
-        Send("economic_analysis", {"topic": state.plan.economic_query}),
-        Send("industry_analysis", {"topic": state.plan.industry_query}),
-        Send("quantitative_analysis", {"stock": state.stock})
-    ]
+    # Branches stop at the run deadline, if any
+    deadline = {"deadline_at": state.deadline_at} if state.deadline_at else {}
+    sends = []
+    # A batch run passes in the economic research shared by its market
+    if not state.final_economic_report:
+        if "economic" in state.memo_reports:
+            sends.append(Send("memo_delta", {"kind": "economic", "stock": state.stock, "report": state.memo_reports["economic"]}))
+        else:
+            sends.append(Send("economic_analysis", {"topic": state.plan.economic_query, **deadline}))
+    if "industry" in state.memo_reports:
+        sends.append(Send("memo_delta", {"kind": "industry", "stock": state.stock, "report": state.memo_reports["industry"]}))
+    else:
+        sends.append(Send("industry_analysis", {"topic": state.plan.industry_query, **deadline}))
+    sends.append(Send("quantitative_analysis", {"stock": state.stock, **deadline}))
+    return sends
+
+async def apply_research_memo(state: MemoDeltaInput, config: RunnableConfig) -> Dict:
+    """Adapt memoized research to the stock with a short delta pass"""
+    kind, report = state["kind"], state["report"]
+    if get_setting(config, "research_memo_delta", True):
+        prompt = render_prompt(
+            MEMO_DELTA_PROMPT,
+            config,
+            trim=["report"],
+            kind=kind,
+            scope="industry" if kind == "industry" else "market",
+            report=report,
+            stock=state["stock"],
+        )
+        delta = await model.ainvoke([HumanMessage(content=prompt)], config)
+        report = f"{report}\n\n## Specific to {state['stock']}\n{delta.content}"
+    return {f"final_{kind}_report": [report]}
+
+async def memoize_research(state: OrchestratorState, config: Optional[RunnableConfig] = None):
+    """Store the research this run did for later runs of the same market or industry.
 
-def combine_analyses(state: OrchestratorState, config: Optional[RunnableConfig] = None) -> Dict:
+    Best effort: a failure to store is logged and never fails the run.
+    """
+    if state.plan is None:
+        return
+    for kind, schema, reports, key in (
+        ("economic", EconomicData, state.final_economic_report, state.plan.market),
+        ("industry", IndustryData, state.final_industry_report, state.plan.industry_classification),
+    ):
+        analyses = [analysis for analysis in state.completed_analyses if isinstance(analysis, schema)]
+        if kind in state.memo_reports or not analyses or not reports:
+            continue
+        # Also keyed by the classification the research found
+        classification = ""
+        if kind == "industry":
+            found = Counter(analysis.classification for analysis in analyses if analysis.classification)
+            classification = found.most_common(1)[0][0] if found else ""
+        try:
+            await research_memo.astore(
+                kind, [key, classification], reports[-1], analyses, schema, config, classification=classification
+            )
+        except Exception:
+            logger.exception("Could not memoize the %s research of %s", kind, state.stock)
+
+async def combine_analyses(state: OrchestratorState, config: Optional[RunnableConfig] = None) -> Dict:
     """Combine results from both analyses"""
     # Gather completed final reports
     
-    final_economic_report = state.final_economic_report[-1]
-    final_industry_report = state.final_industry_report[-1]
-    final_quantitative_report = state.final_quantitative_report[-1]
+    # A branch that missed its deadline may have no report
+    def latest(reports: List[str], branch: str) -> str:
+        return reports[-1] if reports else f"No {BRANCH_LABELS[branch]} is available."
+    
+    final_economic_report = latest(state.final_economic_report, "economic_analysis")
+    final_industry_report = latest(state.final_industry_report, "industry_analysis")
+    final_quantitative_report = latest(state.final_quantitative_report, "quantitative_analysis")
     
     # Generate combined analysis
-    prompt = COMBINE_ANALYSES_PROMPT.format(
+    # Each report is shortened to its share of the budget if they do not all fit
+    template = COMBINE_ANALYSES_PROMPT
+    if state.gaps:
+        template += COMBINE_GAPS_NOTE.replace("{gaps}", "\n".join(f"- {gap}" for gap in state.gaps))
+    prompt = render_prompt(
+        template,
+        config,
+        trim=["economic_analysis", "industry_analysis", "quantitative_analysis"],
         economic_analysis=final_economic_report,
         industry_analysis=final_industry_report,
         quantitative_analysis=final_quantitative_report,
         stock=state.stock
     )
     
-    final_analysis = model.invoke([HumanMessage(content=prompt)])
+    final_analysis, _ = await asyncio.gather(
+        model.ainvoke([HumanMessage(content=prompt)], config),
+        memoize_research(state, config),
+    )
+    
+    registry = source_registry(config)
+    if registry is not None:
+        logger.info("Source registry for run %s: %s", get_run_id(config), registry.stats.as_dict())
+    logger.info("Research memo: %s", research_memo.stats.as_dict())
     
     return {
         "final_report": final_analysis.content,
@@ -86,38 +192,106 @@ workflow = StateGraph(OrchestratorState, input=OrchestratorInput, output=Orchest
 
 # Add nodes
 workflow.add_node("orchestrator", create_research_plan)
-workflow.add_node("economic_analysis", economic_graph)
-workflow.add_node("industry_analysis", industry_graph)
-workflow.add_node("quantitative_analysis", quantitative_graph)
+workflow.add_node("economic_analysis", with_deadline("economic_analysis", economic_graph))
+workflow.add_node("industry_analysis", with_deadline("industry_analysis", industry_graph))
+workflow.add_node("quantitative_analysis", with_deadline("quantitative_analysis", quantitative_graph))
+workflow.add_node("memo_delta", apply_research_memo, input_schema=MemoDeltaInput)
 workflow.add_node("combine", combine_analyses)
 
 # Connect nodes
 workflow.set_entry_point("orchestrator")
-workflow.add_conditional_edges("orchestrator", initiate_analyses, ["economic_analysis", "industry_analysis", "quantitative_analysis"])
+workflow.add_conditional_edges("orchestrator", initiate_analyses, ["economic_analysis", "industry_analysis", "quantitative_analysis", "memo_delta"])
 
 # Results feed directly into combine
 workflow.add_edge("economic_analysis", "combine")
 workflow.add_edge("industry_analysis", "combine")
 workflow.add_edge("quantitative_analysis", "combine")
+workflow.add_edge("memo_delta", "combine")
 workflow.add_edge("combine", END)
 
 # Compile graph
 graph = workflow.compile()
 
-# # FastAPI Router
-# router = APIRouter(
-#     prefix="/ai",
-#     tags=["ai"],
-#     responses={404: {"description": "Not found"}},
-# )
-
-# @router.get("/analyze/{stock}")
-# async def analyze_stock(stock: str):
-#     """Perform comprehensive stock analysis."""
-#     try:
-#         result = await graph.ainvoke({
-#             "stock": stock
-#         })
-#         return result
-#     except Exception as e:
-#         raise HTTPException(status_code=500, detail=str(e))
+# FastAPI Router
+router = APIRouter(
+    prefix="/ai",
+    tags=["ai"],
+    responses={404: {"description": "Not found"}},
+)
+
+@router.get("/analyze/{stock}")
+async def analyze_stock(stock: str):
+    """Perform comprehensive stock analysis."""
+    # Each request is its own run: source registry, token ledger and queue priority
+    run_id = uuid.uuid4().hex
+    try:
+        result = await graph.ainvoke(
+            {"stock": stock},
+            {"configurable": {"run_id": run_id}},
+        )
+        return result
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+class BatchRequest(BaseModel):
+    stocks: List[Union[str, Dict[str, str]]] = Field(
+        description='Tickers, or {"stock", "sector", "country"} objects'
+    )
+    max_concurrency: Optional[int] = Field(default=None, ge=1)
+
+@router.post("/analyze/batch")
+async def analyze_stocks(request: BatchRequest):
+    """Analyse a watchlist, researching each market's economy once."""
+    try:
+        items = [to_batch_item(entry) for entry in request.stocks]
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    try:
+        report = await analyze_batch(items, max_concurrency=request.max_concurrency)
+        return report.as_dict()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+class RunRequest(BaseModel):
+    stock: str
+    thread_id: Optional[str] = Field(default=None, description="Id to resume the run with, generated if not given")
+
+@router.post("/runs")
+async def start_run(request: RunRequest):
+    """Perform a stock analysis with checkpoints, resumable if it fails."""
+    try:
+        return await start_analysis(request.stock, thread_id=request.thread_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/runs/{thread_id}")
+async def get_run(thread_id: str):
+    """Status, completed branches and pending nodes of a checkpointed run."""
+    status = await analysis_status(thread_id)
+    if status["status"] == "unknown":
+        raise HTTPException(status_code=404, detail=f"No run {thread_id}")
+    return status
+
+@router.post("/runs/{thread_id}/resume")
+async def resume_run(thread_id: str):
+    """Resume a failed run without recomputing its completed work."""
+    try:
+        return await resume_analysis(thread_id)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/analyze/{stock}/stream")
+async def stream_stock_analysis(stock: str):
+    """Perform comprehensive stock analysis, streaming progress over SSE.
+
+    Sends "node" events as the analysts progress, the final report as "token"
+    events while it is generated, and a closing "done" event with the time
+    to first token and total time of the request.
+    """
+    return StreamingResponse(
+        stream_analysis(graph, {"stock": stock}),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -3,8 +3,26 @@ For the stock {stock}, create two focused research queries, 1 sentence each, for
 1. An economic analysis (Must include "econiomic analysis" in the query)
 2. An industry analysis (Must include "industry analysis" in the query)
 
+Also give the company's GICS industry (e.g. "Semiconductors", "Banks") and the country of its primary listing (e.g. "United States").
+
 Consider both company-specific and broader market factors."""
 
+MARKET_ECONOMIC_QUERY = """Economic analysis for {market}: growth, inflation, interest rates, employment, currency and policy outlook{sector_focus}."""
+
+MEMO_DELTA_PROMPT = """The {kind} research below was done recently for other companies in the same {scope}.
+
+{report}
+
+Stock: {stock}
+
+In at most 200 words, note what is specific to {stock}: how exposed it is to the conditions above, and where its position differs from its peers. Use markdown bullet points and do not repeat the research."""
+
+COMBINE_GAPS_NOTE = """
+
+Some analyses did not finish in time:
+{gaps}
+Say in the Executive Summary which parts of the thesis rest on incomplete analysis, and do not fill the gaps with assumed figures."""
+
 COMBINE_ANALYSES_PROMPT = """As a senior investment analyst, combine these separate analyses into a cohesive investment thesis.
 
 Economic Analysis:
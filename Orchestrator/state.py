@@ -1,6 +1,6 @@
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict, TypedDict, Annotated
-from typing_extensions import TypedDict
+from typing_extensions import NotRequired, TypedDict
 from pydantic import BaseModel, Field
 import operator
 
@@ -12,6 +12,8 @@ class OrchestratorPlan(BaseModel):
     economic_query: str = Field(description="Query for economic analysis", default="")
     industry_query: str = Field(description="Query for industry analysis", default="")
     focus_points: List[str] = Field(description="Key areas to analyze", default=[])
+    industry_classification: str = Field(description="GICS industry of the company, e.g. Semiconductors", default="")
+    market: str = Field(description="Country of the company's primary listing, e.g. United States", default="")
 
 class CombinedAnalysis(BaseModel):
     """Combined analysis from both agents"""
@@ -29,10 +31,26 @@ class OrchestratorState:
     final_economic_report: Annotated[List[str], operator.add] = field(default_factory=list)
     final_industry_report: Annotated[List[str], operator.add] = field(default_factory=list)
     final_quantitative_report: Annotated[List[str], operator.add] = field(default_factory=list)
+    # EconomicData and IndustryData of the analyst branches, for the research memo
+    completed_analyses: Annotated[list, operator.add] = field(default_factory=list)
+    # Reports reused from the research memo, by kind ("economic", "industry")
+    memo_reports: Dict[str, str] = field(default_factory=dict)
+    # When the analyst branches must finish to hold the run deadline (epoch seconds)
+    deadline_at: Optional[float] = field(default=None)
+    # Branches that missed their deadline, flagged in the combined report
+    gaps: Annotated[List[str], operator.add] = field(default_factory=list)
     final_report: str = field(default="")
 
+class MemoDeltaInput(TypedDict):
+    kind: str
+    stock: str
+    report: str
+
 class OrchestratorInput(TypedDict):
     stock: str
+    # Economic research shared by a batch of stocks; skips the economic branch
+    final_economic_report: NotRequired[List[str]]
 
 class OrchestratorOutput(TypedDict):
     final_report: str
+    gaps: List[str]
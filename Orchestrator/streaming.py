@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Any, AsyncIterator, Dict, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+logger = logging.getLogger(__name__)
+
+# Node whose model output is streamed to the client token by token
+REPORT_NODE = "combine"
+# Seconds without events after which a comment is sent to keep proxies from
+# closing the connection while the analysts run
+KEEPALIVE_SECONDS = 15.0
+
+
+def sse(event: str, data: Any) -> str:
+    """Encode one server-sent event."""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+def _text(chunk: Any) -> str:
+    content = getattr(chunk, "content", chunk)
+    if isinstance(content, list):  # Content blocks
+        return "".join(
+            block.get("text", "") if isinstance(block, dict) else str(block) for block in content
+        )
+    return content or ""
+
+
+@dataclass
+class StreamTimings:
+    """Latency of one streamed analysis, reported in the final "done" event."""
+    run_id: str
+    started: float = field(default_factory=time.perf_counter)
+    first_token_seconds: Optional[float] = None
+    total_seconds: Optional[float] = None
+    report_tokens: int = 0
+    nodes_completed: int = 0
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict:
+        result = asdict(self)
+        del result["started"]
+        return result
+
+
+async def _graph_events(graph, inputs: Dict, config: RunnableConfig, timings: StreamTimings) -> AsyncIterator[str]:
+    """Translate the graph's stream into SSE messages.
+
+    Uses ``astream`` with subgraphs rather than ``astream_events``: the latter
+    returns the subgraphs' full state instead of their output schema, so the
+    parallel analysts would both write the orchestrator's "plan".
+    """
+    report_parts = []
+    final_report = None
+    async for namespace, mode, data in graph.astream(
+        inputs, config, stream_mode=["tasks", "messages", "values"], subgraphs=True
+    ):
+        if mode == "messages":
+            chunk, metadata = data
+            if metadata.get("langgraph_node") == REPORT_NODE and not namespace:
+                text = _text(chunk)
+                if text:
+                    if timings.first_token_seconds is None:
+                        timings.first_token_seconds = timings.elapsed()
+                    timings.report_tokens += 1
+                    report_parts.append(text)
+                    yield sse("token", {"text": text})
+
+        elif mode == "tasks":
+            status = "end" if "result" in data else "start"
+            timings.nodes_completed += status == "end"
+            message = {
+                "node": data["name"],
+                "status": status,
+                # Outermost graph node the task belongs to, e.g. "economic_analysis"
+                "branch": namespace[0].split(":")[0] if namespace else None,
+                "elapsed_seconds": round(timings.elapsed(), 3),
+            }
+            if data.get("error"):
+                message["error"] = str(data["error"])
+            yield sse("node", message)
+
+        elif mode == "values" and not namespace and isinstance(data, dict):
+            final_report = data.get("final_report") or final_report
+
+    if final_report and not report_parts:
+        # Served from the LLM cache, nothing was streamed
+        timings.first_token_seconds = timings.elapsed()
+        yield sse("token", {"text": final_report})
+    yield sse("report", {"final_report": final_report or "".join(report_parts)})
+
+
+async def stream_analysis(
+    graph,
+    inputs: Dict,
+    config: Optional[RunnableConfig] = None,
+    keepalive_seconds: float = KEEPALIVE_SECONDS,
+) -> AsyncIterator[str]:
+    """Run a graph and stream its progress as server-sent events.
+
+    Events:
+        start: {"run_id"} when the run begins.
+        node: {"node", "status", "branch", "elapsed_seconds"} as nodes
+            start and finish, including the analyst subgraphs' nodes.
+        token: {"text"} for each chunk of the final report.
+        report: {"final_report"} once the report is complete.
+        done: timings, including time to first report token and total time.
+        error: {"detail"} if the run fails.
+
+    A run_id is generated unless the config has one, so the run gets its own
+    source registry and token ledger entries.
+
+    Args:
+        graph: Compiled LangGraph graph.
+        inputs: Graph input, e.g. {"stock": "AAPL"}.
+        config: Base RunnableConfig.
+        keepalive_seconds: Idle time before a keep-alive comment is sent.
+
+    Yields:
+        SSE-encoded strings.
+    """
+    config = dict(config or {})
+    configurable = dict(config.get("configurable") or {})
+    configurable.setdefault("run_id", uuid.uuid4().hex)
+    config["configurable"] = configurable
+    timings = StreamTimings(run_id=configurable["run_id"])
+
+    # Events are produced by a task so that keep-alives can be sent while
+    # the graph is quiet; cancelling the stream (client gone) cancels the run
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def produce():
+        try:
+            async for message in _graph_events(graph, inputs, config, timings):
+                await queue.put(message)
+        except Exception as e:
+            logger.exception("Streamed run %s failed", timings.run_id)
+            await queue.put(sse("error", {"detail": str(e)}))
+        finally:
+            await queue.put(done)
+
+    yield sse("start", {"run_id": timings.run_id})
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), timeout=keepalive_seconds)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if message is done:
+                break
+            yield message
+    finally:
+        if not producer.done():
+            producer.cancel()
+
+    timings.total_seconds = timings.elapsed()
+    logger.info("Streamed run %s: %s", timings.run_id, timings.as_dict())
+    yield sse("done", timings.as_dict())
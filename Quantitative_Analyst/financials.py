@@ -0,0 +1,315 @@
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# QuickFS statement fields used by the ratio engine
+REQUIRED_METRICS = (
+    "period_end_date", "fiscal_year_key",
+    "revenue", "gross_profit", "operating_income", "ebitda", "net_income",
+    "interest_expense", "eps_diluted", "nopat",
+    "cash_and_equiv", "st_debt", "lt_debt", "total_current_assets",
+    "total_current_liabilities", "total_assets", "total_equity",
+    "cf_cfo", "capex", "fcf", "cff_dividend_paid", "cff_common_stock_repurchased",
+    "market_cap", "enterprise_value", "price_to_earnings", "price_to_book",
+    "enterprise_value_to_sales",
+)
+
+# Derived metrics and the unit they are reported in
+RATIO_UNITS = {
+    "revenue": "M",
+    "net_income": "M",
+    "fcf": "M",
+    "revenue_growth": "%",
+    "net_income_growth": "%",
+    "gross_margin": "%",
+    "operating_margin": "%",
+    "ebitda_margin": "%",
+    "net_margin": "%",
+    "fcf_margin": "%",
+    "roe": "%",
+    "roa": "%",
+    "roic": "%",
+    "cash_conversion": "x",
+    "fcf_conversion": "x",
+    "capex_to_revenue": "%",
+    "shareholder_yield": "%",
+    "current_ratio": "x",
+    "debt_to_equity": "x",
+    "net_debt_to_ebitda": "x",
+    "interest_coverage": "x",
+    "pe": "x",
+    "pb": "x",
+    "ev_to_sales": "x",
+}
+
+CAGR_METRICS = ("revenue", "net_income", "fcf", "eps_diluted", "total_equity")
+CAGR_YEARS = (3, 5, 10)
+
+# Length of one period of each statement, in years
+PERIOD_LENGTHS = {"annual": 1.0, "quarterly": 0.25}
+
+# Growth from a base smaller than this share of the series' median magnitude
+# is not reported (e.g. net income of 9k in a series of hundreds of millions)
+NEAR_ZERO_SHARE = 0.01
+
+
+def _divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise division that yields NaN where the denominator is 0 or missing."""
+    out = np.full(np.broadcast(numerator, denominator).shape, np.nan)
+    mask = np.isfinite(numerator) & np.isfinite(denominator) & (denominator != 0)
+    np.divide(numerator, denominator, out=out, where=mask)
+    return out
+
+
+def _average(values: np.ndarray) -> np.ndarray:
+    """Average of each period with the one before (first period uses itself)."""
+    previous = np.concatenate(([values[0]], values[:-1])) if len(values) else values
+    return np.where(np.isfinite(previous), (values + previous) / 2, values)
+
+
+def _period_years(periods: Sequence[str]) -> np.ndarray:
+    """Position of each period in years, from "FY2024" or "2024-06" labels (NaN otherwise)."""
+    years = []
+    for period in periods:
+        match = re.match(r"(?:FY)?(\d{4})(?:-(\d{2}))?", period)
+        if match is None:
+            years.append(np.nan)
+        elif match.group(2):
+            years.append(int(match.group(1)) + int(match.group(2)) / 12)
+        else:
+            years.append(float(match.group(1)))
+    return np.array(years, dtype=float)
+
+
+def _comparable(base: np.ndarray, value: np.ndarray, series: np.ndarray) -> np.ndarray:
+    """Where a change from base to value is a meaningful rate: the sign does
+    not flip and the base is not near zero for the series."""
+    finite = np.abs(series[np.isfinite(series)])
+    scale = np.median(finite) if finite.size else 0.0
+    return (base * value >= 0) & (np.abs(base) >= NEAR_ZERO_SHARE * scale)
+
+
+def _growth(values: np.ndarray, years: Optional[np.ndarray] = None, period_length: float = 1.0) -> np.ndarray:
+    """Change from the previous period relative to its magnitude.
+
+    NaN where the previous row is not the preceding period (a gap in the
+    history, going by years), the sign changes, or the base is near zero.
+    """
+    if len(values) == 0:
+        return values
+    previous = np.concatenate(([np.nan], values[:-1]))
+    mask = _comparable(previous, values, values)
+    if years is not None:
+        mask &= np.isclose(np.concatenate(([np.nan], np.diff(years))), period_length)
+    return np.where(mask, _divide(values - previous, np.abs(previous)), np.nan)
+
+
+@dataclass
+class FinancialTable:
+    """Columnar statement data: one row per period, one column per metric."""
+    periods: List[str]
+    metrics: List[str]
+    values: np.ndarray  # shape (len(periods), len(metrics)), NaN for missing
+    years: Optional[np.ndarray] = None  # position of each period in years
+    period_length: float = 1.0  # years per period
+
+    @classmethod
+    def from_quickfs(cls, payload: Dict, statement: str = "annual") -> Optional["FinancialTable"]:
+        """Build a table from a (possibly projected) QuickFS all-data payload.
+
+        Periods are labelled by fiscal_year_key, or period_end_date for
+        statements without one (quarterly), and placed in time from the label.
+        """
+        block = payload.get("data", {}).get("financials", {}).get(statement)
+        if not block:
+            return None
+        periods = [str(p) for p in block.get("fiscal_year_key") or block.get("period_end_date") or []]
+        if not periods:
+            return None
+        metrics, columns = [], []
+        for metric, series in block.items():
+            if not isinstance(series, list) or len(series) != len(periods):
+                continue
+            column = np.array(
+                [v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan for v in series],
+                dtype=float,
+            )
+            if np.isfinite(column).any():
+                metrics.append(metric)
+                columns.append(column)
+        if not columns:
+            return None
+        return cls(
+            periods, metrics, np.column_stack(columns),
+            _period_years(periods), PERIOD_LENGTHS.get(statement, 1.0),
+        )
+
+    def column(self, metric: str) -> np.ndarray:
+        if metric in self.metrics:
+            return self.values[:, self.metrics.index(metric)]
+        return np.full(len(self.periods), np.nan)
+
+    def last(self, n: int) -> "FinancialTable":
+        years = self.years[-n:] if self.years is not None else None
+        return FinancialTable(self.periods[-n:], self.metrics, self.values[-n:], years, self.period_length)
+
+    def to_markdown(self, units: Optional[Dict[str, str]] = None) -> str:
+        """Metrics as rows and periods as columns, which keeps prompts narrow."""
+        units = units or {}
+        lines = [
+            "| Metric | " + " | ".join(self.periods) + " |",
+            "|---|" + "---|" * len(self.periods),
+        ]
+        for index, metric in enumerate(self.metrics):
+            unit = units.get(metric, "")
+            cells = [_format_value(v, unit) for v in self.values[:, index]]
+            if all(cell == "n/a" for cell in cells):
+                continue
+            label = f"{metric} ({unit})" if unit else metric
+            lines.append(f"| {label} | " + " | ".join(cells) + " |")
+        return "\n".join(lines)
+
+
+def _format_value(value: float, unit: str) -> str:
+    if not np.isfinite(value):
+        return "n/a"
+    if unit == "%":
+        return f"{value * 100:.1f}"
+    if unit == "M":
+        return f"{value / 1e6:,.1f}"
+    return f"{value:.2f}"
+
+
+def compute_ratios(table: FinancialTable) -> FinancialTable:
+    """Vectorized profitability, return, cash-flow, leverage and valuation ratios."""
+    c = table.column
+    revenue, net_income = c("revenue"), c("net_income")
+    debt = np.nan_to_num(c("st_debt")) + np.nan_to_num(c("lt_debt"))
+    cash = np.nan_to_num(c("cash_and_equiv"))
+    equity = c("total_equity")
+
+    fcf = c("fcf")
+    computed_fcf = c("cf_cfo") - np.abs(c("capex"))
+    fcf = np.where(np.isfinite(fcf), fcf, computed_fcf)
+
+    nopat = c("nopat")
+    invested_capital = equity + debt - cash
+    shareholder_returns = np.abs(np.nan_to_num(c("cff_dividend_paid"))) + np.abs(
+        np.nan_to_num(c("cff_common_stock_repurchased"))
+    )
+
+    ratios = {
+        "revenue": revenue,
+        "net_income": net_income,
+        "fcf": fcf,
+        "revenue_growth": _growth(revenue, table.years, table.period_length),
+        "net_income_growth": _growth(net_income, table.years, table.period_length),
+        "gross_margin": _divide(c("gross_profit"), revenue),
+        "operating_margin": _divide(c("operating_income"), revenue),
+        "ebitda_margin": _divide(c("ebitda"), revenue),
+        "net_margin": _divide(net_income, revenue),
+        "fcf_margin": _divide(fcf, revenue),
+        "roe": _divide(net_income, _average(equity)),
+        "roa": _divide(net_income, _average(c("total_assets"))),
+        "roic": _divide(nopat, _average(invested_capital)),
+        "cash_conversion": _divide(c("cf_cfo"), net_income),
+        "fcf_conversion": _divide(fcf, net_income),
+        "capex_to_revenue": _divide(np.abs(c("capex")), revenue),
+        "shareholder_yield": _divide(shareholder_returns, c("market_cap")),
+        "current_ratio": _divide(c("total_current_assets"), c("total_current_liabilities")),
+        "debt_to_equity": _divide(debt, equity),
+        "net_debt_to_ebitda": _divide(debt - cash, c("ebitda")),
+        "interest_coverage": _divide(c("operating_income"), np.abs(c("interest_expense"))),
+        "pe": c("price_to_earnings"),
+        "pb": c("price_to_book"),
+        "ev_to_sales": c("enterprise_value_to_sales"),
+    }
+    metrics = list(ratios)
+    return FinancialTable(
+        table.periods, metrics, np.column_stack([ratios[m] for m in metrics]),
+        table.years, table.period_length,
+    )
+
+
+def compute_cagrs(table: FinancialTable, metrics: Sequence[str] = CAGR_METRICS, years: Sequence[int] = CAGR_YEARS) -> Dict[str, Dict[int, float]]:
+    """Compound annual growth rates over the last N years of an annual table.
+
+    The start is the period N fiscal years before the latest one, going by
+    the table's years rather than row positions, since histories can have
+    gaps (e.g. FY2007 followed by FY2010). Only defined when that period
+    exists, both endpoints are positive and the start is not near zero;
+    otherwise NaN.
+    """
+    starts = {}
+    for n in years:
+        if table.years is None or not np.isfinite(table.years[-1]):
+            starts[n] = len(table.periods) - n - 1 if len(table.periods) > n else None
+            continue
+        matches = np.flatnonzero(np.isclose(table.years, table.years[-1] - n))
+        starts[n] = int(matches[0]) if matches.size else None
+
+    result = {}
+    for metric in metrics:
+        series = table.column(metric)
+        rates = {}
+        for n in years:
+            if starts[n] is None:
+                rates[n] = np.nan
+                continue
+            start, end = series[starts[n]], series[-1]
+            comparable = start > 0 and end > 0 and _comparable(start, end, series)
+            rates[n] = (end / start) ** (1 / n) - 1 if comparable else np.nan
+        result[metric] = rates
+    return result
+
+
+def format_metrics_for_llm(payload: Dict, periods: int = 10, task_description: str = "") -> Optional[str]:
+    """Compact, precomputed view of a QuickFS payload for the analysis prompt.
+
+    Returns:
+        A markdown summary with company profile, ratio table and CAGRs, or None
+        if the payload has no annual statements.
+    """
+    annual = FinancialTable.from_quickfs(payload, "annual")
+    if annual is None:
+        return None
+    ratios = compute_ratios(annual).last(periods)
+    cagrs = compute_cagrs(annual)
+
+    metadata = payload.get("data", {}).get("metadata", {})
+    profile = ", ".join(
+        f"{key}: {metadata[key]}"
+        for key in ("name", "qfs_symbol", "exchange", "sector", "industry", "currency")
+        if metadata.get(key)
+    )
+
+    sections = [task_description] if task_description else []
+    if profile:
+        sections.append(f"Company: {profile}")
+    sections.append(
+        "Computed annual metrics (amounts in millions of reporting currency, % as percentages):\n"
+        + ratios.to_markdown(RATIO_UNITS)
+    )
+    cagr_lines = ["| Metric | " + " | ".join(f"{n}y CAGR (%)" for n in CAGR_YEARS) + " |",
+                  "|---|" + "---|" * len(CAGR_YEARS)]
+    for metric, rates in cagrs.items():
+        cagr_lines.append(
+            f"| {metric} | " + " | ".join(_format_value(rates[n], "%") for n in CAGR_YEARS) + " |"
+        )
+    sections.append("Growth:\n" + "\n".join(cagr_lines))
+
+    quarterly = FinancialTable.from_quickfs(payload, "quarterly")
+    if quarterly is not None:
+        recent = compute_ratios(quarterly).last(4)
+        keep = ["revenue", "net_income", "gross_margin", "operating_margin", "net_margin", "fcf_margin"]
+        recent = FinancialTable(
+            recent.periods,
+            keep,
+            np.column_stack([recent.column(m) for m in keep]),
+            recent.years,
+            recent.period_length,
+        )
+        sections.append("Recent quarters:\n" + recent.to_markdown(RATIO_UNITS))
+    return "\n\n".join(sections)
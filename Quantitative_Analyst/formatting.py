@@ -0,0 +1,285 @@
+import json
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from langchain_core.runnables import RunnableConfig
+
+from backend.routers.Common.tokens import count_tokens
+
+# Metric importance used when packing QuickFS payloads into a token budget,
+# most important first
+DEFAULT_METRIC_PRIORITY = [
+    "name", "sector", "industry", "currency", "exchange",
+    "revenue", "net_income", "operating_income", "fcf", "cf_cfo", "eps_diluted",
+    "gross_margin", "operating_margin", "net_income_margin", "fcf_margin",
+    "roic", "roe", "roa",
+    "total_assets", "total_equity", "cash_and_equiv", "st_debt", "lt_debt",
+    "debt_to_equity", "current_ratio", "capex", "dividends",
+    "market_cap", "enterprise_value", "price_to_earnings", "price_to_book",
+    "enterprise_value_to_sales", "price_to_fcf",
+    "revenue_growth", "eps_diluted_growth", "fcf_growth",
+]
+
+# Fields that are always kept when packing QuickFS payloads
+DEFAULT_MUST_INCLUDE = ["qfs_symbol"]
+
+# Fields labelling the periods of QuickFS payloads, kept when packing for every
+# period that has a selected value
+DEFAULT_PERIOD_KEYS = ["period_end_date", "fiscal_year_key"]
+
+
+def _walk(
+    data: Union[Dict, List],
+    parent_key: str = "",
+    sep: str = "_",
+    prefixes: Optional[Sequence[str]] = None,
+    key_filter: Optional[Callable[[str], bool]] = None,
+    paths: bool = False,
+) -> Iterator[Tuple]:
+    """Iterative walk behind flatten_json, iter_flatten_json and pack_fields.
+
+    Uses an explicit stack of iterators instead of recursion, so each key is
+    built once and nothing is copied per level. Dicts, and lists held by
+    dicts, are walked; lists nested directly in lists are values, as in the
+    original flatten_json.
+
+    Yields (key, value) for every leaf in document order, or with ``paths``
+    (key, value, dict keys on the path, recency), where recency is the
+    distance from the end of the innermost list (0 outside lists).
+    """
+    prefixes = tuple(prefixes) if prefixes else None
+
+    def wanted(key: str, leaf: bool) -> bool:
+        for prefix in prefixes:
+            if key.startswith(prefix) or (not leaf and prefix.startswith(key + sep)):
+                return True
+        return False
+
+    root_is_list = isinstance(data, list)
+    # Frames are (key prefix, iterator over (name, value), is_list,
+    # dict keys on the path, recency, last list index)
+    stack = [(
+        parent_key, enumerate(data) if root_is_list else iter(data.items()),
+        root_is_list, (), 0, len(data) - 1,
+    )]
+    push, pop = stack.append, stack.pop
+    while stack:
+        prefix, items, is_list, names, recency, last = stack[-1]
+        for name, value in items:
+            new_key = f"{prefix}{sep}{name}" if prefix else str(name)
+            is_dict = isinstance(value, dict)
+            descend = is_dict or (not is_list and isinstance(value, list))
+            if prefixes is not None and not wanted(new_key, not descend):
+                continue
+            if descend:
+                push((
+                    new_key, iter(value.items()) if is_dict else enumerate(value), not is_dict,
+                    names if is_list else names + (name,),
+                    last - name if is_list else recency, len(value) - 1,
+                ))
+                break
+            if key_filter is not None and not key_filter(new_key):
+                continue
+            if paths:
+                if is_list:
+                    yield new_key, value, names, last - name
+                else:
+                    yield new_key, value, names + (name,), recency
+            else:
+                yield new_key, value
+        else:
+            pop()
+
+
+def iter_flatten_json(
+    data: Dict,
+    parent_key: str = "",
+    sep: str = "_",
+    prefixes: Optional[Sequence[str]] = None,
+    key_filter: Optional[Callable[[str], bool]] = None,
+) -> Iterator[Tuple[str, Any]]:
+    """Yield the (key, value) pairs of flatten_json without building intermediate dicts.
+
+    Args:
+        data: The nested dictionary to flatten.
+        parent_key: Prefix for every key.
+        sep: Separator between key parts.
+        prefixes: Only walk into and yield keys that start with one of these
+            flattened-key prefixes (e.g. "data_financials_annual"). Subtrees that
+            cannot match are skipped without being visited.
+        key_filter: Predicate applied to each leaf key; leaves for which it
+            returns False are skipped.
+    """
+    return _walk(data, parent_key, sep, prefixes, key_filter)
+
+
+def flatten_json(data: Dict, parent_key: str = "", sep: str = "_") -> Dict:
+    """Flattens a nested JSON dictionary."""
+    return dict(_walk(data, parent_key, sep))
+
+
+def _matches(key: str, names: Tuple[str, ...], patterns: Sequence[str], sep: str) -> int:
+    """Index of the first pattern naming a key on the path (or a flattened key
+    prefix), or -1."""
+    for index, pattern in enumerate(patterns):
+        if pattern in names or key == pattern or key.startswith(pattern + sep):
+            return index
+    return -1
+
+
+def _period(key: str, names: Tuple[str, ...], sep: str) -> str:
+    """The key of a field with its own name left out, shared by the fields of
+    one period (e.g. "data_financials_annual_3" for both revenue and
+    fiscal_year_key of the fourth annual period)."""
+    if not names:
+        return key
+    at = key.rfind(names[-1])
+    return key[:max(at - len(sep), 0)] + key[at + len(names[-1]):]
+
+
+def pack_fields(
+    data: Union[Dict, List],
+    token_budget: int,
+    priority_keys: Optional[Sequence[str]] = None,
+    must_include: Optional[Sequence[str]] = None,
+    sep: str = "_",
+    config: Optional[RunnableConfig] = None,
+    period_keys: Optional[Sequence[str]] = None,
+) -> Dict:
+    """Select the most valuable flattened fields that fit in a token budget.
+
+    Fields are ranked by, in order:
+
+    1. Must-include fields first. They are always kept, even past the budget.
+    2. Fields named in ``priority_keys`` before all other fields.
+    3. Recency: position from the end of the enclosing list, so the latest
+       period of every prioritized metric is taken before older history.
+    4. Position in ``priority_keys`` (earlier is more important).
+    5. Original document order.
+
+    Fields are then added greedily in that order, skipping any that would
+    exceed the budget. A key matches a name when the name is one of the dict
+    keys on its path, or a prefix of the flattened key. Each field costs the
+    tokens of its ``"key":value,`` text, counted with Common.tokens (config
+    selects the "token_count_mode").
+
+    Fields named in ``period_keys`` (e.g. fiscal_year_key) are not ranked:
+    they are added together with the first selected value of their period,
+    and that value is only taken if both fit in the budget.
+
+    Returns:
+        Flat dict of the selected fields in original document order.
+    """
+    priority_keys = list(priority_keys or [])
+    must_include = list(must_include or [])
+    period_keys = list(period_keys or [])
+    fields = list(_walk(data, sep=sep, paths=True))
+
+    def rank(index: int):
+        key, _, names, recency = fields[index]
+        if must_include and _matches(key, names, must_include, sep) >= 0:
+            return (0, 0, 0, index)
+        priority = _matches(key, names, priority_keys, sep)
+        if priority >= 0:
+            return (1, recency, priority, index)
+        return (2, recency, 0, index)
+
+    def cost(index: int) -> int:
+        key, value, _, _ = fields[index]
+        return count_tokens(
+            f"{json.dumps(key, ensure_ascii=False)}:{json.dumps(value, ensure_ascii=False)},", config
+        )
+
+    # Labels of each period, only worth their tokens next to a value of that period
+    labels: Dict[str, List[int]] = {}
+    if period_keys:
+        for index, (key, _, names, _) in enumerate(fields):
+            if _matches(key, names, period_keys, sep) >= 0:
+                labels.setdefault(_period(key, names, sep), []).append(index)
+    label_indices = {index for indices in labels.values() for index in indices}
+
+    used = count_tokens("{}", config)
+    selected = []
+    for index in sorted(range(len(fields)), key=rank):
+        if index in label_indices:
+            continue
+        key, _, names, _ = fields[index]
+        group = [index] + labels.pop(_period(key, names, sep), [])
+        group_cost = sum(cost(i) for i in group)
+        if rank(index)[0] == 0 or used + group_cost <= token_budget:
+            selected.extend(group)
+            used += group_cost
+        elif len(group) > 1:
+            # Not taken, so the labels wait for another value of the period
+            labels[_period(key, names, sep)] = group[1:]
+
+    return {fields[i][0]: fields[i][1] for i in sorted(selected)}
+
+
+def format_json_for_llm(
+    data: Union[Dict, List],
+    task_description: str,
+    delimiter_start: str = "BEGIN_JSON",
+    delimiter_end: str = "END_JSON",
+    flatten_nested: bool = False,
+    exclude_keys: List[str] = None,
+    token_budget: Optional[int] = None,
+    priority_keys: Optional[Sequence[str]] = None,
+    must_include: Optional[Sequence[str]] = None,
+    config: Optional[RunnableConfig] = None,
+    period_keys: Optional[Sequence[str]] = None,
+) -> str:
+    """Formats a JSON object for an LLM prompt
+
+    Args:
+        data: A Python dictionary or list (or data that can be converted to JSON).
+        task_description: A string describing what the LLM should do with the data.
+        delimiter_start: String to use as the start delimiter.
+        delimiter_end: String to use as the end delimiter.
+        flatten_nested: Whether to flatten nested JSON structures (default: False).
+        exclude_keys: List of keys to remove from the JSON object (default: None).
+        token_budget: Maximum tokens for the whole prompt (default: None, unbounded).
+            When set the data is flattened and packed with pack_fields.
+        priority_keys: Field names in order of importance, used with token_budget.
+        must_include: Field names always kept, used with token_budget.
+        config: Node config, read for "token_count_mode" when counting tokens.
+        period_keys: Field names labelling periods, used with token_budget and
+            kept only for periods with a selected value.
+
+    Returns:
+        A string containing a prompt with the formatted JSON.
+    """
+    if exclude_keys:
+        if isinstance(data, dict):
+            data = {k: v for k, v in data.items() if k not in exclude_keys}
+        elif isinstance(data, list):
+            new_list = []
+            for item in data:
+                if isinstance(item, dict):
+                    new_item = {k: v for k, v in item.items() if k not in exclude_keys}
+                    new_list.append(new_item)
+            data = new_list
+
+    if token_budget is not None:
+        overhead = count_tokens(f"{task_description}\n{delimiter_start}\n\n{delimiter_end}", config)
+        data = pack_fields(
+            data,
+            max(token_budget - overhead, 0),
+            priority_keys=priority_keys,
+            must_include=must_include,
+            config=config,
+            period_keys=period_keys,
+        )
+    elif flatten_nested:
+        if isinstance(data, dict):
+            data = flatten_json(data)
+        elif isinstance(data, list):
+            data = [
+                flatten_json(item) if isinstance(item, dict) else item for item in data
+            ]
+
+    json_string = json.dumps(
+        data, separators=(",", ":"), ensure_ascii=False
+    )  # Compact JSON format, support for non-ASCII
+
+    prompt = f"{task_description}\n{delimiter_start}\n{json_string}\n{delimiter_end}"
+    return prompt
@@ -0,0 +1,240 @@
+import json
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from langchain_core.runnables import RunnableConfig
+
+from backend.routers.Common.configuration import get_setting
+
+try:  # Optional: incremental JSON parsing of the QuickFS response
+    import ijson
+except ImportError:  # pragma: no cover - falls back to parsing the whole body
+    ijson = None
+
+STATEMENTS = ("annual", "quarterly", "ttm")
+# Always kept so the remaining values can be lined up with their periods
+PERIOD_KEYS = ("period_end_date", "fiscal_year_key")
+
+
+class IncompleteBodyError(ValueError):
+    """The response body ended before the JSON document did."""
+
+
+def _first_line(error: Exception) -> str:
+    # yajl errors append a multi-line excerpt of the input
+    return str(error).strip().splitlines()[0]
+
+
+@dataclass
+class Projection:
+    """Which parts of the QuickFS all-data payload to keep.
+
+    Attributes:
+        statements: Statement blocks under data.financials to keep.
+        metrics: Metric names to keep, or None for every metric.
+        annual_periods: Number of most recent annual periods to keep.
+        quarterly_periods: Number of most recent quarterly periods to keep.
+        include_metadata: Whether to keep data.metadata (company profile).
+    """
+    statements: Tuple[str, ...] = ("annual", "quarterly")
+    metrics: Optional[Tuple[str, ...]] = None
+    annual_periods: int = 10
+    quarterly_periods: int = 8
+    include_metadata: bool = True
+
+    @classmethod
+    def from_config(cls, config: Optional[RunnableConfig]) -> Optional["Projection"]:
+        """Build the projection from config/env, or None when
+        ``quickfs_ingestion`` is "full"."""
+        if get_setting(config, "quickfs_ingestion", "projected") == "full":
+            return None
+
+        def _names(value):
+            if not value:
+                return None
+            if isinstance(value, str):
+                value = value.split(",")
+            return tuple(item.strip() for item in value if item.strip())
+
+        return cls(
+            statements=_names(get_setting(config, "quickfs_statements", "annual,quarterly")) or (),
+            metrics=_names(get_setting(config, "quickfs_metrics", "")),
+            annual_periods=get_setting(config, "quickfs_annual_periods", 10),
+            quarterly_periods=get_setting(config, "quickfs_quarterly_periods", 8),
+            include_metadata=get_setting(config, "quickfs_include_metadata", True),
+        )
+
+    def keeps(self, statement: str, metric: str) -> bool:
+        if statement not in self.statements:
+            return False
+        return self.metrics is None or metric in self.metrics or metric in PERIOD_KEYS
+
+    def periods(self, statement: str) -> Optional[int]:
+        return {"annual": self.annual_periods, "quarterly": self.quarterly_periods}.get(statement)
+
+
+@dataclass
+class IngestionStats:
+    """Size of a QuickFS payload before and after projection"""
+    bytes_parsed: int = 0
+    fields_parsed: int = 0
+    fields_kept: int = 0
+    prompt_chars: int = 0
+    prompt_tokens: int = 0
+    streamed: bool = False
+
+    def reset(self) -> None:
+        self.bytes_parsed = self.fields_parsed = self.fields_kept = 0
+        self.prompt_chars = self.prompt_tokens = 0
+        self.streamed = False
+
+    def as_dict(self) -> Dict:
+        return dict(self.__dict__)
+
+
+def count_fields(data) -> int:
+    """Number of scalar values in a nested JSON structure."""
+    count, stack = 0, [data]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, list):
+            stack.extend(item)
+        else:
+            count += 1
+    return count
+
+
+def project_payload(payload: Dict, projection: Projection) -> Dict:
+    """Apply a projection to an already decoded all-data payload."""
+    if "errors" in payload:
+        return payload
+    data = payload.get("data", {})
+    projected = {key: value for key, value in data.items() if key not in ("financials", "metadata")}
+    if projection.include_metadata and "metadata" in data:
+        projected["metadata"] = data["metadata"]
+    financials = {}
+    for statement, metrics in data.get("financials", {}).items():
+        limit = projection.periods(statement)
+        kept = {}
+        for metric, values in metrics.items():
+            if not projection.keeps(statement, metric):
+                continue
+            if isinstance(values, list) and limit is not None:
+                values = values[-limit:] if limit > 0 else []
+            kept[metric] = values
+        if kept:
+            financials[statement] = kept
+    projected["financials"] = financials
+    return {"data": projected}
+
+
+class StreamingProjector:
+    """Incrementally parses an all-data response, keeping only the projection.
+
+    Feed raw response chunks to ``feed`` and call ``close`` for the result.
+    Only the last N values of each kept metric are ever held in memory.
+    """
+
+    def __init__(self, projection: Projection, stats: Optional[IngestionStats] = None):
+        if ijson is None:
+            raise RuntimeError("ijson is required for streaming ingestion")
+        self.projection = projection
+        self.stats = stats or IngestionStats()
+        self.stats.streamed = True
+        self._events = ijson.sendable_list()
+        self._parser = ijson.parse_coro(self._events, use_float=True)
+        self._top: Dict = {}
+        self._metadata: Dict = {}
+        self._financials: Dict[str, Dict] = {}
+        self._errors: List = []
+
+    def feed(self, chunk: bytes) -> None:
+        self.stats.bytes_parsed += len(chunk)
+        try:
+            self._parser.send(chunk)
+        except ijson.JSONError as e:  # Not a ValueError, so callers could miss it
+            raise ValueError(f"Invalid JSON in QuickFS response: {_first_line(e)}") from e
+        for prefix, event, value in self._events:
+            self._event(prefix, event, value)
+        del self._events[:]
+
+    def _event(self, prefix: str, event: str, value) -> None:
+        parts = prefix.split(".")
+        is_metric = parts[:2] == ["data", "financials"] and len(parts) >= 4
+
+        if event == "start_array":
+            statement_metric = parts[2:4] if is_metric and len(parts) == 4 else None
+            if statement_metric and self.projection.keeps(*statement_metric):
+                statement, metric = statement_metric
+                limit = self.projection.periods(statement)
+                self._financials.setdefault(statement, {})[metric] = deque(maxlen=limit)
+            return
+        if event in ("start_map", "end_map", "end_array", "map_key"):
+            return
+
+        self.stats.fields_parsed += 1
+        if parts[0] == "errors":
+            self._errors.append(value)
+        elif is_metric:
+            statement, metric = parts[2], parts[3]
+            if len(parts) == 5:
+                values = self._financials.get(statement, {}).get(metric)
+                if isinstance(values, deque):
+                    values.append(value)
+            elif len(parts) == 4 and self.projection.keeps(statement, metric):
+                self._financials.setdefault(statement, {})[metric] = value
+        elif parts[:2] == ["data", "metadata"] and len(parts) == 3:
+            if self.projection.include_metadata:
+                self._metadata[parts[2]] = value
+        elif len(parts) == 2 and parts[0] == "data":
+            self._top[parts[1]] = value
+
+    def close(self) -> Dict:
+        try:
+            self._parser.close()
+        except ijson.JSONError as e:
+            # Invalid text fails in feed, so what is left here is a cut-off document
+            if self.stats.bytes_parsed:
+                raise IncompleteBodyError(f"QuickFS response ended early: {_first_line(e)}") from e
+            raise ValueError(f"Empty QuickFS response: {_first_line(e)}") from e
+        for prefix, event, value in self._events:
+            self._event(prefix, event, value)
+        if self._errors:
+            return {"errors": self._errors}
+        data = dict(self._top)
+        if self.projection.include_metadata:
+            data["metadata"] = self._metadata
+        data["financials"] = {
+            statement: {
+                metric: list(values) if isinstance(values, deque) else values
+                for metric, values in metrics.items()
+            }
+            for statement, metrics in self._financials.items()
+        }
+        result = {"data": data}
+        self.stats.fields_kept = count_fields(data)
+        return result
+
+
+def decode_body(body: bytes) -> Dict:
+    """json.loads, raising IncompleteBodyError when the document is cut off."""
+    try:
+        return json.loads(body)
+    except json.JSONDecodeError as e:
+        if body.strip() and e.pos >= len(e.doc.rstrip()):
+            raise IncompleteBodyError(f"QuickFS response ended early: {e}") from e
+        raise
+
+
+def parse_body(body: bytes, projection: Optional[Projection], stats: IngestionStats) -> Dict:
+    """Decode a fully downloaded response and apply the projection, if any."""
+    payload = decode_body(body)
+    stats.bytes_parsed += len(body)
+    stats.fields_parsed = count_fields(payload)
+    if projection is not None:
+        payload = project_payload(payload, projection)
+    stats.fields_kept = count_fields(payload.get("data", payload))
+    return payload
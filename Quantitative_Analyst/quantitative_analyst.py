@@ -1,7 +1,7 @@
 from dotenv import load_dotenv
 import os
-import requests
 import json
+import logging
 import asyncio
 from tavily import AsyncTavilyClient
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -13,16 +13,30 @@ from langgraph.graph import StateGraph, END
 from langsmith import Client, traceable
 from typing import List, Optional, Literal, Annotated, Dict, Union
 
+from backend.routers.Common.configuration import get_setting
+from backend.routers.Common.llm import ChatClient
+from backend.routers.Common.tokens import count_tokens, render_prompt, token_budget
 from backend.routers.Quantitative_Analyst.state import (
     QuantAnalystState, QuantAnalystInput, QuantAnalystOutput,
     # FinancialMetrics,
     Reflection,
     ResearchPlan
 )
+from backend.routers.Quantitative_Analyst.financials import (
+    CAGR_YEARS, REQUIRED_METRICS, format_metrics_for_llm
+)
+from backend.routers.Quantitative_Analyst.formatting import (
+    DEFAULT_METRIC_PRIORITY, DEFAULT_MUST_INCLUDE, DEFAULT_PERIOD_KEYS, format_json_for_llm
+)
+from backend.routers.Quantitative_Analyst.ingestion import IngestionStats, Projection
+from backend.routers.Quantitative_Analyst.quickfs import quickfs_client
+from backend.routers.Quantitative_Analyst.symbols import symbol_index
 from backend.routers.Quantitative_Analyst.prompts import (
     SYMBOL_REFLECTION_PROMPT, FINANCIAL_ANALYSIS_PROMPT
 )
 
+logger = logging.getLogger(__name__)
+
 load_dotenv()
 api_key = os.getenv("GOOGLE_GENERATIVE_AI_API_KEY")
 langsmith_api_key = os.getenv("LANGCHAIN_API_KEY")
@@ -33,134 +47,75 @@ if not api_key:
 if not langsmith_api_key:
     raise ValueError("LANGCHAIN_API_KEY environment variable is not set")
 
-model = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash",
-    google_api_key=api_key,
-    temperature=0.3,
+model = ChatClient(
+    ChatGoogleGenerativeAI(
+        model="gemini-1.5-flash",
+        google_api_key=api_key,
+        temperature=0.3,
+    )
 )
 
-quant = ChatGoogleGenerativeAI(
-    model="gemini-2.0-flash-exp",
-    google_api_key=api_key,
-    temperature=0.5,
+quant = ChatClient(
+    ChatGoogleGenerativeAI(
+        model="gemini-2.0-flash-exp",
+        google_api_key=api_key,
+        temperature=0.5,
+    )
 )
 
-def flatten_json(data: Dict, parent_key: str = "", sep: str = "_") -> Dict:
-    """Flattens a nested JSON dictionary."""
-    items = []
-    for key, value in data.items():
-        new_key = parent_key + sep + key if parent_key else key
-        if isinstance(value, dict):
-            items.extend(flatten_json(value, new_key, sep=sep).items())
-        elif isinstance(value, list):
-            for i, list_item in enumerate(value):
-                if isinstance(list_item, dict):
-                    items.extend(
-                        flatten_json(list_item, f"{new_key}{sep}{i}", sep=sep).items()
-                    )
-                else:
-                    items.append((f"{new_key}{sep}{i}", list_item))
-        else:
-            items.append((new_key, value))
-    return dict(items)
-
-def format_json_for_llm(
-    data: Union[Dict, List],
-    task_description: str,
-    delimiter_start: str = "BEGIN_JSON",
-    delimiter_end: str = "END_JSON",
-    flatten_nested: bool = False,
-    exclude_keys: List[str] = None,
-) -> str:
-    """Formats a JSON object for an LLM prompt
-
-    Args:
-        data: A Python dictionary or list (or data that can be converted to JSON).
-        task_description: A string describing what the LLM should do with the data.
-        delimiter_start: String to use as the start delimiter.
-        delimiter_end: String to use as the end delimiter.
-        flatten_nested: Whether to flatten nested JSON structures (default: False).
-        exclude_keys: List of keys to remove from the JSON object (default: None).
-
-    Returns:
-        A string containing a prompt with the formatted JSON.
-    """
-    if exclude_keys:
-        if isinstance(data, dict):
-            data = {k: v for k, v in data.items() if k not in exclude_keys}
-        elif isinstance(data, list):
-            new_list = []
-            for item in data:
-                if isinstance(item, dict):
-                    new_item = {k: v for k, v in item.items() if k not in exclude_keys}
-                    new_list.append(new_item)
-            data = new_list
-
-    if flatten_nested:
-        if isinstance(data, dict):
-            data = flatten_json(data)
-        elif isinstance(data, list):
-            data = [
-                flatten_json(item) if isinstance(item, dict) else item for item in data
-            ]
-
-    json_string = json.dumps(
-        data, separators=(",", ":"), ensure_ascii=False
-    )  # Compact JSON format, support for non-ASCII
-
-    prompt = f"{task_description}\n{delimiter_start}\n{json_string}\n{delimiter_end}"
-    return prompt
-# Use format_json_for_llm function(data, flatten_nested=False)
-
 @traceable
-def get_financial_data(symbol: str):
+async def get_financial_data(symbol: str, projection: Optional[Projection] = None, stats: Optional[IngestionStats] = None):
     """
     Fetches data from the QuickFS API for a given symbol.
 
     Args:
         symbol (str): The stock symbol (e.g., "AAPL:US" or "CBA:AU").
+        projection (Projection): Statements, metrics and periods to keep (default: everything).
+        stats (IngestionStats): Filled in with bytes parsed and fields kept.
 
     Returns:
         dict or None: The JSON response data as a Python dictionary, or None if the request fails.
     """
-
-    url = f"https://public-api.quickfs.net/v1/data/all-data/{symbol}"
-    api_key = os.getenv("QUICKFS_API_KEY")
-
-    if not api_key:
+    if not os.getenv("QUICKFS_API_KEY"):
         print("Error: QUICKFS_API_KEY not found in environment variables.")
         return None
 
-    headers = {
-        "X-QFS-API-Key": api_key
-    }
+    return await quickfs_client.get_all_data(symbol, projection=projection, stats=stats)
 
-    try:
-        response = requests.get(url, headers=headers)
-        # if response contains an error in the JSON then return None
-        if "errors" in response.json():
-            return None
-        response.raise_for_status()  # Raise an exception for bad status codes (4xx or 5xx)
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error during API request: {e}")
-        return None
-      
-def planner(state: QuantAnalystState, config: RunnableConfig):
+async def planner(state: QuantAnalystState, config: RunnableConfig):
     """Create a stock name query"""
+    # Resolve from the local symbol index first, only ask the model on a miss
+    match = symbol_index.resolve(state.stock)
+    if match:
+        return {
+            "stock": match.symbol,
+            "stock_query": state.stock
+        }
+    
     planner = model.with_structured_output(ResearchPlan)
-    plan = planner.invoke([
+    plan = await planner.ainvoke([
         HumanMessage(content=f"Generate a stock symbol to research from {state.stock}")
-    ])
+    ], config)
     
     return {
-        "stock": plan.stock
+        "stock": plan.stock,
+        "stock_query": state.stock
   }
 
-def retriever(state: QuantAnalystState, config: RunnableConfig):
+async def retriever(state: QuantAnalystState, config: RunnableConfig):
     """Fetch and analyze financial data"""
-    # Try to get data
-    data = get_financial_data(state.stock)
+    # "metrics" sends precomputed ratios to the model, "raw" the flattened payload
+    data_mode = get_setting(config, "quant_data_mode", "metrics")
+    
+    # Try to get data, keeping only the configured projection of the payload
+    projection = Projection.from_config(config)
+    if projection and data_mode == "metrics":
+        if projection.metrics is None:
+            projection.metrics = REQUIRED_METRICS
+        # One extra year so the longest CAGR has a starting point
+        projection.annual_periods = max(projection.annual_periods, max(CAGR_YEARS) + 1)
+    stats = IngestionStats()
+    data = await get_financial_data(state.stock, projection, stats)
     
     if not data:
         return {
@@ -168,15 +123,42 @@ def retriever(state: QuantAnalystState, config: RunnableConfig):
             "symbol_attempts": [state.stock]
         }
     
-    formatted_data = format_json_for_llm(
-        data,
-        task_description="Analyse these financial metrics",
-        flatten_nested=True
-    )
+    # Remember symbols the index could not resolve on its own
+    if state.stock_query and not symbol_index.resolve(state.stock_query):
+        metadata = data.get("data", {}).get("metadata", {})
+        await symbol_index.alearn(
+            state.stock_query,
+            metadata.get("qfs_symbol") or state.stock,
+            name=metadata.get("name", "")
+        )
+    
+    formatted_data = None
+    if data_mode == "metrics":
+        formatted_data = format_metrics_for_llm(
+            data,
+            periods=get_setting(config, "quickfs_annual_periods", 10),
+            task_description="Analyse these financial metrics"
+        )
+    if formatted_data is None:
+        formatted_data = format_json_for_llm(
+            data,
+            task_description="Analyse these financial metrics",
+            flatten_nested=True,
+            token_budget=get_setting(config, "quant_prompt_token_budget", token_budget(config)),
+            priority_keys=DEFAULT_METRIC_PRIORITY,
+            must_include=DEFAULT_MUST_INCLUDE,
+            period_keys=DEFAULT_PERIOD_KEYS,
+            config=config
+        )
+    
+    stats.prompt_chars = len(formatted_data)
+    stats.prompt_tokens = count_tokens(formatted_data, config)
+    logger.info("QuickFS ingestion for %s: %s", state.stock, stats.as_dict())
     
     return {
         "financial_data": formatted_data,
         # "metrics": metrics,
+        "ingestion_stats": stats.as_dict(),
         "research_loop_count": state.research_loop_count + 1
     }
 
@@ -186,17 +168,20 @@ def should_continue_research(state: QuantAnalystState) -> Literal["reflect", "qu
         return "reflect"
     return "quantitative_analysis"
 
-def reflect_on_symbol(state: QuantAnalystState):
+async def reflect_on_symbol(state: QuantAnalystState, config: RunnableConfig):
     """Reflect on failed data fetch and suggest new symbol format"""
     reflection_agent = model.with_structured_output(Reflection)
-    reflection = reflection_agent.invoke([
-        HumanMessage(content=SYMBOL_REFLECTION_PROMPT.format(
+    reflection = await reflection_agent.ainvoke([
+        HumanMessage(content=render_prompt(
+            SYMBOL_REFLECTION_PROMPT,
+            config,
+            trim=["previous_attempts"],
             stock=state.stock,
             symbol=state.symbol_attempts[-1],
             attempt_count=state.research_loop_count,
             previous_attempts=", ".join(state.symbol_attempts)
         ))
-    ])
+    ], config)
     
     if reflection.sufficient:
         return {"research_loop_count": 3}  # End research
@@ -206,14 +191,17 @@ def reflect_on_symbol(state: QuantAnalystState):
         "research_loop_count": state.research_loop_count
     }
 
-def quantitative_analysis(state: QuantAnalystState) -> QuantAnalystOutput:
+async def quantitative_analysis(state: QuantAnalystState, config: RunnableConfig) -> QuantAnalystOutput:
     """Prepare final output"""
-    analysis = quant.invoke([
-        HumanMessage(content=FINANCIAL_ANALYSIS_PROMPT.format(
+    analysis = await quant.ainvoke([
+        HumanMessage(content=render_prompt(
+            FINANCIAL_ANALYSIS_PROMPT,
+            config,
+            trim=["formatted_data"],
             stock=state.stock,
             formatted_data=state.financial_data
         ))
-    ])
+    ], config)
     return {
         "final_quantitative_report": [analysis.content],
         # "financial_data": state.financial_data
@@ -235,7 +223,7 @@ workflow.add_conditional_edges(
     "retriever",
     should_continue_research,
     {
-        "retry": "retry",
+        "reflect": "retry",
         "quantitative_analysis": "quantitative_analysis"
     }
 )
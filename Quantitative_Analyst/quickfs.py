@@ -0,0 +1,180 @@
+import os
+import random
+import asyncio
+from typing import Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from backend.routers.Common.governor import governor
+from backend.routers.Quantitative_Analyst.ingestion import (
+    IncompleteBodyError,
+    IngestionStats,
+    Projection,
+    StreamingProjector,
+    decode_body,
+    ijson,
+    parse_body,
+)
+
+QUICKFS_BASE_URL = "https://public-api.quickfs.net/v1"
+
+# Status codes worth retrying: rate limiting and transient server errors
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+class QuickFSClient:
+    """Async QuickFS API client with a pooled keep-alive connection.
+
+    - Connect/read timeouts per request plus an overall deadline per attempt,
+      so a hung request can never stall a run indefinitely.
+    - Requests go through the "quickfs" limit of the process-wide governor
+      (at most QUICKFS_MAX_CONCURRENCY in flight unless GOVERNOR_QUICKFS_*
+      says otherwise), which also pauses all callers after a 429.
+    - Retries 429/5xx responses, transport errors and bodies cut off
+      mid-document with exponential backoff and jitter, honouring
+      ``Retry-After`` when QuickFS sends it. Other undecodable bodies (e.g.
+      an HTML error page) are logged and give None.
+
+    Defaults come from QUICKFS_TIMEOUT_SECONDS, QUICKFS_CONNECT_TIMEOUT_SECONDS,
+    QUICKFS_MAX_CONCURRENCY and QUICKFS_MAX_RETRIES.
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        base_url: str = QUICKFS_BASE_URL,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: float = 0.5,
+        backoff_max: float = 10.0,
+    ):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout or float(os.getenv("QUICKFS_TIMEOUT_SECONDS", "30"))
+        self.connect_timeout = connect_timeout or float(os.getenv("QUICKFS_CONNECT_TIMEOUT_SECONDS", "5"))
+        self.max_concurrency = max_concurrency or int(os.getenv("QUICKFS_MAX_CONCURRENCY", "4"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("QUICKFS_MAX_RETRIES", "3"))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _ensure_client(self) -> httpx.AsyncClient:
+        # httpx connections belong to one event loop
+        loop = asyncio.get_running_loop()
+        if self._client is not None and self._loop is not loop:
+            stale, self._client = self._client, None
+            try:
+                await stale.aclose()
+            except Exception as e:  # Its connections may belong to a closed loop
+                print(f"Error closing the previous QuickFS client: {e!r}")
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"X-QFS-API-Key": self.api_key or os.getenv("QUICKFS_API_KEY", "")},
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                ),
+            )
+            self._loop = loop
+        return self._client
+
+    def _backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return min(float(retry_after), self.backoff_max)
+        delay = min(self.backoff_base * (2 ** attempt), self.backoff_max)
+        return delay * (0.5 + random.random() / 2)
+
+    async def _request(self, path: str, read: Callable[[httpx.Response], Awaitable[Dict]]) -> Optional[Dict]:
+        """GET a QuickFS endpoint with retries, decoding the body with ``read``.
+
+        Returns:
+            dict or None: The decoded payload, or None if the request failed after
+            all retries or QuickFS reported errors.
+        """
+        client = await self._ensure_client()
+
+        async def attempt():
+            async with client.stream("GET", path) as response:
+                if response.status_code in RETRYABLE_STATUS_CODES:
+                    return response, None
+                return response, await read(response)
+
+        for attempt_number in range(self.max_retries + 1):
+            response = None
+            delay = None
+            try:
+                async with governor.slot("quickfs"):
+                    response, payload = await asyncio.wait_for(attempt(), timeout=self.timeout)
+                if payload is not None:
+                    if "errors" in payload:
+                        print(f"QuickFS returned errors for {path}: {payload['errors']}")
+                        return None
+                    response.raise_for_status()
+                    return payload
+                print(f"QuickFS request {path} returned {response.status_code} (attempt {attempt_number + 1})")
+                if response.status_code == 429:
+                    delay = self._backoff(attempt_number, response)
+                    governor.report_rate_limited("quickfs", retry_after=delay)
+                    if governor.limit("quickfs") is not None:
+                        # The governor's pause already holds back the next attempt
+                        delay = 0.0
+            except (httpx.TransportError, asyncio.TimeoutError, IncompleteBodyError) as e:
+                print(f"QuickFS request {path} failed (attempt {attempt_number + 1}): {e!r}")
+            except (httpx.HTTPStatusError, ValueError) as e:
+                print(f"Error during API request: {e}")
+                return None
+
+            if attempt_number < self.max_retries:
+                await asyncio.sleep(self._backoff(attempt_number, response) if delay is None else delay)
+        return None
+
+    async def get_json(self, path: str) -> Optional[Dict]:
+        """GET a QuickFS endpoint and return the decoded JSON body."""
+
+        async def read(response: httpx.Response) -> Dict:
+            return decode_body(await response.aread())
+
+        return await self._request(path, read)
+
+    async def get_all_data(
+        self,
+        symbol: str,
+        projection: Optional[Projection] = None,
+        stats: Optional[IngestionStats] = None,
+    ) -> Optional[Dict]:
+        """Full QuickFS dataset for a symbol such as "AAPL:US" or "CBA:AU".
+
+        Args:
+            symbol: QuickFS symbol.
+            projection: Keep only these statements/metrics/periods. The body is
+                parsed incrementally when ijson is installed, so the full payload
+                is never materialized.
+            stats: Filled in with bytes parsed and fields kept.
+        """
+        stats = stats if stats is not None else IngestionStats()
+
+        async def read(response: httpx.Response) -> Dict:
+            stats.reset()  # Counters restart on retries
+            if projection is None or ijson is None:
+                return parse_body(await response.aread(), projection, stats)
+            projector = StreamingProjector(projection, stats)
+            async for chunk in response.aiter_bytes():
+                projector.feed(chunk)
+            return projector.close()
+
+        return await self._request(f"/data/all-data/{symbol}", read)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+quickfs_client = QuickFSClient()
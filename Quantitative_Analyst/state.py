@@ -20,8 +20,10 @@ class ResearchPlan(BaseModel):
 @dataclass(kw_only=True)
 class QuantAnalystState:
     stock: str = field(default=None)
+    stock_query: str = field(default=None)
     symbol_attempts: List[str] = field(default_factory=list)
     financial_data: str = field(default=None)
+    ingestion_stats: Optional[Dict[str, Any]] = field(default=None)
     research_loop_count: int = field(default=0)
     final_quantitative_report: Annotated[List[str], operator.add] = field(default_factory=list)
 
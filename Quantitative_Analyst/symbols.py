@@ -0,0 +1,170 @@
+import os
+import re
+import csv
+import asyncio
+import difflib
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+# Bundled index shipped with the package, plus a user file that also receives
+# symbols learned from the LLM fallback path (QUICKFS_SYMBOLS_PATH)
+BUNDLED_SYMBOLS_PATH = os.path.join(os.path.dirname(__file__), "symbols.csv")
+USER_SYMBOLS_PATH = os.getenv(
+    "QUICKFS_SYMBOLS_PATH", os.path.join(".cache", "quickfs_symbols.csv")
+)
+
+FIELDNAMES = ["qfs_symbol", "ticker", "country", "name", "aliases"]
+
+# Exchange suffixes (Yahoo/Reuters style) mapped to QuickFS country codes
+EXCHANGE_SUFFIXES = {
+    "US": "US",
+    "AX": "AU",
+    "ASX": "AU",
+    "AU": "AU",
+    "NZ": "NZ",
+    "L": "LN",
+    "LN": "LN",
+    "LON": "LN",
+    "TO": "CA",
+    "V": "CA",
+    "CN": "CA",
+    "CA": "CA",
+    "MX": "MM",
+    "MM": "MM",
+}
+
+# Country codes QuickFS uses in its symbols
+QUICKFS_COUNTRIES = set(EXCHANGE_SUFFIXES.values())
+
+# Corporate suffixes ignored when matching company names
+_NAME_STOPWORDS = {
+    "the", "inc", "incorporated", "corp", "corporation", "co", "company",
+    "ltd", "limited", "plc", "group", "holdings", "sa", "ag", "nv",
+}
+
+_QFS_SYMBOL = re.compile(r"^([A-Z0-9.\-]+):([A-Z]{2})$")
+_SUFFIXED_TICKER = re.compile(r"^([A-Z0-9\-]+)[.:]([A-Z]{1,3})$")
+_BARE_TICKER = re.compile(r"^[A-Z0-9\-]{1,6}$")
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase a company name and drop punctuation and corporate suffixes."""
+    words = re.sub(r"[^\w&]+", " ", name.lower()).split()
+    return " ".join(word for word in words if word not in _NAME_STOPWORDS)
+
+
+@dataclass(frozen=True)
+class SymbolMatch:
+    """Result of a symbol lookup"""
+    symbol: str
+    method: str  # "symbol", "ticker", "suffix", "name" or "fuzzy"
+
+
+class SymbolIndex:
+    """In-memory ticker/name -> QuickFS symbol index loaded from CSV files.
+
+    Exact lookups (QuickFS symbol, ticker, exchange-suffixed ticker, company
+    name or alias) are dictionary hits. Names that don't match exactly fall
+    back to fuzzy matching with difflib.
+    """
+
+    def __init__(self, paths: List[str], learn_path: Optional[str] = None, fuzzy_cutoff: float = 0.85):
+        self.learn_path = learn_path
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._symbols: set = set()
+        self._by_ticker: Dict[str, Dict[str, str]] = {}
+        self._by_name: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        for path in paths:
+            if path and os.path.exists(path):
+                self.load(path)
+
+    def load(self, path: str) -> None:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                self._add(row)
+
+    def _add(self, row: Dict[str, str]) -> None:
+        symbol = row["qfs_symbol"].strip().upper()
+        ticker, _, country = symbol.partition(":")
+        self._symbols.add(symbol)
+        # The first country seen for a ticker wins bare-ticker lookups
+        self._by_ticker.setdefault(ticker, {}).setdefault(country, symbol)
+        names = [row.get("name") or ""] + (row.get("aliases") or "").split("|")
+        for name in names:
+            key = normalize_name(name)
+            if key:
+                self._by_name.setdefault(key, symbol)
+
+    def resolve(self, query: str) -> Optional[SymbolMatch]:
+        """Resolve a user string such as "AAPL", "Apple" or "CBA.AX" to a QuickFS symbol.
+
+        Returns:
+            SymbolMatch, or None if the index has no confident answer.
+        """
+        if not query or not query.strip():
+            return None
+        text = query.strip()
+        upper = text.upper()
+
+        # "CBA:AX" is an exchange suffix, not a QuickFS country
+        match = _QFS_SYMBOL.match(upper)
+        if match and match.group(2) in QUICKFS_COUNTRIES:
+            return SymbolMatch(upper, "symbol")
+
+        match = _SUFFIXED_TICKER.match(upper)
+        if match and match.group(2) in EXCHANGE_SUFFIXES:
+            ticker, country = match.group(1), EXCHANGE_SUFFIXES[match.group(2)]
+            # Suffixes are unambiguous, so unknown tickers are translated too
+            return SymbolMatch(f"{ticker}:{country}", "suffix")
+
+        if _BARE_TICKER.match(upper) and upper in self._by_ticker:
+            return SymbolMatch(next(iter(self._by_ticker[upper].values())), "ticker")
+
+        key = normalize_name(text)
+        if key in self._by_name:
+            return SymbolMatch(self._by_name[key], "name")
+
+        close = difflib.get_close_matches(key, self._by_name.keys(), n=1, cutoff=self.fuzzy_cutoff)
+        if close:
+            return SymbolMatch(self._by_name[close[0]], "fuzzy")
+        return None
+
+    def learn(self, query: str, symbol: str, name: str = "") -> None:
+        """Record a resolution found by the LLM fallback, in memory and in learn_path."""
+        symbol = symbol.strip().upper()
+        match = _QFS_SYMBOL.match(symbol)
+        if not match or match.group(2) not in QUICKFS_COUNTRIES:
+            return
+        ticker, _, country = symbol.partition(":")
+        aliases = query.strip() if normalize_name(query) and query.strip().upper() != ticker else ""
+        row = {
+            "qfs_symbol": symbol,
+            "ticker": ticker,
+            "country": country,
+            "name": name,
+            "aliases": aliases,
+        }
+        with self._lock:
+            self._add(row)
+            if not self.learn_path:
+                return
+            directory = os.path.dirname(self.learn_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            is_new = not os.path.exists(self.learn_path)
+            with open(self.learn_path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+                if is_new:
+                    writer.writeheader()
+                writer.writerow(row)
+
+    async def alearn(self, query: str, symbol: str, name: str = "") -> None:
+        """learn, with the file write off the event loop."""
+        await asyncio.to_thread(self.learn, query, symbol, name)
+
+
+symbol_index = SymbolIndex(
+    [BUNDLED_SYMBOLS_PATH, USER_SYMBOLS_PATH], learn_path=USER_SYMBOLS_PATH
+)
@@ -0,0 +1,65 @@
+"""Wall time of a full Research_Analyst run against latency-injected fakes.
+
+Compares the old behaviour (model calls block the event loop) with the async
+path, so the parallel ``Send`` branches either serialize or overlap. Run from
+the directory containing ``backend``::
+
+    python -m backend.routers.benchmarks.bench_async_fanout --latency 0.2
+"""
+import argparse
+import asyncio
+import time
+
+from backend.routers.benchmarks.fakes import (
+    CallRecorder,
+    FakeChatModel,
+    make_fake_search,
+    set_dummy_env,
+)
+
+set_dummy_env()
+
+from backend.routers.Economic_Analyst import economic_analyst  # noqa: E402
+from backend.routers.Industry_Analyst import research_parallel  # noqa: E402
+from backend.routers.Orchestrator import main as orchestrator  # noqa: E402
+from backend.routers.Quantitative_Analyst import quantitative_analyst  # noqa: E402
+
+
+async def fake_financial_data(symbol: str, *args, **kwargs):
+    return {"data": {"symbol": symbol}}
+
+
+def patch_dependencies(latency: float, blocking: bool) -> CallRecorder:
+    recorder = CallRecorder()
+    fake = FakeChatModel(latency=latency, blocking=blocking, recorder=recorder)
+    search = make_fake_search(latency=latency, recorder=recorder)
+    for module in (economic_analyst, research_parallel):
+        module.model = fake
+        module.tavily_search_async = search
+    quantitative_analyst.model = fake
+    quantitative_analyst.quant = fake
+    quantitative_analyst.get_financial_data = fake_financial_data
+    orchestrator.model = fake
+    return recorder
+
+
+async def run_once(latency: float, blocking: bool):
+    recorder = patch_dependencies(latency, blocking)
+    start = time.perf_counter()
+    await orchestrator.graph.ainvoke({"stock": "AAPL"})
+    return time.perf_counter() - start, recorder
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per fake call")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'calls':>8}{'sum of calls (s)':>20}{'wall (s)':>12}")
+    for label, blocking in (("blocking", True), ("async", False)):
+        wall, recorder = asyncio.run(run_once(args.latency, blocking))
+        print(f"{label:<10}{recorder.calls:>8}{recorder.total_latency:>20.2f}{wall:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
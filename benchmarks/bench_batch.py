@@ -0,0 +1,81 @@
+"""Watchlist analysis: one graph run per stock vs the batch entry point.
+
+Runs the orchestrator against latency-injected fakes for a list of US
+tickers, first one ``graph.ainvoke`` per stock and then ``analyze_batch``,
+which researches the shared economy once. Both use the same concurrency, and
+model calls go through ChatClient so the governor's Gemini limit applies.
+Run from the directory containing ``backend``::
+
+    python -m backend.routers.benchmarks.bench_batch --stocks 10 --latency 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from backend.routers.benchmarks.fakes import set_dummy_env
+
+set_dummy_env()
+
+from backend.routers.benchmarks.bench_async_fanout import patch_dependencies as patch_fakes  # noqa: E402
+from backend.routers.Common.llm import ChatClient  # noqa: E402
+from backend.routers.Economic_Analyst import economic_analyst  # noqa: E402
+from backend.routers.Industry_Analyst import research_parallel  # noqa: E402
+from backend.routers.Orchestrator import main as orchestrator  # noqa: E402
+from backend.routers.Quantitative_Analyst import quantitative_analyst  # noqa: E402
+from backend.routers.Orchestrator.batch import analyze_batch  # noqa: E402
+
+TICKERS = ["AAPL", "MSFT", "NVDA", "AMZN", "GOOGL", "META", "TSLA", "JPM", "V", "WMT",
+           "XOM", "JNJ", "PG", "MA", "HD", "CVX", "KO", "PEP", "COST", "MRK"]
+
+
+def patch_dependencies(latency: float):
+    """Fakes behind ChatClient, so calls are governed and counted in the token ledger."""
+    recorder = patch_fakes(latency, blocking=False)
+    for module in (economic_analyst, research_parallel, quantitative_analyst, orchestrator):
+        module.model = ChatClient(module.model, cache=None)
+    quantitative_analyst.quant = quantitative_analyst.model
+    return recorder
+
+
+async def individually(stocks, latency, concurrency):
+    recorder = patch_dependencies(latency)
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run(stock):
+        async with limit:
+            await orchestrator.graph.ainvoke({"stock": stock})
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run(stock) for stock in stocks))
+    return time.perf_counter() - start, recorder.calls
+
+
+async def batched(stocks, latency, concurrency):
+    recorder = patch_dependencies(latency)
+    start = time.perf_counter()
+    report = await analyze_batch(
+        [{"stock": stock, "country": "US"} for stock in stocks],
+        config={"configurable": {"research_memo": False}},
+        max_concurrency=concurrency,
+    )
+    return time.perf_counter() - start, recorder.calls, report.stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stocks", type=int, default=10, help="watchlist size")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake call")
+    parser.add_argument("--concurrency", type=int, default=4, help="graph runs in flight")
+    args = parser.parse_args()
+    stocks = (TICKERS * (args.stocks // len(TICKERS) + 1))[:args.stocks]
+
+    print(f"{'mode':<14}{'calls':>8}{'wall (s)':>12}")
+    wall, calls = asyncio.run(individually(stocks, args.latency, args.concurrency))
+    print(f"{'individually':<14}{calls:>8}{wall:>12.2f}")
+    wall, calls, stats = asyncio.run(batched(stocks, args.latency, args.concurrency))
+    print(f"{'batch':<14}{calls:>8}{wall:>12.2f}")
+    print(f"batch stats: {stats.as_dict()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Run latency with a slow branch, with and without deadlines.
+
+Runs the orchestrator against latency-injected fakes where the quantitative
+analysis model stalls (``--slow`` seconds per call, like a hung request),
+first without deadlines and then with a run deadline, and reports the wall
+time and the gaps flagged to the combine step. Run from the directory
+containing ``backend``::
+
+    python -m backend.routers.benchmarks.bench_deadlines --slow 3 --deadline 1.5
+"""
+import argparse
+import asyncio
+import time
+
+from backend.routers.benchmarks.fakes import FakeChatModel, set_dummy_env
+
+set_dummy_env()
+
+from backend.routers.benchmarks.bench_async_fanout import patch_dependencies  # noqa: E402
+from backend.routers.Orchestrator import main as orchestrator  # noqa: E402
+from backend.routers.Quantitative_Analyst import quantitative_analyst  # noqa: E402
+
+
+async def run(latency: float, slow: float, configurable: dict):
+    recorder = patch_dependencies(latency, blocking=False)
+    quantitative_analyst.quant = FakeChatModel(latency=slow, recorder=recorder)
+    start = time.perf_counter()
+    result = await orchestrator.graph.ainvoke(
+        {"stock": "AAPL"}, {"configurable": {"research_memo": False, **configurable}}
+    )
+    return time.perf_counter() - start, result["gaps"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake call")
+    parser.add_argument("--slow", type=float, default=3.0, help="seconds per quantitative analysis call")
+    parser.add_argument("--deadline", type=float, default=1.5, help="run deadline in seconds")
+    args = parser.parse_args()
+
+    settings = {"run_deadline_seconds": args.deadline, "combine_reserve_seconds": 2 * args.latency}
+    print(f"{'deadline':<10}{'wall (s)':>10}  gaps")
+    for label, configurable in (("none", {}), (f"{args.deadline:g}s", settings)):
+        wall, gaps = asyncio.run(run(args.latency, args.slow, configurable))
+        print(f"{label:<10}{wall:>10.2f}  {'; '.join(gaps) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Microbenchmark of flatten_json over synthetic payloads of growing depth and width.
+
+Compares the current stack-based implementation with the original recursive
+one, checks both produce identical output, and exits non-zero with --check if
+the current implementation is slower than the reference on any payload::
+
+    python -m backend.routers.benchmarks.bench_flatten_json --check
+"""
+import argparse
+import json
+import os
+import sys
+import timeit
+from typing import Dict
+
+from backend.routers.Quantitative_Analyst.formatting import flatten_json, iter_flatten_json
+
+
+def flatten_json_recursive(data: Dict, parent_key: str = "", sep: str = "_") -> Dict:
+    """The original implementation, kept as the baseline."""
+    items = []
+    for key, value in data.items():
+        new_key = parent_key + sep + key if parent_key else key
+        if isinstance(value, dict):
+            items.extend(flatten_json_recursive(value, new_key, sep=sep).items())
+        elif isinstance(value, list):
+            for i, list_item in enumerate(value):
+                if isinstance(list_item, dict):
+                    items.extend(
+                        flatten_json_recursive(list_item, f"{new_key}{sep}{i}", sep=sep).items()
+                    )
+                else:
+                    items.append((f"{new_key}{sep}{i}", list_item))
+        else:
+            items.append((new_key, value))
+    return dict(items)
+
+
+def synthetic_payload(depth: int, width: int, series: int = 20) -> Dict:
+    """Nested dicts ``depth`` levels deep with ``width`` keys per level; the
+    leaves are QuickFS-style metric arrays of length ``series``."""
+    if depth == 0:
+        return {f"metric_{i}": [float(j) for j in range(series)] for i in range(width)}
+    return {f"level{depth}_{i}": synthetic_payload(depth - 1, width, series) for i in range(width)}
+
+
+def bench(payload: Dict, repeat: int) -> Dict:
+    assert flatten_json(payload) == flatten_json_recursive(payload)
+    legacy = min(timeit.repeat(lambda: flatten_json_recursive(payload), number=1, repeat=repeat))
+    current = min(timeit.repeat(lambda: flatten_json(payload), number=1, repeat=repeat))
+    return {"fields": len(flatten_json(payload)), "legacy": legacy, "current": current}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--check", action="store_true", help="fail if slower than the recursive baseline")
+    parser.add_argument("--tolerance", type=float, default=1.10, help="allowed slowdown ratio with --check")
+    args = parser.parse_args()
+
+    cases = [(depth, width) for depth in (1, 2, 3, 4) for width in (4, 8, 16) if width ** depth <= 4096]
+    payloads = [(f"depth={d} width={w}", synthetic_payload(d, w)) for d, w in cases]
+    sample = os.path.join(os.path.dirname(__file__), "..", "Quantitative_Analyst", "A2M.json")
+    if os.path.exists(sample):
+        with open(sample) as f:
+            payloads.append(("QuickFS A2M sample", json.load(f)))
+
+    print(f"{'payload':<24}{'fields':>10}{'recursive (ms)':>16}{'stack (ms)':>12}{'speedup':>9}{'pruned (ms)':>13}")
+    failed = False
+    for label, payload in payloads:
+        result = bench(payload, args.repeat)
+        first_key = next(iter(payload))
+        pruned = min(timeit.repeat(
+            lambda: dict(iter_flatten_json(payload, prefixes=[first_key])), number=1, repeat=args.repeat
+        ))
+        speedup = result["legacy"] / result["current"]
+        print(
+            f"{label:<24}{result['fields']:>10}{result['legacy'] * 1e3:>16.2f}"
+            f"{result['current'] * 1e3:>12.2f}{speedup:>8.2f}x{pruned * 1e3:>13.2f}"
+        )
+        if result["current"] > result["legacy"] * args.tolerance:
+            failed = True
+
+    if args.check and failed:
+        print("flatten_json is slower than the recursive baseline", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""429s and wall time of bursty concurrent runs with and without the governor.
+
+Simulates a provider that accepts at most ``--quota`` concurrent requests and
+answers the rest with 429, and ``--runs`` analysis runs that each burst
+``--calls`` requests at once and retry 429s with exponential backoff, like
+the SDK clients do::
+
+    python -m backend.routers.benchmarks.bench_governor --runs 20 --quota 8
+"""
+import argparse
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+
+from backend.routers.Common.governor import Governor
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+
+class FakeProvider:
+    def __init__(self, quota: int, latency: float):
+        self.quota = quota
+        self.latency = latency
+        self.in_flight = 0
+        self.attempts = 0
+        self.rejected = 0
+
+    async def call(self):
+        self.attempts += 1
+        if self.in_flight >= self.quota:
+            self.rejected += 1
+            await asyncio.sleep(0.01)
+            raise RateLimited()
+        self.in_flight += 1
+        try:
+            await asyncio.sleep(self.latency)
+        finally:
+            self.in_flight -= 1
+
+
+@asynccontextmanager
+async def no_slot():
+    yield
+
+
+async def call_with_retries(provider: FakeProvider, slot, max_retries: int = 8):
+    for attempt in range(max_retries + 1):
+        try:
+            async with slot():
+                return await provider.call()
+        except RateLimited:
+            await asyncio.sleep(min(0.05 * 2 ** attempt, 2.0) * (0.5 + random.random() / 2))
+    raise RuntimeError("gave up after retries")
+
+
+async def simulate(runs: int, calls: int, quota: int, latency: float, governed: bool):
+    provider = FakeProvider(quota, latency)
+    governor = Governor(defaults={"fake": (quota, 0)})
+    slot = (lambda: governor.slot("fake")) if governed else no_slot
+
+    async def run():
+        await asyncio.gather(*(call_with_retries(provider, slot) for _ in range(calls)))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run() for _ in range(runs)), return_exceptions=True)
+    wall = time.perf_counter() - start
+    failed = sum(isinstance(result, Exception) for result in results)
+    return wall, provider, failed, governor.stats().get("fake")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--calls", type=int, default=10, help="concurrent calls per run")
+    parser.add_argument("--quota", type=int, default=8, help="provider concurrency quota")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per accepted call")
+    args = parser.parse_args()
+
+    ideal = args.runs * args.calls * args.latency / args.quota
+    print(f"{args.runs * args.calls} calls, quota {args.quota}, ideal wall time {ideal:.2f}s")
+    print(f"{'mode':<12}{'wall (s)':>10}{'attempts':>10}{'429s':>8}{'failed runs':>13}{'max queued':>12}{'avg wait (s)':>14}")
+    for label, governed in (("ungoverned", False), ("governed", True)):
+        wall, provider, failed, stats = asyncio.run(
+            simulate(args.runs, args.calls, args.quota, args.latency, governed)
+        )
+        max_queued = stats["max_queued"] if stats else "-"
+        avg_wait = f"{stats['avg_wait_seconds']:.3f}" if stats else "-"
+        print(f"{label:<12}{wall:>10.2f}{provider.attempts:>10}{provider.rejected:>8}{failed:>13}{max_queued:>12}{avg_wait:>14}")
+
+
+if __name__ == "__main__":
+    main()
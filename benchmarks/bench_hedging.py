@@ -0,0 +1,89 @@
+"""Tail latency of model calls with and without hedged requests.
+
+Sends ``--calls`` requests through ChatClient, ``--concurrency`` at a time,
+to a fake model answering in ``--latency`` seconds except for a share
+``--tail`` of the requests, which hang for ``--slow`` seconds. Reports the
+latency percentiles and the extra requests sent::
+
+    python -m backend.routers.benchmarks.bench_hedging --calls 1000 --tail 0.02
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from backend.routers.benchmarks.fakes import FakeChatModel, set_dummy_env
+
+set_dummy_env()
+
+from backend.routers.Common.hedging import Hedger, LatencyHistogram  # noqa: E402
+from backend.routers.Common import llm  # noqa: E402
+from backend.routers.Common.llm import ChatClient  # noqa: E402
+
+
+class TailLatencyModel(FakeChatModel):
+    """FakeChatModel whose requests occasionally hang."""
+
+    def __init__(self, latency: float, slow: float, tail: float, seed: int = 0):
+        super().__init__(latency=latency)
+        self.slow = slow
+        self.tail = tail
+        self.random = random.Random(seed)
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        self.recorder.record(self.latency)
+        # Jitter so the hedge threshold sits between the normal and slow calls
+        delay = self.slow if self.random.random() < self.tail else self.latency * self.random.uniform(0.8, 1.2)
+        await asyncio.sleep(delay)
+        return self._result()
+
+
+async def simulate(args, hedged: bool):
+    llm.hedger = Hedger()
+    model = TailLatencyModel(args.latency, args.slow, args.tail)
+    client = ChatClient(model, cache=None)
+    config = {
+        "metadata": {"langgraph_node": "analyst"},
+        "configurable": {
+            "hedge_requests": hedged,
+            "hedge_min_delay_seconds": args.latency,
+            "hedge_max_ratio": args.max_ratio,
+        },
+    }
+    latencies = LatencyHistogram(size=args.calls)
+    limit = asyncio.Semaphore(args.concurrency)
+
+    async def one():
+        async with limit:
+            start = time.perf_counter()
+            await client.ainvoke("benchmark", config)
+            latencies.record(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.calls)))
+    wall = time.perf_counter() - start
+    return latencies, model.recorder.calls, wall, llm.hedger.stats_dict().get("gemini/analyst", {})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per normal call")
+    parser.add_argument("--slow", type=float, default=1.0, help="seconds per hanging call")
+    parser.add_argument("--tail", type=float, default=0.02, help="share of hanging calls")
+    parser.add_argument("--max-ratio", type=float, default=0.05, help="hedge budget per call")
+    args = parser.parse_args()
+
+    print(f"{'hedging':<9}{'p50 (s)':>9}{'p95 (s)':>9}{'p99 (s)':>9}{'max (s)':>9}{'requests':>10}{'hedged':>8}{'wins':>6}{'wall (s)':>10}")
+    for hedged in (False, True):
+        latencies, requests, wall, stats = asyncio.run(simulate(args, hedged))
+        p = latencies.percentile
+        print(
+            f"{'on' if hedged else 'off':<9}{p(0.5):>9.3f}{p(0.95):>9.3f}{p(0.99):>9.3f}{p(1.0):>9.3f}"
+            f"{requests:>10}{stats.get('hedged', 0):>8}{stats.get('hedge_wins', 0):>6}{wall:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Cost of decoding the QuickFS all-data payload, and handling of broken bodies.
+
+Times json.loads plus projection against the streaming projector on the A2M
+sample, then serves cut-off, HTML and empty bodies to QuickFSClient over a
+mock transport and checks that cut-off bodies are retried and that every
+broken body gives None instead of failing the run::
+
+    python -m backend.routers.benchmarks.bench_ingestion
+"""
+import argparse
+import asyncio
+import os
+import timeit
+
+import httpx
+
+from backend.routers.Quantitative_Analyst.ingestion import (
+    IngestionStats,
+    Projection,
+    StreamingProjector,
+    ijson,
+    parse_body,
+)
+from backend.routers.Quantitative_Analyst.quickfs import QuickFSClient
+
+
+def stream(body: bytes, projection: Projection, chunk_size: int = 16384):
+    projector = StreamingProjector(projection, IngestionStats())
+    for start in range(0, len(body), chunk_size):
+        projector.feed(body[start:start + chunk_size])
+    return projector.close()
+
+
+async def fetch(body: bytes, projection: Projection, max_retries: int = 2):
+    """get_all_data against a server answering every request with body."""
+    requests = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal requests
+        requests += 1
+        return httpx.Response(200, content=body)
+
+    client = QuickFSClient(api_key="test", max_retries=max_retries, backoff_base=0.0)
+    client._client = httpx.AsyncClient(base_url=client.base_url, transport=httpx.MockTransport(handler))
+    client._loop = asyncio.get_running_loop()
+    try:
+        return await client.get_all_data("A2M:AU", projection), requests
+    finally:
+        await client.aclose()
+
+
+async def check_broken_bodies(body: bytes, projection: Projection, max_retries: int = 2):
+    cases = [
+        ("cut off", body[: len(body) // 2], max_retries + 1),
+        ("html error page", b"<html><body>502 Bad Gateway</body></html>", 1),
+        ("empty", b"", 1),
+    ]
+    print(f"{'body':<18}{'result':>8}{'requests':>10}")
+    for label, broken, expected_requests in cases:
+        result, requests = await fetch(broken, projection, max_retries)
+        print(f"{label:<18}{'None' if result is None else 'data':>8}{requests:>10}")
+        assert result is None, label
+        assert requests == expected_requests, (label, requests)
+    result, requests = await fetch(body, projection, max_retries)
+    assert result is not None and requests == 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    sample = os.path.join(os.path.dirname(__file__), "..", "Quantitative_Analyst", "A2M.json")
+    with open(sample, "rb") as f:
+        body = f.read()
+    projection = Projection()
+
+    full = min(timeit.repeat(lambda: parse_body(body, projection, IngestionStats()), number=1, repeat=args.repeat))
+    print(f"{'mode':<18}{'time (ms)':>10}")
+    print(f"{'full parse':<18}{full * 1e3:>10.2f}")
+    if ijson is not None:
+        assert stream(body, projection) == parse_body(body, projection, IngestionStats())
+        streamed = min(timeit.repeat(lambda: stream(body, projection), number=1, repeat=args.repeat))
+        print(f"{'streamed':<18}{streamed * 1e3:>10.2f}")
+    print()
+
+    asyncio.run(check_broken_bodies(body, projection))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Research memo: calls for a sector's stocks analysed one after another.
+
+Runs the orchestrator against latency-injected fakes for stocks planned into
+the same industry and market, with the research memo disabled and enabled
+(in a temporary store). With the memo, the first stock researches the
+industry and economy and the others only make the short delta calls. Run
+from the directory containing ``backend``::
+
+    python -m backend.routers.benchmarks.bench_memo --stocks 10 --latency 0.02
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from backend.routers.benchmarks.fakes import FakeChatModel, set_dummy_env
+
+set_dummy_env()
+
+from backend.routers.benchmarks.bench_batch import patch_dependencies  # noqa: E402
+from backend.routers.Common.disk_cache import DiskCache  # noqa: E402
+from backend.routers.Common.memo import ResearchMemo  # noqa: E402
+from backend.routers.Orchestrator import main as orchestrator  # noqa: E402
+
+PLAN = {"industry_classification": "Semiconductors", "market": "United States"}
+
+
+async def run(stocks, latency, enabled, path):
+    recorder = patch_dependencies(latency)
+    fake = orchestrator.model.model
+    orchestrator.model.model = FakeChatModel(fake.latency, recorder=fake.recorder, responses={"OrchestratorPlan": PLAN})
+    orchestrator.research_memo = ResearchMemo(DiskCache(path))
+    # Placeholder analyses fill few fields; store them anyway
+    config = {"configurable": {"research_memo": enabled, "research_memo_min_coverage": 0.0}}
+    start = time.perf_counter()
+    for i, stock in enumerate(stocks):
+        config["configurable"]["run_id"] = f"memo-bench-{enabled}-{i}"
+        await orchestrator.graph.ainvoke({"stock": stock}, config)
+    return time.perf_counter() - start, recorder.calls, orchestrator.research_memo.stats.as_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stocks", type=int, default=10, help="stocks in the sector")
+    parser.add_argument("--latency", type=float, default=0.02, help="seconds per fake call")
+    args = parser.parse_args()
+    stocks = [f"SEMI{i}" for i in range(args.stocks)]
+
+    print(f"{'memo':<10}{'calls':>8}{'wall (s)':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        for enabled in (False, True):
+            wall, calls, stats = asyncio.run(run(stocks, args.latency, enabled, os.path.join(directory, "memo.sqlite")))
+            print(f"{'on' if enabled else 'off':<10}{calls:>8}{wall:>12.2f}")
+    print(f"memo stats: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Prompt size and fact recall of passage selection versus head truncation.
+
+Builds synthetic search results whose pages are mostly navigation and
+off-topic text, with a few query-relevant facts placed at random depths,
+and formats them both ways::
+
+    python -m backend.routers.benchmarks.bench_passages
+"""
+import argparse
+import random
+import time
+
+from backend.routers.Common.sources import deduplicate_and_format_sources
+
+QUERY = "United States inflation rate outlook 2025 consumer prices"
+
+NAVIGATION = ["Home", "Markets", "Subscribe now", "Sign in", "Share this article", "Menu", "Cookie settings"]
+FILLER = [
+    "The football season opened with a surprising victory for the home side in front of a record crowd.",
+    "Our editors pick the best travel destinations for the summer, from quiet beaches to busy cities.",
+    "Readers also enjoyed these recipes for quick weeknight dinners and seasonal desserts.",
+    "The company announced a new smartphone lineup with improved cameras and longer battery life.",
+    "Local officials opened a new public library branch with extended opening hours on weekends.",
+]
+FACTS = [
+    "US consumer prices rose 3.1% in 2025 and economists expect the inflation rate to ease in the outlook for 2026.",
+    "The Federal Reserve projects core inflation of 2.6% as consumer prices for services continue to cool.",
+    "United States inflation outlook: energy prices pushed the headline consumer price index up 0.4% in March.",
+]
+
+
+def page(rng: random.Random, chars: int, fact: str) -> str:
+    lines = []
+    fact_at = rng.randrange(chars)
+    size, placed = 0, False
+    while size < chars:
+        line = rng.choice(NAVIGATION) if rng.random() < 0.3 else rng.choice(FILLER)
+        if not placed and size >= fact_at:
+            line, placed = fact, True
+        lines.append(line)
+        size += len(line) + 1
+        if rng.random() < 0.1:
+            lines.append("")
+    if not placed:
+        lines.append(fact)
+    return "\n".join(lines)
+
+
+def search_response(n_sources: int, chars: int, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    return {
+        "results": [
+            {
+                "title": f"Source {i}",
+                "url": f"https://example.com/{i}",
+                "content": "Snippet.",
+                "raw_content": page(rng, chars, FACTS[i % len(FACTS)]),
+            }
+            for i in range(n_sources)
+        ]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sources", type=int, default=5)
+    parser.add_argument("--page-chars", type=int, default=120000)
+    parser.add_argument("--tokens-per-source", type=int, default=1500)
+    parser.add_argument("--prompt-tokens", type=int, default=8000)
+    args = parser.parse_args()
+
+    response = search_response(args.sources, args.page_chars)
+    facts = [FACTS[i % len(FACTS)] for i in range(args.sources)]
+
+    start = time.perf_counter()
+    head = deduplicate_and_format_sources(response, 10000)
+    head_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    selected = deduplicate_and_format_sources(
+        response, args.tokens_per_source, query=QUERY, max_total_tokens=args.prompt_tokens
+    )
+    selected_time = time.perf_counter() - start
+
+    print(f"{'mode':<20}{'chars':>10}{'~tokens':>10}{'facts kept':>12}{'time (ms)':>11}")
+    for name, text, elapsed in (("head truncation", head, head_time), ("passage selection", selected, selected_time)):
+        kept = sum(text.count(fact) > 0 for fact in set(facts))
+        print(f"{name:<20}{len(text):>10}{len(text) // 4:>10}{f'{kept}/{len(set(facts))}':>12}{elapsed * 1e3:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
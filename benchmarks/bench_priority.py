@@ -0,0 +1,88 @@
+"""Run latency under load with priority scheduling versus first-come, first-served.
+
+Simulates runs arriving at random over ``--duration`` seconds, each making
+the LLM calls of an orchestrator run stage by stage (the calls of a stage
+are concurrent), through a governor capped at ``--concurrency`` slots::
+
+    python -m backend.routers.benchmarks.bench_priority --runs 40 --concurrency 8
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from backend.routers.Common.governor import Governor, call_priority
+
+# (node, concurrent calls) per stage of an orchestrator run: both research
+# analysts with three queries each, two iterations, then the quant analysis
+RUN_STAGES = [
+    ("orchestrator", 1),
+    ("research_planner", 2),
+    ("analyst", 12),
+    ("reflect", 6),
+    ("analyst", 12),
+    ("reflect", 6),
+    ("aggregate_analyses", 2),
+    ("quantitative_analysis", 1),
+    ("combine", 1),
+]
+
+
+async def run(governor: Governor, run_id: str, latency: float, prioritized: bool) -> float:
+    start = time.perf_counter()
+    for node, calls in RUN_STAGES:
+        config = {
+            "configurable": {"run_id": run_id, "scheduler_priority": prioritized},
+            "metadata": {"langgraph_node": node},
+        }
+
+        async def call():
+            async with governor.slot("gemini", priority=call_priority(config)):
+                await asyncio.sleep(latency * random.uniform(0.5, 1.5))
+
+        await asyncio.gather(*(call() for _ in range(calls)))
+    return time.perf_counter() - start
+
+
+async def simulate(runs: int, duration: float, concurrency: int, latency: float, prioritized: bool, seed: int):
+    random.seed(seed)
+    governor = Governor(defaults={"gemini": (concurrency, 0)})
+    arrivals = sorted(random.uniform(0, duration) for _ in range(runs))
+
+    async def delayed(i: int, at: float):
+        await asyncio.sleep(at)
+        return await run(governor, f"{'p' if prioritized else 'f'}{seed}-{i}", latency, prioritized)
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(delayed(i, at) for i, at in enumerate(arrivals)))
+    return latencies, time.perf_counter() - start
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=40)
+    parser.add_argument("--duration", type=float, default=4.0, help="seconds over which runs arrive")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.1, help="mean seconds per LLM call")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'scheduling':<12}{'p50 (s)':>9}{'p95 (s)':>9}{'mean (s)':>10}{'makespan (s)':>14}")
+    for label, prioritized in (("fifo", False), ("priority", True)):
+        latencies, makespan = asyncio.run(
+            simulate(args.runs, args.duration, args.concurrency, args.latency, prioritized, args.seed)
+        )
+        print(
+            f"{label:<12}{percentile(latencies, 0.5):>9.2f}{percentile(latencies, 0.95):>9.2f}"
+            f"{statistics.mean(latencies):>10.2f}{makespan:>14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
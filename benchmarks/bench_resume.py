@@ -0,0 +1,87 @@
+"""Calls re-made when a failed run is resumed from its checkpoints.
+
+Runs the durable orchestrator graph against latency-injected fakes with the
+combine step, or the quantitative analysis, failing on its first call, then
+resumes the run with ``resume_analysis``. Reports the calls (model and
+search) of the first attempt and of the resume: the resume should only redo
+the failed step and the steps of cancelled branches that had not finished. Run from
+the directory containing ``backend``::
+
+    python -m backend.routers.benchmarks.bench_resume
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+
+from backend.routers.benchmarks.fakes import set_dummy_env
+
+set_dummy_env()
+
+from backend.routers.benchmarks.bench_async_fanout import patch_dependencies  # noqa: E402
+from backend.routers.Orchestrator import durable  # noqa: E402
+from backend.routers.Orchestrator import main as orchestrator  # noqa: E402
+from backend.routers.Quantitative_Analyst import quantitative_analyst  # noqa: E402
+
+
+class FailOnce:
+    """Wraps a node's model so that its first call raises after a delay."""
+
+    def __init__(self, model, delay: float = 0.0):
+        self.model = model
+        self.delay = delay
+        self.failed = False
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    async def ainvoke(self, *args, **kwargs):
+        if not self.failed:
+            self.failed = True
+            await asyncio.sleep(self.delay)
+            raise RuntimeError("injected failure")
+        return await self.model.ainvoke(*args, **kwargs)
+
+
+async def run(failing: str, delay: float, latency: float):
+    recorder = patch_dependencies(latency, blocking=False)
+    if failing == "combine":
+        orchestrator.model = FailOnce(orchestrator.model)
+    else:
+        # The other branches are cancelled when it fails, part way through
+        quantitative_analyst.quant = FailOnce(quantitative_analyst.quant, delay)
+
+    thread_id = f"resume-{failing}-{delay}"
+    try:
+        await durable.start_analysis("AAPL", thread_id=thread_id)
+    except RuntimeError:
+        pass
+    first = recorder.calls
+    status = await durable.analysis_status(thread_id)
+    result = await durable.resume_analysis(thread_id)
+    await durable.close_durable_graph()
+    return first, recorder.calls - first, status, bool(result["final_report"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.01, help="seconds per fake call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        durable.CHECKPOINT_PATH = os.path.join(directory, "checkpoints.sqlite")
+        print(f"{'failing step':<32}{'first attempt':>15}{'resume':>8}  completed branches before resume")
+        for failing, delay in (
+            ("combine", 0),
+            ("quantitative_analysis", 0),
+            ("quantitative_analysis", 7 * args.latency),
+            ("quantitative_analysis", 20 * args.latency),
+        ):
+            first, resumed, status, done = asyncio.run(run(failing, delay, args.latency))
+            assert done, "resumed run produced no report"
+            label = f"{failing} after {delay:.2f}s" if delay else failing
+            print(f"{label:<32}{first:>15}{resumed:>8}  {', '.join(status['completed_branches']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
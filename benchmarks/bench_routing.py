@@ -0,0 +1,66 @@
+"""Latency and tokens per model tier of a run, with and without model routing.
+
+Runs the orchestrator against fakes behind ChatClient where the modules'
+models answer in ``--latency`` seconds and the fast tier's model in
+``--fast-latency``, first with every call on its module's model and then
+with the default routes (planning, reflection and summaries on the fast
+tier)::
+
+    python -m backend.routers.benchmarks.bench_routing --latency 0.2 --fast-latency 0.05
+"""
+import argparse
+import asyncio
+import time
+
+from backend.routers.benchmarks.fakes import set_dummy_env
+
+set_dummy_env()
+
+from backend.routers.benchmarks.bench_async_fanout import patch_dependencies as patch_fakes  # noqa: E402
+from backend.routers.Common import llm  # noqa: E402
+from backend.routers.Common.llm import ChatClient  # noqa: E402
+from backend.routers.Common.routing import DEFAULT_TIERS, ModelRouter  # noqa: E402
+from backend.routers.Economic_Analyst import economic_analyst  # noqa: E402
+from backend.routers.Industry_Analyst import research_parallel  # noqa: E402
+from backend.routers.Orchestrator import main as orchestrator  # noqa: E402
+from backend.routers.Quantitative_Analyst import quantitative_analyst  # noqa: E402
+
+
+def patch_dependencies(latency: float, fast_latency: float):
+    patch_fakes(latency, blocking=False)
+    for module in (economic_analyst, research_parallel, quantitative_analyst, orchestrator):
+        module.model.model_latencies = {DEFAULT_TIERS["fast"].model: fast_latency}
+        module.model = ChatClient(module.model, cache=None)
+    quantitative_analyst.quant = quantitative_analyst.model
+
+
+async def run(latency: float, fast_latency: float, routing: bool):
+    patch_dependencies(latency, fast_latency)
+    llm.model_router = ModelRouter()
+    start = time.perf_counter()
+    await orchestrator.graph.ainvoke(
+        {"stock": "AAPL"}, {"configurable": {"research_memo": False, "model_routing": routing}}
+    )
+    return time.perf_counter() - start, llm.model_router.stats_dict()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per call of the modules' models")
+    parser.add_argument("--fast-latency", type=float, default=0.05, help="seconds per call of the fast tier")
+    args = parser.parse_args()
+
+    print(f"{'routing':<9}{'tier':<10}{'calls':>7}{'prompt tok':>12}{'output tok':>12}{'avg (s)':>9}{'run wall (s)':>14}")
+    for routing in (False, True):
+        wall, stats = asyncio.run(run(args.latency, args.fast_latency, routing))
+        for i, (tier, tier_stats) in enumerate(sorted(stats.items())):
+            label = ("on" if routing else "off") if i == 0 else ""
+            total = f"{wall:.2f}" if i == 0 else ""
+            print(
+                f"{label:<9}{tier:<10}{tier_stats['calls']:>7}{tier_stats['prompt_tokens']:>12}"
+                f"{tier_stats['output_tokens']:>12}{tier_stats['avg_seconds']:>9.3f}{total:>14}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Cost of formatting search results for the analysis and summary prompts.
+
+Times the shared deduplicate_and_format_sources against the original
+string-concatenation version over 5-50 sources with 40k+ characters of raw
+content each. The original cuts pages at 4 characters per token; the shared
+one counts tokens with Common.tokens, so cut pages differ slightly and the
+outputs are only checked to be identical for pages under the limit. CPython
+already extends the concatenated string in place, so joining saves nothing,
+and counting each page's tokens makes the shared version somewhat slower.
+The ratio column is concat time over join time::
+
+    python -m backend.routers.benchmarks.bench_sources
+"""
+import argparse
+import timeit
+
+from backend.routers.Common.sources import deduplicate_and_format_sources
+
+
+def deduplicate_and_format_sources_concat(search_response, max_tokens_per_source, include_raw_content=True):
+    """The implementation previously copy-pasted in both analysts."""
+    if isinstance(search_response, dict):
+        sources_list = search_response["results"]
+    elif isinstance(search_response, list):
+        sources_list = []
+        for response in search_response:
+            if isinstance(response, dict) and "results" in response:
+                sources_list.extend(response["results"])
+            else:
+                sources_list.extend(response)
+    else:
+        raise ValueError("Input must be either a dict with 'results' or a list of search results")
+
+    unique_sources = {}
+    for source in sources_list:
+        if source["url"] not in unique_sources:
+            unique_sources[source["url"]] = source
+
+    formatted_text = "Sources:\n\n"
+    for i, source in enumerate(unique_sources.values(), 1):
+        formatted_text += f"Source {source['title']}:\n===\n"
+        formatted_text += f"URL: {source['url']}\n===\n"
+        formatted_text += f"Most relevant content from source: {source['content']}\n===\n"
+        if include_raw_content:
+            char_limit = max_tokens_per_source * 4
+            raw_content = source.get("raw_content", "")
+            if raw_content is None:
+                raw_content = ""
+            if len(raw_content) > char_limit:
+                raw_content = raw_content[:char_limit] + "... [truncated]"
+            formatted_text += f"Full source content limited to {max_tokens_per_source} tokens: {raw_content}\n\n"
+
+    return formatted_text.strip()
+
+
+def search_response(n_sources: int, raw_chars: int) -> dict:
+    words = "inflation rates gdp growth semiconductor demand outlook policy "
+    raw = (words * (raw_chars // len(words) + 1))[:raw_chars]
+    return {
+        "results": [
+            {
+                "title": f"Source {i}",
+                "url": f"https://example.com/article/{i % max(n_sources - 2, 1)}",  # a few duplicates
+                "content": f"Summary of article {i}. " * 10,
+                "raw_content": raw,
+            }
+            for i in range(n_sources)
+        ]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--raw-chars", type=int, default=60000)
+    parser.add_argument("--max-tokens-per-source", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # Same text as the original as long as no page needs cutting
+    short = search_response(10, 2000)
+    assert deduplicate_and_format_sources(short, 1000) == deduplicate_and_format_sources_concat(short, 1000)
+
+    print(f"{'sources':>8}{'output (KB)':>13}{'concat (ms)':>13}{'join (ms)':>11}{'concat/join':>13}")
+    for n in (5, 10, 20, 35, 50):
+        response = search_response(n, args.raw_chars)
+        expected = deduplicate_and_format_sources_concat(response, args.max_tokens_per_source)
+        legacy = min(timeit.repeat(
+            lambda: deduplicate_and_format_sources_concat(response, args.max_tokens_per_source),
+            number=1, repeat=args.repeat,
+        ))
+        current = min(timeit.repeat(
+            lambda: deduplicate_and_format_sources(response, args.max_tokens_per_source),
+            number=1, repeat=args.repeat,
+        ))
+        print(f"{n:>8}{len(expected) / 1024:>13.0f}{legacy * 1e3:>13.3f}{current * 1e3:>11.3f}{legacy / current:>12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
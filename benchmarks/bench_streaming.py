@@ -0,0 +1,80 @@
+"""Time until the user sees the report: blocking endpoint vs SSE stream.
+
+Runs the orchestrator graph against latency-injected fakes, with a combine
+model that generates its report word by word, once through ``ainvoke`` (what
+``/ai/analyze/{stock}`` returns) and once through ``stream_analysis`` (what
+``/ai/analyze/{stock}/stream`` sends). Run from the directory containing
+``backend``::
+
+    python -m backend.routers.benchmarks.bench_streaming --latency 0.05
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from backend.routers.benchmarks.fakes import FakeStreamingChatModel, set_dummy_env
+
+set_dummy_env()
+
+from backend.routers.benchmarks.bench_async_fanout import patch_dependencies  # noqa: E402
+from backend.routers.Common.llm import ChatClient  # noqa: E402
+from backend.routers.Orchestrator import main as orchestrator  # noqa: E402
+from backend.routers.Orchestrator.streaming import stream_analysis  # noqa: E402
+
+
+def patch(args):
+    patch_dependencies(args.latency, blocking=False)
+    orchestrator.model = ChatClient(
+        FakeStreamingChatModel(
+            first_token_latency=args.first_token,
+            token_latency=args.token_latency,
+            words=args.words,
+        ),
+        cache=None,
+    )
+
+
+async def blocking(args):
+    patch(args)
+    start = time.perf_counter()
+    result = await orchestrator.graph.ainvoke({"stock": "AAPL"})
+    elapsed = time.perf_counter() - start
+    return elapsed, elapsed, len(result["final_report"].split())
+
+
+async def streamed(args):
+    patch(args)
+    events, done = {}, {}
+    report = []
+    async for message in stream_analysis(orchestrator.graph, {"stock": "AAPL"}):
+        if message.startswith(":"):
+            continue
+        event, data = message.split("\n")[:2]
+        event, data = event[len("event: "):], json.loads(data[len("data: "):])
+        events[event] = events.get(event, 0) + 1
+        if event == "token":
+            report.append(data["text"])
+        elif event == "done":
+            done = data
+    return done["first_token_seconds"], done["total_seconds"], len("".join(report).split()), events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per fake analyst call")
+    parser.add_argument("--first-token", type=float, default=0.5, help="combine model latency to first token")
+    parser.add_argument("--token-latency", type=float, default=0.002, help="seconds per report word")
+    parser.add_argument("--words", type=int, default=2000, help="report length in words")
+    args = parser.parse_args()
+
+    print(f"{'mode':<10}{'first output (s)':>18}{'total (s)':>12}{'words':>8}")
+    first, total, words = asyncio.run(blocking(args))
+    print(f"{'blocking':<10}{first:>18.2f}{total:>12.2f}{words:>8}")
+    first, total, words, events = asyncio.run(streamed(args))
+    print(f"{'stream':<10}{first:>18.2f}{total:>12.2f}{words:>8}")
+    print(f"events: {events}")
+
+
+if __name__ == "__main__":
+    main()
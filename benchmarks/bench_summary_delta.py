@@ -0,0 +1,100 @@
+"""Output tokens and latency per analyst iteration, full versus incremental summaries.
+
+Drives update_running_summary with a fake model whose latency grows with the
+tokens it writes. Each iteration brings a few new findings; in "full" mode
+the model rewrites the whole summary, in "incremental" mode it returns only
+the section deltas::
+
+    python -m backend.routers.benchmarks.bench_summary_delta --iterations 6
+"""
+import argparse
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage
+
+from backend.routers.Common.llm import ChatClient
+from backend.routers.Common.summary import SectionUpdate, SummaryDelta, update_running_summary
+from backend.routers.Common.tokens import count_tokens
+
+SECTIONS = ["Executive Summary", "Global Economic Environment", "Domestic Economic Environment", "Risks"]
+FINDING = "Indicator {i}.{j} moved by {j}.{i}% according to the latest release, revising earlier estimates."
+
+
+class FakeSummaryModel:
+    """Writes findings into a summary; latency = base + per_token * output tokens."""
+
+    def __init__(self, base: float, per_token: float, findings_per_iteration: int, schema=None, state=None):
+        self.base = base
+        self.per_token = per_token
+        self.findings = findings_per_iteration
+        self.schema = schema
+        self.state = state if state is not None else {"iteration": 0, "summary": "", "output_tokens": 0}
+
+    def with_structured_output(self, schema, **kwargs):
+        return FakeSummaryModel(self.base, self.per_token, self.findings, schema, self.state)
+
+    def _new_findings(self):
+        i = self.state["iteration"]
+        return {
+            section: [FINDING.format(i=i, j=j) for j in range(self.findings)]
+            for section in SECTIONS
+        }
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        findings = self._new_findings()
+        if self.schema is SummaryDelta:
+            result = SummaryDelta(updates=[
+                SectionUpdate(section=section, content="\n".join(f"- {line}" for line in lines))
+                for section, lines in findings.items()
+            ])
+            output = result.model_dump_json()
+        else:
+            # Full regeneration rewrites everything known so far plus the new findings
+            previous = self.state["summary"]
+            blocks = []
+            for section, lines in findings.items():
+                old = ""
+                if previous:
+                    old = previous.split(f"# {section}\n", 1)[1].split("\n# ", 1)[0].rstrip() + "\n"
+                blocks.append(f"# {section}\n{old}" + "\n".join(f"- {line}" for line in lines))
+            output = "\n\n".join(blocks)
+            result = AIMessage(content=output)
+        tokens = count_tokens(output, approximate=True)
+        self.state["output_tokens"] = tokens
+        await asyncio.sleep(self.base + self.per_token * tokens)
+        return result
+
+
+async def run(mode: str, iterations: int, base: float, per_token: float, findings: int):
+    model = FakeSummaryModel(base, per_token, findings)
+    client = ChatClient(model, cache=None)
+    config = {"configurable": {"summary_mode": mode}}
+    summary, rows = "", []
+    for iteration in range(iterations):
+        model.state["iteration"] = iteration
+        start = time.perf_counter()
+        summary = await update_running_summary(client, "{current_summary}{analysis}", "{current_summary}{sections}{analysis}", summary, "findings", config)
+        model.state["summary"] = summary
+        rows.append((model.state["output_tokens"], time.perf_counter() - start, count_tokens(summary, approximate=True)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=6)
+    parser.add_argument("--findings", type=int, default=3, help="new findings per section per iteration")
+    parser.add_argument("--base", type=float, default=0.05, help="fixed seconds per call")
+    parser.add_argument("--per-token", type=float, default=0.0005, help="seconds per output token")
+    args = parser.parse_args()
+
+    results = {mode: asyncio.run(run(mode, args.iterations, args.base, args.per_token, args.findings))
+               for mode in ("full", "incremental")}
+    print(f"{'iteration':>9}{'full out':>10}{'full (s)':>10}{'incr out':>10}{'incr (s)':>10}{'summary':>9}")
+    for i in range(args.iterations):
+        full, incremental = results["full"][i], results["incremental"][i]
+        print(f"{i + 1:>9}{full[0]:>10}{full[1]:>10.3f}{incremental[0]:>10}{incremental[1]:>10.3f}{incremental[2]:>9}")
+
+
+if __name__ == "__main__":
+    main()
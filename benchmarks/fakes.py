@@ -0,0 +1,178 @@
+"""Latency-injecting stand-ins for the external services used by the graphs.
+
+The benchmarks import the real graphs and swap their Gemini, Tavily and
+QuickFS dependencies for these fakes, so wall time only reflects how the
+graphs schedule their outbound calls.
+"""
+import asyncio
+import json
+import os
+import time
+import typing
+from typing import Dict, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import BaseModel
+
+
+def set_dummy_env():
+    """The analyst modules refuse to import without API keys."""
+    for name in ("GOOGLE_GENERATIVE_AI_API_KEY", "TAVILY_API_KEY", "LANGCHAIN_API_KEY", "QUICKFS_API_KEY"):
+        os.environ.setdefault(name, "benchmark")
+    os.environ.setdefault("LANGCHAIN_TRACING_V2", "false")
+
+
+class CallRecorder:
+    """Counts calls and the latency they would have cost if run back to back."""
+
+    def __init__(self):
+        self.calls = 0
+        self.total_latency = 0.0
+
+    def record(self, latency: float):
+        self.calls += 1
+        self.total_latency += latency
+
+
+def _fill(annotation):
+    origin = typing.get_origin(annotation)
+    if annotation is str:
+        return "benchmark"
+    if annotation is bool:
+        return False
+    if annotation is int:
+        return 0
+    if origin in (list, List):
+        return ["benchmark query 1", "benchmark query 2", "benchmark query 3"]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return build_schema(annotation)
+    return None
+
+
+def build_schema(schema, **overrides):
+    """Instantiate a pydantic schema, filling required fields with placeholders."""
+    values = {
+        name: _fill(info.annotation)
+        for name, info in schema.model_fields.items()
+        if info.is_required()
+    }
+    return schema(**{**values, **overrides})
+
+
+class FakeChatModel:
+    """Chat model double with a fixed per-call latency.
+
+    With ``blocking=True`` the latency is spent in ``time.sleep`` even on the
+    async path, which reproduces the cost of calling ``invoke`` from inside an
+    ``async def`` node.
+    """
+
+    def __init__(self, latency: float = 0.2, blocking: bool = False, recorder: Optional[CallRecorder] = None, schema=None, responses: Optional[Dict[str, Dict]] = None, model: str = "fake", model_latencies: Optional[Dict[str, float]] = None):
+        self.latency = latency
+        self.blocking = blocking
+        self.recorder = recorder or CallRecorder()
+        self.schema = schema
+        # Field values per schema name, on top of the placeholders
+        self.responses = responses or {}
+        self.model = model
+        # Latency of the models that routed calls can be sent to
+        self.model_latencies = model_latencies or {}
+
+    def with_structured_output(self, schema, **kwargs):
+        return FakeChatModel(self.latency, self.blocking, self.recorder, schema, self.responses, self.model, self.model_latencies)
+
+    def model_copy(self, update: Optional[Dict] = None):
+        """The same fake as another model, as ChatClient's routing makes it."""
+        model = (update or {}).get("model", self.model)
+        return FakeChatModel(
+            self.model_latencies.get(model, self.latency), self.blocking, self.recorder,
+            self.schema, self.responses, model, self.model_latencies,
+        )
+
+    def _result(self):
+        if self.schema is not None:
+            return build_schema(self.schema, **self.responses.get(self.schema.__name__, {}))
+        return AIMessage(content="# Executive Summary\nBenchmark output.")
+
+    def invoke(self, messages, config=None, **kwargs):
+        self.recorder.record(self.latency)
+        time.sleep(self.latency)
+        return self._result()
+
+    async def ainvoke(self, messages, config=None, **kwargs):
+        self.recorder.record(self.latency)
+        if self.blocking:
+            time.sleep(self.latency)
+        else:
+            await asyncio.sleep(self.latency)
+        return self._result()
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """LangChain chat model that emits a long report word by word.
+
+    Unlike FakeChatModel it goes through the callback machinery, so
+    ``astream_events`` sees its tokens the way it sees Gemini's.
+    """
+
+    first_token_latency: float = 0.5
+    token_latency: float = 0.01
+    words: int = 2000
+    model: str = "fake-streaming"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def with_structured_output(self, schema, **kwargs):
+        return FakeChatModel(latency=self.first_token_latency, schema=schema)
+
+    def _text(self) -> str:
+        return " ".join(f"word{i}" for i in range(self.words))
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        time.sleep(self.first_token_latency + self.token_latency * self.words)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._text()))])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.first_token_latency)
+        for i, word in enumerate(self._text().split(" ")):
+            await asyncio.sleep(self.token_latency)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word if i == 0 else " " + word))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        await asyncio.sleep(self.first_token_latency + self.token_latency * self.words)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._text()))])
+
+
+def fake_search_results(query: str, n_results: int = 5, raw_chars: int = 2000) -> dict:
+    """A Tavily-shaped search response."""
+    return {
+        "query": query,
+        "answer": "benchmark answer",
+        "results": [
+            {
+                "title": f"Result {i} for {query}",
+                "url": f"https://example.com/{abs(hash(query))}/{i}",
+                "content": f"Snippet {i} about {query}.",
+                "raw_content": ("lorem ipsum " * (raw_chars // 12))[:raw_chars],
+            }
+            for i in range(n_results)
+        ],
+    }
+
+
+def make_fake_search(latency: float = 0.2, recorder: Optional[CallRecorder] = None):
+    recorder = recorder or CallRecorder()
+
+    async def tavily_search_async(query: str, *args, **kwargs) -> str:
+        recorder.record(latency)
+        await asyncio.sleep(latency)
+        return json.dumps(fake_search_results(query))
+
+    return tavily_search_async